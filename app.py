@@ -1,17 +1,52 @@
-from flask import Flask, jsonify, render_template, request, make_response, Response
+from flask import Flask, jsonify, render_template, request, make_response, Response, stream_with_context, g, has_request_context
 import sqlite3
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, date, timezone
 import json
 import time
 import csv
 from io import StringIO
 from contextlib import closing
+from functools import wraps
 import os
-from services.dashboard_service import DashboardService
+from services.dashboard_service import SELECTION_SOURCES, DashboardService
+from services.balance_cube import get_all_cube_stats
+from services.response_cache import get_response_cache
+from services.json_stream import JSON_STREAM_DEFAULT, iter_json, iter_rows, serializer_backend
+from services.chart_format import CHART_FORMATS, apply_chart_format
+from services.downsample import MAX_POINTS, MIN_POINTS, downsample_charts
+from services.data_version import get_data_version
+from services.balance_calendar import get_balance_calendar, sql_date
+from services.page_snapshots import ACCOUNT_SORT_COLUMNS, SORT_ORDERS, get_page_snapshots
+from services.query_executor import executor_stats
+from services.compression import COMPRESSIBLE_MIMETYPES, COMPRESSION_MIN_BYTES, choose_encoding, compress, compress_stream
+from repositories.connection_pool import get_pool, get_all_pool_stats
+from repositories.rollup_repository import RollupRepository
 
 app = Flask(__name__)
 
 # Add after_request handler for cache control
+@app.after_request
+def compress_response(response):
+    """Compress text responses for clients that accept it (cached API bodies arrive encoded)."""
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if not encoding:
+        return response
+    if response.is_streamed:
+        response.response = compress_stream(response.iter_encoded(), encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESSION_MIN_BYTES:
+            return response
+        response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
 @app.after_request
 def add_header(response):
     # Disable caching for HTML pages
@@ -25,10 +60,174 @@ def add_header(response):
     return response
 
 def get_db_connection():
-    conn = sqlite3.connect('client_exploration.db')
-    conn.row_factory = sqlite3.Row
+    # Pooled connection; close() returns it to the shared pool. Connections
+    # a request leaves open (early return, exception) are returned when it ends
+    conn = get_pool('client_exploration.db').checkout()
+    if has_request_context():
+        g.setdefault('db_connections', []).append(conn)
     return conn
 
+@app.teardown_request
+def release_db_connections(exc=None):
+    """Return the request's pooled connections; close() is a no-op on ones already returned.
+    
+    Streaming responses use stream_with_context, so this runs only after
+    their body (and the cursors feeding it) has been sent.
+    """
+    for conn in g.pop('db_connections', []):
+        conn.close()
+
+rollup_repo = RollupRepository('client_exploration.db')
+
+def balance_calendar():
+    # Cached balance dates; literal latest/as-of dates replace MAX() subqueries
+    return get_balance_calendar('client_exploration.db')
+
+def get_rollup_history(filters, start_date, end_date):
+    """Chart history from the daily rollup tables.
+    
+    Returns None when the rollups are behind account_balances or cannot answer
+    the filters, in which case the caller runs its raw aggregation query.
+    """
+    if not rollup_repo.is_current():
+        return None
+    return rollup_repo.get_history(
+        filters, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'),
+        date_alias='balance_date', balance_alias='total_balance'
+    )
+
+def request_args_key():
+    """Query arguments that change a response's content (stream only changes framing)."""
+    return tuple(sorted(item for item in request.args.items(multi=True) if item[0] != 'stream'))
+
+def conditional_get(view):
+    """Answer If-None-Match / If-Modified-Since with 304 before the view runs.
+    
+    The weak ETag hashes the data version (latest balance date and load
+    sequence, see services/data_version.py), the path, the query string and
+    today's date (v1 history windows end yesterday). Clients revalidate on
+    every use (Cache-Control: no-cache).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = get_data_version('client_exploration.db')
+        etag = version.etag(request.path, request_args_key(), date.today().isoformat())
+        last_modified = version.last_modified
+        if last_modified is not None:
+            # Responses also change at midnight when the history windows move
+            midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+            last_modified = max(last_modified, midnight)
+        
+        not_modified = False
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(etag)
+        elif request.if_modified_since and last_modified is not None:
+            not_modified = last_modified <= request.if_modified_since
+        
+        response = Response(status=304) if not_modified else make_response(view(*args, **kwargs))
+        if response.status_code in (200, 304):
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return wrapper
+
+def wants_stream():
+    """Whether to stream the JSON body (?stream=1/0, default from JSON_STREAM)."""
+    value = request.args.get('stream')
+    if value is None:
+        return JSON_STREAM_DEFAULT
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+def stream_json_response(data, on_close=None):
+    """Stream data as JSON; row iterators in it are consumed as the body is sent.
+    
+    on_close runs once the body is sent (or the client goes away), e.g. to
+    return the connection whose cursors feed the stream.
+    """
+    def generate():
+        try:
+            yield from iter_json(data)
+        finally:
+            if on_close is not None:
+                on_close()
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+def get_chart_format():
+    """Requested chart history encoding (?chart_format=columnar); defaults to rows."""
+    chart_format = request.args.get('chart_format', 'rows')
+    return chart_format if chart_format in CHART_FORMATS else 'rows'
+
+def get_max_points():
+    """Requested chart resolution (?max_points=N); None keeps every point."""
+    max_points = request.args.get('max_points', type=int)
+    if max_points is None or not MIN_POINTS <= max_points <= MAX_POINTS:
+        return None
+    return max_points
+
+def format_charts(data):
+    """Downsample and encode a v1 response's history series as requested.
+    
+    See services/downsample.py and services/chart_format.py; the result is
+    cached by shared_cache under the request's query string.
+    """
+    data = downsample_charts(data, get_max_points(), 'balance_date', 'total_balance')
+    return apply_chart_format(data, get_chart_format(), 'balance_date', 'total_balance')
+
+def http_cache_key(api):
+    """Response cache key for this request: path, query string and today's date
+    (v1 history windows end yesterday)."""
+    return (api, request.path, request_args_key(), date.today().isoformat())
+
+def encoded_json_response(body, encoding):
+    response = Response(body, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+def get_cached_response(key):
+    """A cached JSON response for the negotiated encoding, sent as stored bytes."""
+    cache = get_response_cache()
+    cache.set_generation(get_data_version('client_exploration.db').token)
+    encoding = choose_encoding(request.accept_encodings)
+    body = cache.get(key + (encoding or 'identity',))
+    if body is None:
+        return None
+    return encoded_json_response(body, encoding)
+
+def cache_response(key, response):
+    """Store a successful JSON response compressed for the negotiated encoding.
+    
+    Returns the response to send: the stored bytes, so the body is encoded
+    once. Streamed bodies are consumed by the client and are not stored.
+    """
+    if not (isinstance(response, Response) and response.status_code == 200 and response.is_json
+            and not response.is_streamed):
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    body = response.get_data()
+    if encoding:
+        body = compress(body, encoding)
+    get_response_cache().set(key + (encoding or 'identity',), body)
+    return encoded_json_response(body, encoding)
+
+def shared_cache(view):
+    """Serve a v1 JSON endpoint from the shared response cache.
+    
+    Entries are the encoded response bodies (see cache_response); only
+    successful JSON responses are stored.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = http_cache_key('v1')
+        cached = get_cached_response(key)
+        if cached is not None:
+            return cached
+        return cache_response(key, view(*args, **kwargs))
+    return wrapper
+
 def generate_qtd_ytd_cte_sql(entity_type, group_by_field, where_clause):
     """
     Generate QTD/YTD CTE SQL fragment for consistent metric calculation
@@ -53,10 +252,7 @@ def generate_qtd_ytd_cte_sql(entity_type, group_by_field, where_clause):
             FROM account_balances ab
             {client_mapping_join}
             LEFT JOIN funds f ON ab.fund_name = f.fund_name
-            WHERE ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances
-                WHERE balance_date <= ?
-            )
+            WHERE ab.balance_date = ?
             {where_clause}
             GROUP BY {group_by_field}
         ),
@@ -67,10 +263,7 @@ def generate_qtd_ytd_cte_sql(entity_type, group_by_field, where_clause):
             FROM account_balances ab
             {client_mapping_join}
             LEFT JOIN funds f ON ab.fund_name = f.fund_name
-            WHERE ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances
-                WHERE balance_date <= ?
-            )
+            WHERE ab.balance_date = ?
             {where_clause}
             GROUP BY {group_by_field}
         )'''
@@ -206,6 +399,8 @@ def index():
     return render_template('index.html', cache_bust=cache_bust, feature_flags=feature_flags, v2_rollout_percentage=v2_rollout_percentage)
 
 @app.route('/api/overview')
+@conditional_get
+@shared_cache
 def get_overview():
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -219,6 +414,13 @@ def get_overview():
     # Get aggregated balance over time for different periods
     end_date = (datetime.now() - timedelta(days=1)).date()  # Yesterday
     
+    # Text filters as understood by the rollup tables
+    rollup_filters = {
+        'fund_ticker_or_name_like': f'%{fund_ticker_filter}%' if fund_ticker_filter else None,
+        'client_name_like': f'%{client_name_filter}%' if client_name_filter else None,
+        'account_id_like': f'%{account_number_filter}%' if account_number_filter else None,
+    }
+    
     # 90-day history for recent chart
     start_date_90 = end_date - timedelta(days=90)
     
@@ -253,8 +455,10 @@ def get_overview():
         ORDER BY ab.balance_date
     '''
     
-    cursor.execute(query_90, tuple(params))
-    recent_history = [dict(row) for row in cursor.fetchall()]
+    recent_history = get_rollup_history(rollup_filters, start_date_90, end_date)
+    if recent_history is None:
+        cursor.execute(query_90, tuple(params))
+        recent_history = [dict(row) for row in cursor.fetchall()]
     
     # 3-year history for long-term chart
     start_date_3y = end_date - timedelta(days=365*3)
@@ -290,18 +494,19 @@ def get_overview():
         ORDER BY ab.balance_date
     '''
     
-    cursor.execute(query_3y, tuple(params_3y))
-    long_term_history = [dict(row) for row in cursor.fetchall()]
+    long_term_history = get_rollup_history(rollup_filters, start_date_3y, end_date)
+    if long_term_history is None:
+        cursor.execute(query_3y, tuple(params_3y))
+        long_term_history = [dict(row) for row in cursor.fetchall()]
     
     # Calculate QTD and YTD start dates
-    today = end_date
-    current_quarter = (today.month - 1) // 3
-    qtd_start = date(today.year, current_quarter * 3 + 1, 1)
-    ytd_start = date(today.year, 1, 1)
+    calendar = balance_calendar()
+    latest = sql_date(calendar.latest)
+    qtd_as_of, ytd_as_of = calendar.period_starts(end_date)
     
     # Get client aggregated balances with QTD and YTD changes
     # Build dynamic query with filters
-    base_current = """
+    base_current = f"""
         SELECT 
             cm.client_name,
             cm.client_id,
@@ -309,7 +514,7 @@ def get_overview():
         FROM client_mapping cm
         JOIN account_balances ab ON cm.account_id = ab.account_id
         LEFT JOIN funds f ON ab.fund_name = f.fund_name
-        WHERE ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
+        WHERE ab.balance_date = {latest}
     """
     
     base_qtd = """
@@ -319,10 +524,7 @@ def get_overview():
         FROM client_mapping cm
         JOIN account_balances ab ON cm.account_id = ab.account_id
         LEFT JOIN funds f ON ab.fund_name = f.fund_name
-        WHERE ab.balance_date = (
-            SELECT MAX(balance_date) FROM account_balances 
-            WHERE balance_date <= ?
-        )
+        WHERE ab.balance_date = ?
     """
     
     base_ytd = """
@@ -332,10 +534,7 @@ def get_overview():
         FROM client_mapping cm
         JOIN account_balances ab ON cm.account_id = ab.account_id
         LEFT JOIN funds f ON ab.fund_name = f.fund_name
-        WHERE ab.balance_date = (
-            SELECT MAX(balance_date) FROM account_balances 
-            WHERE balance_date <= ?
-        )
+        WHERE ab.balance_date = ?
     """
     
     # Build filter conditions
@@ -394,16 +593,16 @@ def get_overview():
     # Execute with appropriate parameters
     if filter_conditions:
         # Parameters: filter_params for current + qtd_date + filter_params for qtd + ytd_date + filter_params for ytd
-        all_params = filter_params + [qtd_start.strftime('%Y-%m-%d')] + filter_params + [ytd_start.strftime('%Y-%m-%d')] + filter_params
+        all_params = filter_params + [qtd_as_of] + filter_params + [ytd_as_of] + filter_params
         cursor.execute(query, tuple(all_params))
     else:
-        cursor.execute(query, (qtd_start.strftime('%Y-%m-%d'), ytd_start.strftime('%Y-%m-%d')))
+        cursor.execute(query, (qtd_as_of, ytd_as_of))
     
     client_balances = [dict(row) for row in cursor.fetchall()]
     
     # Get fund aggregated balances with QTD and YTD changes
     # Build dynamic query with filters
-    base_current_fund = """
+    base_current_fund = f"""
         SELECT 
             ab.fund_name,
             f.fund_ticker,
@@ -412,7 +611,7 @@ def get_overview():
         FROM account_balances ab
         JOIN client_mapping cm ON ab.account_id = cm.account_id
         LEFT JOIN funds f ON ab.fund_name = f.fund_name
-        WHERE ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
+        WHERE ab.balance_date = {latest}
     """
     
     base_qtd_fund = """
@@ -422,10 +621,7 @@ def get_overview():
         FROM account_balances ab
         JOIN client_mapping cm ON ab.account_id = cm.account_id
         LEFT JOIN funds f ON ab.fund_name = f.fund_name
-        WHERE ab.balance_date = (
-            SELECT MAX(balance_date) FROM account_balances 
-            WHERE balance_date <= ?
-        )
+        WHERE ab.balance_date = ?
     """
     
     base_ytd_fund = """
@@ -435,10 +631,7 @@ def get_overview():
         FROM account_balances ab
         JOIN client_mapping cm ON ab.account_id = cm.account_id
         LEFT JOIN funds f ON ab.fund_name = f.fund_name
-        WHERE ab.balance_date = (
-            SELECT MAX(balance_date) FROM account_balances 
-            WHERE balance_date <= ?
-        )
+        WHERE ab.balance_date = ?
     """
     
     # Reuse filter conditions from client query
@@ -480,16 +673,16 @@ def get_overview():
     # Execute with appropriate parameters
     if filter_conditions:
         # Parameters: filter_params for current + qtd_date + filter_params for qtd + ytd_date + filter_params for ytd
-        fund_params = filter_params + [qtd_start.strftime('%Y-%m-%d')] + filter_params + [ytd_start.strftime('%Y-%m-%d')] + filter_params
+        fund_params = filter_params + [qtd_as_of] + filter_params + [ytd_as_of] + filter_params
         cursor.execute(fund_query, tuple(fund_params))
     else:
-        cursor.execute(fund_query, (qtd_start.strftime('%Y-%m-%d'), ytd_start.strftime('%Y-%m-%d')))
+        cursor.execute(fund_query, (qtd_as_of, ytd_as_of))
     
     fund_balances = [dict(row) for row in cursor.fetchall()]
     
     # Get account details with QTD and YTD - aggregated at account level
     # Build dynamic query with filters
-    base_current_account = """
+    base_current_account = f"""
         SELECT 
             ab.account_id,
             cm.client_name,
@@ -497,7 +690,7 @@ def get_overview():
         FROM account_balances ab
         JOIN client_mapping cm ON ab.account_id = cm.account_id
         LEFT JOIN funds f ON ab.fund_name = f.fund_name
-        WHERE ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
+        WHERE ab.balance_date = {latest}
     """
     
     base_qtd_account = """
@@ -507,10 +700,7 @@ def get_overview():
         FROM account_balances ab
         JOIN client_mapping cm ON ab.account_id = cm.account_id
         LEFT JOIN funds f ON ab.fund_name = f.fund_name
-        WHERE ab.balance_date = (
-            SELECT MAX(balance_date) FROM account_balances 
-            WHERE balance_date <= ?
-        )
+        WHERE ab.balance_date = ?
     """
     
     base_ytd_account = """
@@ -520,10 +710,7 @@ def get_overview():
         FROM account_balances ab
         JOIN client_mapping cm ON ab.account_id = cm.account_id
         LEFT JOIN funds f ON ab.fund_name = f.fund_name
-        WHERE ab.balance_date = (
-            SELECT MAX(balance_date) FROM account_balances 
-            WHERE balance_date <= ?
-        )
+        WHERE ab.balance_date = ?
     """
     
     # Build complete account query using same filter conditions
@@ -562,14 +749,17 @@ def get_overview():
     # Execute with appropriate parameters (same as fund query)
     if filter_conditions:
         # Parameters: filter_params for current + qtd_date + filter_params for qtd + ytd_date + filter_params for ytd
-        account_params = filter_params + [qtd_start.strftime('%Y-%m-%d')] + filter_params + [ytd_start.strftime('%Y-%m-%d')] + filter_params
+        account_params = filter_params + [qtd_as_of] + filter_params + [ytd_as_of] + filter_params
         cursor.execute(account_query, tuple(account_params))
     else:
-        cursor.execute(account_query, (qtd_start.strftime('%Y-%m-%d'), ytd_start.strftime('%Y-%m-%d')))
+        cursor.execute(account_query, (qtd_as_of, ytd_as_of))
     
-    account_details = [dict(row) for row in cursor.fetchall()]
+    # Streaming reads account rows from the cursor while the body is sent
+    stream = wants_stream()
+    account_details = iter_rows(cursor) if stream else [dict(row) for row in cursor.fetchall()]
     
-    conn.close()
+    if not stream:
+        conn.close()
     
     # Build response and apply filters
     response_data = {
@@ -580,9 +770,13 @@ def get_overview():
         'account_details': account_details
     }
     
-    return jsonify(apply_filters_to_response(response_data))
+    if stream:
+        return stream_json_response(format_charts(apply_filters_to_response(response_data)), on_close=conn.close)
+    return jsonify(format_charts(apply_filters_to_response(response_data)))
 
 @app.route('/api/client/<client_id>')
+@conditional_get
+@shared_cache
 def get_client_data(client_id):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -608,6 +802,12 @@ def get_client_data(client_id):
     # Get client balance history for different periods
     end_date = (datetime.now() - timedelta(days=1)).date()  # Yesterday
     
+    rollup_filters = {
+        'client_ids': [client_id],
+        'fund_ticker_or_name_like': f'%{fund_ticker_filter}%' if fund_ticker_filter else None,
+        'account_id_like': f'%{account_number_filter}%' if account_number_filter else None,
+    }
+    
     # 90-day history
     start_date_90 = end_date - timedelta(days=90)
     fund_join = "LEFT JOIN funds f ON ab.fund_name = f.fund_name" if fund_ticker_filter else ""
@@ -624,8 +824,10 @@ def get_client_data(client_id):
         ORDER BY ab.balance_date
     '''
     params_90 = [client_id, start_date_90.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')] + filter_params
-    cursor.execute(query_90, params_90)
-    recent_history = [dict(row) for row in cursor.fetchall()]
+    recent_history = get_rollup_history(rollup_filters, start_date_90, end_date)
+    if recent_history is None:
+        cursor.execute(query_90, params_90)
+        recent_history = [dict(row) for row in cursor.fetchall()]
     
     # 3-year history
     start_date_3y = end_date - timedelta(days=365*3)
@@ -642,14 +844,15 @@ def get_client_data(client_id):
         ORDER BY ab.balance_date
     '''
     params_3y = [client_id, start_date_3y.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')] + filter_params
-    cursor.execute(query_3y, params_3y)
-    long_term_history = [dict(row) for row in cursor.fetchall()]
+    long_term_history = get_rollup_history(rollup_filters, start_date_3y, end_date)
+    if long_term_history is None:
+        cursor.execute(query_3y, params_3y)
+        long_term_history = [dict(row) for row in cursor.fetchall()]
     
     # Calculate QTD and YTD start dates
-    today = end_date
-    current_quarter = (today.month - 1) // 3
-    qtd_start = date(today.year, current_quarter * 3 + 1, 1)
-    ytd_start = date(today.year, 1, 1)
+    calendar = balance_calendar()
+    latest = sql_date(calendar.latest)
+    qtd_as_of, ytd_as_of = calendar.period_starts(end_date)
     
     # Get client's fund balances with QTD and YTD
     query = f'''
@@ -662,7 +865,7 @@ def get_client_data(client_id):
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             LEFT JOIN funds f ON ab.fund_name = f.fund_name
-            WHERE cm.client_id = ? AND ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
+            WHERE cm.client_id = ? AND ab.balance_date = {latest}
             {filter_clause}
             GROUP BY ab.fund_name, f.fund_ticker
         ),
@@ -673,10 +876,7 @@ def get_client_data(client_id):
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             {fund_join}
-            WHERE cm.client_id = ? AND ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE cm.client_id = ? AND ab.balance_date = ?
             {filter_clause}
             GROUP BY ab.fund_name
         ),
@@ -687,10 +887,7 @@ def get_client_data(client_id):
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             {fund_join}
-            WHERE cm.client_id = ? AND ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE cm.client_id = ? AND ab.balance_date = ?
             {filter_clause}
             GROUP BY ab.fund_name
         )
@@ -713,7 +910,7 @@ def get_client_data(client_id):
         ORDER BY cb.current_balance DESC
     '''
     
-    fund_params = [client_id] + filter_params + [client_id, qtd_start.strftime('%Y-%m-%d')] + filter_params + [client_id, ytd_start.strftime('%Y-%m-%d')] + filter_params
+    fund_params = [client_id] + filter_params + [client_id, qtd_as_of] + filter_params + [client_id, ytd_as_of] + filter_params
     cursor.execute(query, fund_params)
     fund_balances = [dict(row) for row in cursor.fetchall()]
     
@@ -726,7 +923,7 @@ def get_client_data(client_id):
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             {fund_join}
-            WHERE cm.client_id = ? AND ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
+            WHERE cm.client_id = ? AND ab.balance_date = {latest}
             {filter_clause}
             GROUP BY ab.account_id
         ),
@@ -737,10 +934,7 @@ def get_client_data(client_id):
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             {fund_join}
-            WHERE cm.client_id = ? AND ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE cm.client_id = ? AND ab.balance_date = ?
             {filter_clause}
             GROUP BY ab.account_id
         ),
@@ -751,10 +945,7 @@ def get_client_data(client_id):
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             {fund_join}
-            WHERE cm.client_id = ? AND ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE cm.client_id = ? AND ab.balance_date = ?
             {filter_clause}
             GROUP BY ab.account_id
         )
@@ -775,7 +966,7 @@ def get_client_data(client_id):
         ORDER BY cb.current_balance DESC
     '''
     
-    account_params = [client_id] + filter_params + [client_id, qtd_start.strftime('%Y-%m-%d')] + filter_params + [client_id, ytd_start.strftime('%Y-%m-%d')] + filter_params
+    account_params = [client_id] + filter_params + [client_id, qtd_as_of] + filter_params + [client_id, ytd_as_of] + filter_params
     cursor.execute(query, account_params)
     account_details = [dict(row) for row in cursor.fetchall()]
     
@@ -789,9 +980,11 @@ def get_client_data(client_id):
         'account_details': account_details
     }
     
-    return jsonify(apply_filters_to_response(response_data))
+    return jsonify(format_charts(apply_filters_to_response(response_data)))
 
 @app.route('/api/fund/<fund_name>')
+@conditional_get
+@shared_cache
 def get_fund_data(fund_name):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -817,6 +1010,12 @@ def get_fund_data(fund_name):
     # Get fund balance history for different periods
     end_date = (datetime.now() - timedelta(days=1)).date()  # Yesterday
     
+    rollup_filters = {
+        'fund_names': [fund_name],
+        'client_name_like': f'%{client_name_filter}%' if client_name_filter else None,
+        'account_id_like': f'%{account_number_filter}%' if account_number_filter else None,
+    }
+    
     # 90-day history
     start_date_90 = end_date - timedelta(days=90)
     client_join = "JOIN client_mapping cm ON ab.account_id = cm.account_id" if client_name_filter or account_number_filter else ""
@@ -832,8 +1031,10 @@ def get_fund_data(fund_name):
         ORDER BY ab.balance_date
     '''
     params_90 = [fund_name, start_date_90.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')] + filter_params
-    cursor.execute(query_90, params_90)
-    recent_history = [dict(row) for row in cursor.fetchall()]
+    recent_history = get_rollup_history(rollup_filters, start_date_90, end_date)
+    if recent_history is None:
+        cursor.execute(query_90, params_90)
+        recent_history = [dict(row) for row in cursor.fetchall()]
     
     # 3-year history
     start_date_3y = end_date - timedelta(days=365*3)
@@ -849,14 +1050,15 @@ def get_fund_data(fund_name):
         ORDER BY ab.balance_date
     '''
     params_3y = [fund_name, start_date_3y.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')] + filter_params
-    cursor.execute(query_3y, params_3y)
-    long_term_history = [dict(row) for row in cursor.fetchall()]
+    long_term_history = get_rollup_history(rollup_filters, start_date_3y, end_date)
+    if long_term_history is None:
+        cursor.execute(query_3y, params_3y)
+        long_term_history = [dict(row) for row in cursor.fetchall()]
     
     # Calculate QTD and YTD start dates
-    today = end_date
-    current_quarter = (today.month - 1) // 3
-    qtd_start = date(today.year, current_quarter * 3 + 1, 1)
-    ytd_start = date(today.year, 1, 1)
+    calendar = balance_calendar()
+    latest = sql_date(calendar.latest)
+    qtd_as_of, ytd_as_of = calendar.period_starts(end_date)
     
     # Get client balances for this fund with QTD and YTD
     query = f'''
@@ -868,7 +1070,7 @@ def get_fund_data(fund_name):
                 COUNT(DISTINCT ab.account_id) as account_count
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.fund_name = ? AND ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
+            WHERE ab.fund_name = ? AND ab.balance_date = {latest}
             {filter_clause}
             GROUP BY cm.client_name, cm.client_id
         ),
@@ -878,10 +1080,7 @@ def get_fund_data(fund_name):
                 SUM(ab.balance) as qtd_start_balance
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.fund_name = ? AND ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE ab.fund_name = ? AND ab.balance_date = ?
             {filter_clause}
             GROUP BY cm.client_id
         ),
@@ -891,10 +1090,7 @@ def get_fund_data(fund_name):
                 SUM(ab.balance) as ytd_start_balance
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.fund_name = ? AND ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE ab.fund_name = ? AND ab.balance_date = ?
             {filter_clause}
             GROUP BY cm.client_id
         )
@@ -917,7 +1113,7 @@ def get_fund_data(fund_name):
         ORDER BY cb.current_balance DESC
     '''
     
-    client_params = [fund_name] + filter_params + [fund_name, qtd_start.strftime('%Y-%m-%d')] + filter_params + [fund_name, ytd_start.strftime('%Y-%m-%d')] + filter_params
+    client_params = [fund_name] + filter_params + [fund_name, qtd_as_of] + filter_params + [fund_name, ytd_as_of] + filter_params
     cursor.execute(query, client_params)
     client_balances = [dict(row) for row in cursor.fetchall()]
     
@@ -930,7 +1126,7 @@ def get_fund_data(fund_name):
                 ab.balance as current_balance
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.fund_name = ? AND ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
+            WHERE ab.fund_name = ? AND ab.balance_date = {latest}
             {filter_clause}
         ),
         qtd_start_balances AS (
@@ -939,10 +1135,7 @@ def get_fund_data(fund_name):
                 ab.balance as qtd_start_balance
             FROM account_balances ab
             {client_join}
-            WHERE ab.fund_name = ? AND ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE ab.fund_name = ? AND ab.balance_date = ?
             {filter_clause}
         ),
         ytd_start_balances AS (
@@ -951,10 +1144,7 @@ def get_fund_data(fund_name):
                 ab.balance as ytd_start_balance
             FROM account_balances ab
             {client_join}
-            WHERE ab.fund_name = ? AND ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE ab.fund_name = ? AND ab.balance_date = ?
             {filter_clause}
         )
         SELECT 
@@ -975,7 +1165,7 @@ def get_fund_data(fund_name):
         ORDER BY cb.client_name, cb.account_id
     '''
     
-    account_params = [fund_name] + filter_params + [fund_name, qtd_start.strftime('%Y-%m-%d')] + filter_params + [fund_name, ytd_start.strftime('%Y-%m-%d')] + filter_params
+    account_params = [fund_name] + filter_params + [fund_name, qtd_as_of] + filter_params + [fund_name, ytd_as_of] + filter_params
     cursor.execute(query, account_params)
     account_details = [dict(row) for row in cursor.fetchall()]
     
@@ -995,10 +1185,12 @@ def get_fund_data(fund_name):
         'account_details': account_details
     }
     
-    return jsonify(apply_filters_to_response(response_data))
+    return jsonify(format_charts(apply_filters_to_response(response_data)))
 
 @app.route('/api/account/<account_id>')
 @app.route('/api/account/<account_id>/fund/<fund_name>')
+@conditional_get
+@shared_cache
 def get_account_data(account_id, fund_name=None):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -1060,13 +1252,14 @@ def get_account_data(account_id, fund_name=None):
         balance_by_date_3y[date]['total_balance'] += row['balance']
     long_term_history = list(balance_by_date_3y.values())
     
+    latest = sql_date(balance_calendar().latest)
     # Get current fund allocation
     query = f'''
         SELECT 
             fund_name,
             balance
         FROM account_balances
-        WHERE account_id = ? AND balance_date = (SELECT MAX(balance_date) FROM account_balances)
+        WHERE account_id = ? AND balance_date = {latest}
               {fund_filter}
         ORDER BY balance DESC
     '''
@@ -1084,9 +1277,11 @@ def get_account_data(account_id, fund_name=None):
         'fund_allocation': fund_allocation
     }
     
-    return jsonify(apply_filters_to_response(response_data))
+    return jsonify(format_charts(apply_filters_to_response(response_data)))
 
 @app.route('/api/client/<client_id>/fund/<fund_name>')
+@conditional_get
+@shared_cache
 def get_client_fund_data(client_id, fund_name):
     """Get data for a specific client-fund combination"""
     conn = get_db_connection()
@@ -1094,6 +1289,7 @@ def get_client_fund_data(client_id, fund_name):
     
     # Get balance history for this client-fund combination
     end_date = (datetime.now() - timedelta(days=1)).date()
+    rollup_filters = {'client_ids': [client_id], 'fund_names': [fund_name]}
     
     # 90-day history
     start_date_90 = end_date - timedelta(days=90)
@@ -1108,8 +1304,10 @@ def get_client_fund_data(client_id, fund_name):
         GROUP BY ab.balance_date
         ORDER BY ab.balance_date
     '''
-    cursor.execute(query_90, (client_id, fund_name, start_date_90.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
-    recent_history = [dict(row) for row in cursor.fetchall()]
+    recent_history = get_rollup_history(rollup_filters, start_date_90, end_date)
+    if recent_history is None:
+        cursor.execute(query_90, (client_id, fund_name, start_date_90.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
+        recent_history = [dict(row) for row in cursor.fetchall()]
     
     # 3-year history
     start_date_3y = end_date - timedelta(days=365*3)
@@ -1124,8 +1322,10 @@ def get_client_fund_data(client_id, fund_name):
         GROUP BY ab.balance_date
         ORDER BY ab.balance_date
     '''
-    cursor.execute(query_3y, (client_id, fund_name, start_date_3y.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
-    long_term_history = [dict(row) for row in cursor.fetchall()]
+    long_term_history = get_rollup_history(rollup_filters, start_date_3y, end_date)
+    if long_term_history is None:
+        cursor.execute(query_3y, (client_id, fund_name, start_date_3y.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
+        long_term_history = [dict(row) for row in cursor.fetchall()]
     
     # Get client info
     cursor.execute('SELECT client_name FROM client_mapping WHERE client_id = ? LIMIT 1', (client_id,))
@@ -1138,13 +1338,12 @@ def get_client_fund_data(client_id, fund_name):
     fund_ticker = dict(fund_row)['fund_ticker'] if fund_row else 'UNKNOWN'
     
     # Calculate QTD and YTD
-    today = end_date
-    current_quarter = (today.month - 1) // 3
-    qtd_start = date(today.year, current_quarter * 3 + 1, 1)
-    ytd_start = date(today.year, 1, 1)
+    calendar = balance_calendar()
+    latest = sql_date(calendar.latest)
+    qtd_as_of, ytd_as_of = calendar.period_starts(end_date)
     
     # Get fund balance with QTD and YTD for this client-fund combination
-    query = '''
+    query = f'''
         WITH current_balance AS (
             SELECT 
                 SUM(ab.balance) as current_balance,
@@ -1152,7 +1351,7 @@ def get_client_fund_data(client_id, fund_name):
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             WHERE cm.client_id = ? AND ab.fund_name = ? 
-                  AND ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
+                  AND ab.balance_date = {latest}
         ),
         qtd_start_balance AS (
             SELECT 
@@ -1160,10 +1359,7 @@ def get_client_fund_data(client_id, fund_name):
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             WHERE cm.client_id = ? AND ab.fund_name = ?
-                  AND ab.balance_date = (
-                      SELECT MAX(balance_date) FROM account_balances 
-                      WHERE balance_date <= ?
-                  )
+                  AND ab.balance_date = ?
         ),
         ytd_start_balance AS (
             SELECT 
@@ -1171,10 +1367,7 @@ def get_client_fund_data(client_id, fund_name):
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             WHERE cm.client_id = ? AND ab.fund_name = ?
-                  AND ab.balance_date = (
-                      SELECT MAX(balance_date) FROM account_balances 
-                      WHERE balance_date <= ?
-                  )
+                  AND ab.balance_date = ?
         )
         SELECT 
             cb.current_balance as total_balance,
@@ -1192,13 +1385,13 @@ def get_client_fund_data(client_id, fund_name):
         CROSS JOIN ytd_start_balance ysb
     '''
     
-    cursor.execute(query, (client_id, fund_name, client_id, fund_name, qtd_start.strftime('%Y-%m-%d'), 
-                          client_id, fund_name, ytd_start.strftime('%Y-%m-%d')))
+    cursor.execute(query, (client_id, fund_name, client_id, fund_name, qtd_as_of, 
+                          client_id, fund_name, ytd_as_of))
     fund_data_row = cursor.fetchone()
     fund_data = dict(fund_data_row) if fund_data_row else {}
     
     # Get account details for this client-fund combination with QTD and YTD
-    query = '''
+    query = f'''
         WITH current_balances AS (
             SELECT 
                 ab.account_id,
@@ -1206,7 +1399,7 @@ def get_client_fund_data(client_id, fund_name):
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             WHERE cm.client_id = ? AND ab.fund_name = ?
-                  AND ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
+                  AND ab.balance_date = {latest}
         ),
         qtd_start_balances AS (
             SELECT 
@@ -1214,10 +1407,7 @@ def get_client_fund_data(client_id, fund_name):
                 ab.balance as qtd_start_balance
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE cm.client_id = ? AND ab.fund_name = ? AND ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE cm.client_id = ? AND ab.fund_name = ? AND ab.balance_date = ?
         ),
         ytd_start_balances AS (
             SELECT 
@@ -1225,10 +1415,7 @@ def get_client_fund_data(client_id, fund_name):
                 ab.balance as ytd_start_balance
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE cm.client_id = ? AND ab.fund_name = ? AND ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE cm.client_id = ? AND ab.fund_name = ? AND ab.balance_date = ?
         )
         SELECT 
             cb.account_id,
@@ -1247,13 +1434,13 @@ def get_client_fund_data(client_id, fund_name):
         ORDER BY cb.account_id
     '''
     
-    cursor.execute(query, (client_id, fund_name, client_id, fund_name, qtd_start.strftime('%Y-%m-%d'), 
-                          client_id, fund_name, ytd_start.strftime('%Y-%m-%d')))
+    cursor.execute(query, (client_id, fund_name, client_id, fund_name, qtd_as_of, 
+                          client_id, fund_name, ytd_as_of))
     account_details = [dict(row) for row in cursor.fetchall()]
     
     conn.close()
     
-    return jsonify({
+    return jsonify(format_charts({
         'recent_history': recent_history,
         'long_term_history': long_term_history,
         'client_balances': [{
@@ -1276,37 +1463,25 @@ def get_client_fund_data(client_id, fund_name):
                            'balance': acc['balance'],
                            'qtd_change': acc.get('qtd_change'),
                            'ytd_change': acc.get('ytd_change')} for acc in account_details]
-    })
+    }))
 
 @app.route('/api/date/<date_string>')
+@conditional_get
+@shared_cache
 def get_date_data(date_string):
     """Get all data for a specific date"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     # Validate date format
     try:
         selected_date = datetime.strptime(date_string, '%Y-%m-%d').date()
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     
-    # Calculate QTD and YTD start dates relative to selected date
-    current_quarter = (selected_date.month - 1) // 3
-    qtd_start = date(selected_date.year, current_quarter * 3 + 1, 1)
-    
-    # If selected date is before quarter start, go to previous quarter
-    if selected_date < qtd_start:
-        if current_quarter == 0:
-            qtd_start = date(selected_date.year - 1, 10, 1)  # Q4 of previous year
-        else:
-            qtd_start = date(selected_date.year, (current_quarter - 1) * 3 + 1, 1)
-    
-    # Get last day of previous quarter for QTD calculation
-    qtd_comparison_date = qtd_start - timedelta(days=1)
+    conn = get_db_connection()
+    cursor = conn.cursor()
     
-    # YTD always starts from beginning of the year
-    ytd_start = date(selected_date.year, 1, 1)
-    ytd_comparison_date = date(selected_date.year - 1, 12, 31)
+    # QTD and YTD compare against the last balances of the previous quarter and year
+    calendar = balance_calendar()
+    qtd_as_of, ytd_as_of = calendar.prior_period_ends(selected_date)
     
     # Get client balances for the selected date with QTD and YTD
     query = '''
@@ -1326,10 +1501,7 @@ def get_date_data(date_string):
                 SUM(ab.balance) as qtd_start_balance
             FROM client_mapping cm
             JOIN account_balances ab ON cm.account_id = ab.account_id
-            WHERE ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE ab.balance_date = ?
             GROUP BY cm.client_id
         ),
         ytd_start_balances AS (
@@ -1338,10 +1510,7 @@ def get_date_data(date_string):
                 SUM(ab.balance) as ytd_start_balance
             FROM client_mapping cm
             JOIN account_balances ab ON cm.account_id = ab.account_id
-            WHERE ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE ab.balance_date = ?
             GROUP BY cm.client_id
         )
         SELECT 
@@ -1361,7 +1530,7 @@ def get_date_data(date_string):
         LEFT JOIN ytd_start_balances ysb ON cb.client_id = ysb.client_id
         ORDER BY cb.current_balance DESC
     '''
-    cursor.execute(query, (date_string, qtd_comparison_date.strftime('%Y-%m-%d'), ytd_comparison_date.strftime('%Y-%m-%d')))
+    cursor.execute(query, (date_string, qtd_as_of, ytd_as_of))
     client_balances = [dict(row) for row in cursor.fetchall()]
     
     # Get fund balances for the selected date with QTD and YTD
@@ -1382,10 +1551,7 @@ def get_date_data(date_string):
                 fund_name,
                 SUM(balance) as qtd_start_balance
             FROM account_balances
-            WHERE balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE balance_date = ?
             GROUP BY fund_name
         ),
         ytd_start_balances AS (
@@ -1393,10 +1559,7 @@ def get_date_data(date_string):
                 fund_name,
                 SUM(balance) as ytd_start_balance
             FROM account_balances
-            WHERE balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE balance_date = ?
             GROUP BY fund_name
         )
         SELECT 
@@ -1417,7 +1580,7 @@ def get_date_data(date_string):
         LEFT JOIN ytd_start_balances ysb ON cb.fund_name = ysb.fund_name
         ORDER BY cb.current_balance DESC
     '''
-    cursor.execute(query, (date_string, qtd_comparison_date.strftime('%Y-%m-%d'), ytd_comparison_date.strftime('%Y-%m-%d')))
+    cursor.execute(query, (date_string, qtd_as_of, ytd_as_of))
     fund_balances = [dict(row) for row in cursor.fetchall()]
     
     # Get account details for the selected date with QTD and YTD - aggregated at account level
@@ -1437,10 +1600,7 @@ def get_date_data(date_string):
                 ab.account_id,
                 SUM(ab.balance) as qtd_start_balance
             FROM account_balances ab
-            WHERE ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE ab.balance_date = ?
             GROUP BY ab.account_id
         ),
         ytd_start_balances AS (
@@ -1448,10 +1608,7 @@ def get_date_data(date_string):
                 ab.account_id,
                 SUM(ab.balance) as ytd_start_balance
             FROM account_balances ab
-            WHERE ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= ?
-            )
+            WHERE ab.balance_date = ?
             GROUP BY ab.account_id
         )
         SELECT 
@@ -1471,7 +1628,7 @@ def get_date_data(date_string):
         LEFT JOIN ytd_start_balances ysb ON cb.account_id = ysb.account_id
         ORDER BY cb.current_balance DESC
     '''
-    cursor.execute(query, (date_string, qtd_comparison_date.strftime('%Y-%m-%d'), ytd_comparison_date.strftime('%Y-%m-%d')))
+    cursor.execute(query, (date_string, qtd_as_of, ytd_as_of))
     account_details = [dict(row) for row in cursor.fetchall()]
     
     # Get filter parameters from query string
@@ -1502,6 +1659,7 @@ def get_date_data(date_string):
         history_params.extend(account_ids)
     
     history_where_clause = ' AND '.join(history_where_clauses) if history_where_clauses else '1=1'
+    rollup_filters = {'client_ids': client_ids, 'fund_names': fund_names, 'account_ids': account_ids}
     
     # 90-day history
     start_date_90 = end_date - timedelta(days=90)
@@ -1516,8 +1674,10 @@ def get_date_data(date_string):
         ORDER BY ab.balance_date
     '''
     params_90 = [start_date_90.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')] + history_params
-    cursor.execute(query_90, params_90)
-    recent_history = [dict(row) for row in cursor.fetchall()]
+    recent_history = get_rollup_history(rollup_filters, start_date_90, end_date)
+    if recent_history is None:
+        cursor.execute(query_90, params_90)
+        recent_history = [dict(row) for row in cursor.fetchall()]
     
     # 3-year history
     start_date_3y = end_date - timedelta(days=365*3)
@@ -1532,19 +1692,21 @@ def get_date_data(date_string):
         ORDER BY ab.balance_date
     '''
     params_3y = [start_date_3y.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')] + history_params
-    cursor.execute(query_3y, params_3y)
-    long_term_history = [dict(row) for row in cursor.fetchall()]
+    long_term_history = get_rollup_history(rollup_filters, start_date_3y, end_date)
+    if long_term_history is None:
+        cursor.execute(query_3y, params_3y)
+        long_term_history = [dict(row) for row in cursor.fetchall()]
     
     conn.close()
     
-    return jsonify({
+    return jsonify(format_charts({
         'selected_date': date_string,
         'recent_history': recent_history,
         'long_term_history': long_term_history,
         'client_balances': client_balances,
         'fund_balances': fund_balances,
         'account_details': account_details
-    })
+    }))
 
 def _build_csv_where_clause(args):
     """Build WHERE clause for CSV download queries"""
@@ -1628,6 +1790,8 @@ def _get_historical_balances(conn, account_fund_pairs, target_date):
     return results
 
 @app.route('/api/data')
+@conditional_get
+@shared_cache
 def get_filtered_data():
     """Unified endpoint for fetching data with multiple filters."""
     conn = get_db_connection()
@@ -1693,15 +1857,23 @@ def get_filtered_data():
     start_date_3y = end_date - timedelta(days=365*3)
     
     # Calculate QTD and YTD start dates
-    today = end_date
-    current_quarter = (today.month - 1) // 3
-    qtd_start = date(today.year, current_quarter * 3 + 1, 1)
-    ytd_start = date(today.year, 1, 1)
+    calendar = balance_calendar()
+    latest = sql_date(calendar.latest)
+    qtd_as_of, ytd_as_of = calendar.period_starts(end_date)
     
     # Add debug logging for QTD/YTD calculation with full intersection
     if client_ids or fund_names or account_ids:
         app.logger.debug(f"QTD/YTD calculation using full intersection: {full_where_clause}")
     
+    rollup_filters = {
+        'client_ids': client_ids,
+        'fund_names': fund_names,
+        'account_ids': account_ids,
+        'fund_ticker_or_name_like': f'%{fund_ticker_filter}%' if fund_ticker_filter else None,
+        'client_name_like': f'%{client_name_filter}%' if client_name_filter else None,
+        'account_id_like': f'%{account_number_filter}%' if account_number_filter else None,
+    }
+    
     # Get recent history (90 days)
     recent_query = f'''
         SELECT 
@@ -1716,9 +1888,11 @@ def get_filtered_data():
         ORDER BY ab.balance_date
     '''
     
-    cursor.execute(recent_query, [start_date_90.strftime('%Y-%m-%d'), 
-                                  end_date.strftime('%Y-%m-%d')] + full_params)
-    recent_history = [dict(row) for row in cursor.fetchall()]
+    recent_history = get_rollup_history(rollup_filters, start_date_90, end_date)
+    if recent_history is None:
+        cursor.execute(recent_query, [start_date_90.strftime('%Y-%m-%d'), 
+                                      end_date.strftime('%Y-%m-%d')] + full_params)
+        recent_history = [dict(row) for row in cursor.fetchall()]
     
     # Get long-term history (3 years)
     long_query = f'''
@@ -1734,9 +1908,11 @@ def get_filtered_data():
         ORDER BY ab.balance_date
     '''
     
-    cursor.execute(long_query, [start_date_3y.strftime('%Y-%m-%d'), 
-                                end_date.strftime('%Y-%m-%d')] + full_params)
-    long_term_history = [dict(row) for row in cursor.fetchall()]
+    long_term_history = get_rollup_history(rollup_filters, start_date_3y, end_date)
+    if long_term_history is None:
+        cursor.execute(long_query, [start_date_3y.strftime('%Y-%m-%d'), 
+                                    end_date.strftime('%Y-%m-%d')] + full_params)
+        long_term_history = [dict(row) for row in cursor.fetchall()]
     
     # Get client balances with QTD and YTD using full intersection for metrics
     qtd_ytd_client_sql = generate_qtd_ytd_cte_sql('client', 'cm.client_id', full_where_clause)
@@ -1749,7 +1925,7 @@ def get_filtered_data():
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             LEFT JOIN funds f ON ab.fund_name = f.fund_name
-            WHERE ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
+            WHERE ab.balance_date = {latest}
             {full_where_clause}
             GROUP BY cm.client_name, cm.client_id
         ),
@@ -1774,7 +1950,7 @@ def get_filtered_data():
         ORDER BY cb.current_balance DESC
     '''
     
-    client_query_params = full_params + [qtd_start.strftime('%Y-%m-%d')] + full_params + [ytd_start.strftime('%Y-%m-%d')] + full_params
+    client_query_params = full_params + [qtd_as_of] + full_params + [ytd_as_of] + full_params
     cursor.execute(client_query, client_query_params)
     client_balances = [dict(row) for row in cursor.fetchall()]
     
@@ -1789,7 +1965,7 @@ def get_filtered_data():
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             LEFT JOIN funds f ON ab.fund_name = f.fund_name
-            WHERE ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
+            WHERE ab.balance_date = {latest}
             {full_where_clause}
             GROUP BY ab.fund_name, f.fund_ticker
         ),
@@ -1814,7 +1990,7 @@ def get_filtered_data():
         ORDER BY cb.current_balance DESC
     '''
     
-    fund_query_params = full_params + [qtd_start.strftime('%Y-%m-%d')] + full_params + [ytd_start.strftime('%Y-%m-%d')] + full_params
+    fund_query_params = full_params + [qtd_as_of] + full_params + [ytd_as_of] + full_params
     cursor.execute(fund_query, fund_query_params)
     fund_balances = [dict(row) for row in cursor.fetchall()]
     
@@ -1829,7 +2005,7 @@ def get_filtered_data():
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             LEFT JOIN funds f ON ab.fund_name = f.fund_name
-            WHERE ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
+            WHERE ab.balance_date = {latest}
             {full_where_clause}
             GROUP BY ab.account_id, cm.client_name
         ),
@@ -1854,11 +2030,19 @@ def get_filtered_data():
         ORDER BY cb.current_balance DESC
     '''
     
-    account_query_params = full_params + [qtd_start.strftime('%Y-%m-%d')] + full_params + [ytd_start.strftime('%Y-%m-%d')] + full_params
-    cursor.execute(account_query, account_query_params)
-    account_details = [dict(row) for row in cursor.fetchall()]
+    account_query_params = full_params + [qtd_as_of] + full_params + [ytd_as_of] + full_params
+    # Streaming reads account rows from their own cursor while the body is sent
+    stream = wants_stream()
+    if stream:
+        account_cursor = conn.execute(account_query, account_query_params)
+        account_details = iter_rows(account_cursor)
+    else:
+        cursor.execute(account_query, account_query_params)
+        account_details = [dict(row) for row in cursor.fetchall()]
     
-    # Get KPI metrics (using full filtering)
+    # Get KPI metrics (using full filtering), comparing with the last balance
+    # date at least 30 days before the latest
+    past_date = sql_date(calendar.latest and calendar.as_of_days_before(calendar.latest, 30))
     kpi_query = '''
         WITH current_totals AS (
             SELECT 
@@ -1869,7 +2053,7 @@ def get_filtered_data():
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             LEFT JOIN funds f ON ab.fund_name = f.fund_name
-            WHERE ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
+            WHERE ab.balance_date = {latest}
             {full_where_clause}
         ),
         past_totals AS (
@@ -1878,10 +2062,7 @@ def get_filtered_data():
             FROM account_balances ab
             JOIN client_mapping cm ON ab.account_id = cm.account_id
             LEFT JOIN funds f ON ab.fund_name = f.fund_name
-            WHERE ab.balance_date = (
-                SELECT MAX(balance_date) FROM account_balances 
-                WHERE balance_date <= date((SELECT MAX(balance_date) FROM account_balances), '-30 days')
-            )
+            WHERE ab.balance_date = {past_date}
             {full_where_clause}
         )
         SELECT 
@@ -1898,7 +2079,7 @@ def get_filtered_data():
         CROSS JOIN past_totals pt
     '''
 
-    cursor.execute(kpi_query.format(full_where_clause=full_where_clause), full_params + full_params)
+    cursor.execute(kpi_query.format(full_where_clause=full_where_clause, latest=latest, past_date=past_date), full_params + full_params)
     kpi_result = cursor.fetchone()
 
     if kpi_result:
@@ -1914,7 +2095,8 @@ def get_filtered_data():
             'change_30d_pct': 0
         }
     
-    conn.close()
+    if not stream:
+        conn.close()
     
     # Build response
     response_data = {
@@ -1934,9 +2116,12 @@ def get_filtered_data():
         'kpi_metrics': kpi_metrics
     }
     
-    return jsonify(response_data)
+    if stream:
+        return stream_json_response(format_charts(response_data), on_close=conn.close)
+    return jsonify(format_charts(response_data))
 
 @app.route('/api/v2/dashboard', methods=['GET'])
+@conditional_get
 def dashboard_v2():
     """
     Unified dashboard API endpoint v2.
@@ -1949,6 +2134,16 @@ def dashboard_v2():
     - client_name: Text filter for client name (partial match)
     - fund_ticker: Text filter for fund ticker (prefix match)
     - account_number: Text filter for account number (partial match)
+    - views: Comma-separated selection_source variants (client, fund, account)
+      to return alongside the intersection, computed from one shared scan;
+      not combinable with page_size
+    - page_size: Rows per table page (1-1000); charts are then omitted
+    - client_cursor, fund_cursor, account_cursor: next_cursor of the previous page
+    - sort: Page order, "total_balance" (descending, default) or "name"
+    - max_points: Downsample chart series (LTTB) to at most this many points
+    - chart_format: "columnar" for compact chart history series (default "rows")
+    - stream: 1 to stream the JSON body incrementally, 0 to buffer it
+      (default from JSON_STREAM)
     
     Returns:
     - Unified response with all dashboard data including:
@@ -1958,6 +2153,7 @@ def dashboard_v2():
       - charts: Historical data for 90-day and 3-year charts
       - kpi_metrics: Dashboard KPIs (total AUM, counts, etc.)
       - metadata: Applied filters and reference date
+      - views: With views, each variant's source table listing every item
     """
     try:
         # Extract list parameters
@@ -2020,30 +2216,219 @@ def dashboard_v2():
         fund_cursor = request.args.get('fund_cursor')
         account_cursor = request.args.get('account_cursor')
         
+        sort = request.args.get('sort', 'total_balance')
+        if sort not in SORT_ORDERS:
+            return jsonify({
+                "type": "/errors/invalid-parameter",
+                "title": "Invalid Sort",
+                "status": 400,
+                "detail": f"Sort must be one of {', '.join(SORT_ORDERS)}, got '{sort}'",
+                "instance": request.path
+            }), 400
+        
+        views = [view for value in request.args.getlist('views') for view in value.split(',') if view]
+        invalid_views = [view for view in views if view not in SELECTION_SOURCES]
+        if invalid_views:
+            return jsonify({
+                "type": "/errors/invalid-parameter",
+                "title": "Invalid View",
+                "status": 400,
+                "detail": f"Views must be among {', '.join(SELECTION_SOURCES)}, got '{invalid_views[0]}'",
+                "instance": request.path
+            }), 400
+        if views and page_size:
+            return jsonify({
+                "type": "/errors/invalid-parameter",
+                "title": "Invalid Parameter Combination",
+                "status": 400,
+                "detail": "views cannot be combined with page_size",
+                "instance": request.path
+            }), 400
+        
+        chart_format = request.args.get('chart_format', 'rows')
+        if chart_format not in CHART_FORMATS:
+            return jsonify({
+                "type": "/errors/invalid-parameter",
+                "title": "Invalid Chart Format",
+                "status": 400,
+                "detail": f"Chart format must be one of {', '.join(CHART_FORMATS)}, got '{chart_format}'",
+                "instance": request.path
+            }), 400
+        
+        max_points = request.args.get('max_points', type=int)
+        if max_points is not None and not MIN_POINTS <= max_points <= MAX_POINTS:
+            return jsonify({
+                "type": "/errors/invalid-parameter",
+                "title": "Invalid Max Points",
+                "status": 400,
+                "detail": f"max_points must be between {MIN_POINTS} and {MAX_POINTS}, got {max_points}",
+                "instance": request.path
+            }), 400
+        
         # Create service and get data
         service = DashboardService()
         
+        cache_key = http_cache_key('v2')
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            for source in ([None] + views if views else [selection_source]):
+                service.record_access(client_ids, fund_names, account_ids, text_filters, source)
+            return cached
+        
         # When paginating, exclude charts by default to reduce payload size
         include_charts = page_size is None
+        # Non-streamed responses are cached here as encoded bytes; the service
+        # caches only what is streamed, so no response is stored twice
+        stream = wants_stream()
+        
+        if views:
+            data = service.get_dashboard_views(
+                views,
+                client_ids=client_ids if client_ids else None,
+                fund_names=fund_names if fund_names else None,
+                account_ids=account_ids if account_ids else None,
+                date=date,
+                text_filters=text_filters if text_filters else None,
+                include_charts=include_charts,
+                max_points=max_points,
+                use_cache=stream
+            )
+        else:
+            data = service.get_dashboard_data(
+                client_ids=client_ids if client_ids else None,
+                fund_names=fund_names if fund_names else None,
+                account_ids=account_ids if account_ids else None,
+                date=date,
+                text_filters=text_filters if text_filters else None,
+                page_size=page_size,
+                client_cursor=client_cursor,
+                fund_cursor=fund_cursor,
+                account_cursor=account_cursor,
+                include_charts=include_charts,
+                selection_source=selection_source,
+                max_points=max_points,
+                sort=sort,
+                use_cache=stream
+            )
+        
+        if "charts" in data and chart_format != "rows":
+            # Copy: data may be the response cache's own object
+            data = dict(data, charts=apply_chart_format(data["charts"], chart_format, "date", "balance"))
+        
+        if stream:
+            return stream_json_response(data)
+        return cache_response(cache_key, jsonify(data))
+        
+    except sqlite3.DatabaseError as e:
+        app.logger.error(f"Database error in v2 dashboard: {str(e)}")
+        return jsonify({
+            "type": "/errors/database-error",
+            "title": "Database Error",
+            "status": 503,
+            "detail": "Unable to retrieve data from database",
+            "instance": request.path
+        }), 503
+        
+    except Exception as e:
+        app.logger.error(f"Unexpected error in v2 dashboard: {str(e)}")
+        return jsonify({
+            "type": "/errors/internal-error",
+            "title": "Internal Server Error", 
+            "status": 500,
+            "detail": "An unexpected error occurred while processing your request",
+            "instance": request.path
+        }), 500
+
+@app.route('/api/v2/accounts', methods=['GET'])
+@conditional_get
+def accounts_v2():
+    """
+    Windowed account table for virtual scrolling.
+    
+    Query parameters:
+    - client_id, fund_name, account_id, date, client_name, fund_ticker,
+      account_number, selection_source: as for /api/v2/dashboard
+    - sort: Column to sort by (balance, account_id, client_name, qtd_change,
+      ytd_change; default balance)
+    - order: asc or desc (default desc)
+    - search: Case-insensitive text matched against account ID and client name
+    - offset: Index of the first row (default 0)
+    - limit: Rows in the window, 1-1000 (default 100)
+    
+    Returns:
+    - rows: The account rows of the window
+    - total: Number of rows matching the filters and search
+    - offset, limit, metadata (reference date, sort, order, search)
+    """
+    try:
+        client_ids = request.args.getlist('client_id')
+        fund_names = request.args.getlist('fund_name')
+        account_ids = request.args.getlist('account_id')
+        date = request.args.get('date')
+        if date:
+            try:
+                datetime.strptime(date, '%Y-%m-%d')
+            except ValueError:
+                return jsonify({
+                    "type": "/errors/invalid-parameter",
+                    "title": "Invalid Date Format",
+                    "status": 400,
+                    "detail": f"Date '{date}' is not in valid YYYY-MM-DD format",
+                    "instance": request.path
+                }), 400
         
-        data = service.get_dashboard_data(
+        text_filters = {}
+        for name in ('client_name', 'fund_ticker', 'account_number'):
+            if request.args.get(name):
+                text_filters[name] = request.args.get(name)
+        
+        sort = request.args.get('sort', 'balance')
+        if sort not in ACCOUNT_SORT_COLUMNS:
+            return jsonify({
+                "type": "/errors/invalid-parameter",
+                "title": "Invalid Sort",
+                "status": 400,
+                "detail": f"Sort must be one of {', '.join(ACCOUNT_SORT_COLUMNS)}, got '{sort}'",
+                "instance": request.path
+            }), 400
+        order = request.args.get('order', 'desc')
+        if order not in ('asc', 'desc'):
+            return jsonify({
+                "type": "/errors/invalid-parameter",
+                "title": "Invalid Order",
+                "status": 400,
+                "detail": f"Order must be asc or desc, got '{order}'",
+                "instance": request.path
+            }), 400
+        
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', 100, type=int)
+        if offset < 0 or not 1 <= limit <= 1000:
+            return jsonify({
+                "type": "/errors/invalid-parameter",
+                "title": "Invalid Window",
+                "status": 400,
+                "detail": f"offset must be >= 0 and limit between 1 and 1000, got {offset} and {limit}",
+                "instance": request.path
+            }), 400
+        
+        data = DashboardService().get_account_window(
             client_ids=client_ids if client_ids else None,
             fund_names=fund_names if fund_names else None,
             account_ids=account_ids if account_ids else None,
             date=date,
             text_filters=text_filters if text_filters else None,
-            page_size=page_size,
-            client_cursor=client_cursor,
-            fund_cursor=fund_cursor,
-            account_cursor=account_cursor,
-            include_charts=include_charts,
-            selection_source=selection_source
+            selection_source=request.args.get('selection_source'),
+            sort=sort,
+            descending=order == 'desc',
+            search=request.args.get('search', '').strip(),
+            offset=offset,
+            limit=limit
         )
-        
         return jsonify(data)
         
     except sqlite3.DatabaseError as e:
-        app.logger.error(f"Database error in v2 dashboard: {str(e)}")
+        app.logger.error(f"Database error in v2 accounts: {str(e)}")
         return jsonify({
             "type": "/errors/database-error",
             "title": "Database Error",
@@ -2053,16 +2438,29 @@ def dashboard_v2():
         }), 503
         
     except Exception as e:
-        app.logger.error(f"Unexpected error in v2 dashboard: {str(e)}")
+        app.logger.error(f"Unexpected error in v2 accounts: {str(e)}")
         return jsonify({
             "type": "/errors/internal-error",
-            "title": "Internal Server Error", 
+            "title": "Internal Server Error",
             "status": 500,
             "detail": "An unexpected error occurred while processing your request",
             "instance": request.path
         }), 500
 
+@app.route('/api/v2/stats', methods=['GET'])
+def stats_v2():
+    """Runtime performance counters (connection pools, response cache, page snapshots, in-memory cube, query executor)."""
+    return jsonify({
+        "db_pools": get_all_pool_stats(),
+        "response_cache": get_response_cache().stats(),
+        "page_snapshots": get_page_snapshots().stats(),
+        "balance_cube": get_all_cube_stats(),
+        "query_executor": executor_stats(),
+        "json_serializer": serializer_backend()
+    })
+
 @app.route('/api/download_csv/count')
+@conditional_get
 def get_download_count():
     """Get count of rows that would be in CSV"""
     try:
@@ -2083,6 +2481,7 @@ def get_download_count():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/download_csv')
+@conditional_get
 def download_csv():
     """Download filtered data as CSV"""
     MAX_ROWS = 1000000  # 1M row limit
@@ -2209,7 +2608,7 @@ def download_csv():
         filename = f"financial_data_{filter_summary}_{timestamp}.csv"
         
         return Response(
-            generate_csv(),
+            stream_with_context(generate_csv()),
             mimetype='text/csv',
             headers={
                 'Content-Disposition': f'attachment; filename={filename}'
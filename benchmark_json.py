@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+JSON response benchmark for the Client Exploration Tool.
+Compares the buffered (jsonify) and streaming (?stream=1) response paths of
+the large JSON endpoints on peak RSS, time-to-first-byte and total time.
+Each endpoint/mode pair runs in a fresh process so peak RSS is not shared
+between runs. Run it from the directory holding client_exploration.db.
+"""
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+import statistics
+
+DEFAULT_URLS = [
+    '/api/overview',
+    '/api/data?fund_ticker=A',
+    '/api/v2/dashboard',
+]
+MODES = ('buffered', 'stream')
+
+
+def current_rss_kb():
+    """Resident set size of this process in KB (Linux), else peak so far."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_child(url, mode, repeat):
+    """Time one endpoint in one mode; prints a JSON result line."""
+    # Measure the endpoint itself, not the response cache
+    os.environ['RESPONSE_CACHE_SIZE'] = '0'
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app import app
+
+    client = app.test_client()
+    separator = '&' if '?' in url else '?'
+    target = f"{url}{separator}stream={'1' if mode == 'stream' else '0'}"
+
+    rss_before = current_rss_kb()
+    ttfb, totals, size = [], [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(target, buffered=False)
+        first = None
+        size = 0
+        for chunk in response.response:
+            if first is None:
+                first = time.perf_counter()
+            size += len(chunk)
+        response.close()
+        finished = time.perf_counter()
+        ttfb.append(((first or finished) - started) * 1000)
+        totals.append((finished - started) * 1000)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({
+        'url': url,
+        'mode': mode,
+        'status': response.status_code,
+        'bytes': size,
+        'ttfb_ms': statistics.median(ttfb),
+        'total_ms': statistics.median(totals),
+        'peak_rss_mb': peak_kb / 1024,
+        'peak_growth_mb': max(peak_kb - rss_before, 0) / 1024,
+    }))
+
+
+def run_benchmark(urls, repeat):
+    results = []
+    for url in urls:
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', url, '--mode', mode,
+                 '--repeat', str(repeat)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    from services.json_stream import serializer_backend
+    print(f"Serializer: {serializer_backend()}, median of {repeat} request(s)\n")
+    print(f"{'endpoint':<32} {'mode':<9} {'bytes':>9} {'ttfb ms':>9} {'total ms':>9} "
+          f"{'peak MB':>8} {'growth MB':>10}")
+    for r in results:
+        print(f"{r['url']:<32} {r['mode']:<9} {r['bytes']:>9} {r['ttfb_ms']:>9.1f} "
+              f"{r['total_ms']:>9.1f} {r['peak_rss_mb']:>8.1f} {r['peak_growth_mb']:>10.1f}")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare buffered and streaming JSON responses')
+    parser.add_argument('urls', nargs='*', default=DEFAULT_URLS, help='Endpoints to benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Requests per endpoint and mode')
+    parser.add_argument('--child', metavar='URL', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.mode, args.repeat)
+    else:
+        run_benchmark(args.urls, args.repeat)
@@ -67,4 +67,28 @@ CREATE INDEX IF NOT EXISTS idx_cached_overview_date ON cached_overview(as_of_dat
 CREATE INDEX IF NOT EXISTS idx_cached_client_date ON cached_client_balances(as_of_date);
 CREATE INDEX IF NOT EXISTS idx_cached_fund_date ON cached_fund_balances(as_of_date);
 CREATE INDEX IF NOT EXISTS idx_cached_account_date ON cached_account_details(as_of_date);
-CREATE INDEX IF NOT EXISTS idx_cached_chart_key_date ON cached_chart_data(cache_key, as_of_date);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_cached_chart_key_date ON cached_chart_data(cache_key, as_of_date);
+
+-- Cached dashboard responses for filter combinations (per-client, per-fund,
+-- per-account and popular multi-selections), keyed by a hash of the
+-- canonical filter JSON
+CREATE TABLE IF NOT EXISTS cached_dashboard (
+    filter_hash TEXT NOT NULL,
+    as_of_date DATE NOT NULL,
+    filters TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (filter_hash, as_of_date)
+);
+
+-- Daily request counts per filter combination, used to rank what to warm
+CREATE TABLE IF NOT EXISTS dashboard_access_log (
+    filter_hash TEXT NOT NULL,
+    access_date DATE NOT NULL,
+    filters TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (filter_hash, access_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_cached_dashboard_date ON cached_dashboard(as_of_date);
+CREATE INDEX IF NOT EXISTS idx_dashboard_access_date ON dashboard_access_log(access_date);
@@ -3,8 +3,11 @@ from datetime import datetime, timedelta
 import random
 from uuid import uuid4
 
-def create_database():
-    conn = sqlite3.connect('client_exploration.db')
+from repositories.rollup_repository import ROLLUP_TABLES, refresh_missing_rollups
+from repositories.data_load_repository import record_data_load
+
+def create_database(db_path='client_exploration.db'):
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     # Create client_mapping table
@@ -36,10 +39,7 @@ def create_database():
         )
     ''')
     
-    # Create indexes for better performance
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_account_balances_date ON account_balances(balance_date)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_account_balances_account ON account_balances(account_id)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_client_mapping_client ON client_mapping(client_id)')
+    # Indexes are created by migrations.py after the data is loaded
     
     conn.commit()
     conn.close()
@@ -53,6 +53,16 @@ def generate_sample_data():
     cursor.execute('DELETE FROM client_mapping')
     cursor.execute('DELETE FROM funds')
     
+    # Rollups are derived from the balances and rebuilt after loading
+    existing_rollups = cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ({})".format(
+            ', '.join('?' for _ in ROLLUP_TABLES)
+        ),
+        list(ROLLUP_TABLES)
+    ).fetchall()
+    for (table,) in existing_rollups:
+        cursor.execute(f'DELETE FROM {table}')
+    
     # Sample clients and funds
     clients = [
         'Acme Corporation', 'Global Trade Inc', 'Tech Innovations LLC', 
@@ -144,5 +154,14 @@ def generate_sample_data():
     print("Sample data generated successfully!")
 
 if __name__ == '__main__':
+    from migrations import apply_migrations
     create_database()
-    generate_sample_data()
\ No newline at end of file
+    generate_sample_data()
+    # Indexes, rollups and other schema upgrades are built once the data is loaded
+    apply_migrations()
+    conn = sqlite3.connect('client_exploration.db')
+    refresh_missing_rollups(conn)
+    row_count = conn.execute('SELECT COUNT(*) FROM account_balances').fetchone()[0]
+    record_data_load(conn, 'database.py sample data', row_count)
+    conn.commit()
+    conn.close()
\ No newline at end of file
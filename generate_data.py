@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Bulk synthetic data generator for scale testing the Client Exploration Tool.
+Builds a fresh database of any size (e.g. 50k accounts x 20 funds x 3 years)
+with NumPy balance paths and batched executemany inserts straight into the
+compact balance_facts table under relaxed durability pragmas, then builds
+the rollups as database.py does.
+The same --seed and --end-date always produce the same dataset, so
+benchmarks can be compared across machines and branches.
+"""
+import os
+import time
+import uuid
+import sqlite3
+import logging
+import argparse
+from datetime import date, datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # required here, optional for the app itself
+    np = None
+
+from database import create_database
+from migrations import apply_migrations
+from repositories.balance_repository import day_number
+from repositories.data_load_repository import record_data_load
+from repositories.rollup_repository import refresh_missing_rollups
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FUND_NAMES = [
+    'Government Money Market', 'Prime Money Market', 'Treasury Fund',
+    'Municipal Money Market', 'Corporate Bond Fund', 'Institutional Fund'
+]
+FUND_TICKERS = ['GMMF', 'PMMF', 'TRSF', 'MUNF', 'CBND', 'INST']
+
+# Bulk-load settings: the file is rebuilt from scratch, so a crash mid-load
+# only costs a rerun
+LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA cache_size = -200000",
+    "PRAGMA temp_store = MEMORY",
+]
+
+
+class BulkDataGenerator:
+    def __init__(self, db_path="client_exploration.db", clients=10, accounts=35, funds=6,
+                 funds_per_account=3, days=1095, seed=42, end_date=None, batch_rows=100000):
+        if np is None:
+            raise RuntimeError("generate_data.py needs NumPy (pip install numpy)")
+        self.db_path = db_path
+        self.clients = clients
+        self.accounts = max(accounts, clients)
+        self.funds = funds
+        self.funds_per_account = min(funds_per_account, funds)
+        self.days = days
+        self.seed = seed
+        self.end_date = end_date or date.today()
+        self.batch_rows = batch_rows
+        self.rng = np.random.default_rng(seed)
+
+    def fund_table(self):
+        """(fund_name, fund_ticker) pairs; the sample funds first, then numbered ones."""
+        funds = list(zip(FUND_NAMES, FUND_TICKERS))[:self.funds]
+        for i in range(len(funds), self.funds):
+            funds.append((f'Money Market Fund {i + 1:03d}', f'M{i + 1:03d}'))
+        return funds
+
+    def client_mapping(self):
+        """(account_id, client_name, client_id) rows; every client has at least one account."""
+        client_ids = [str(uuid.UUID(bytes=self.rng.bytes(16), version=4)) for _ in range(self.clients)]
+        owners = np.concatenate([
+            np.arange(self.clients),
+            self.rng.integers(0, self.clients, self.accounts - self.clients)
+        ])
+        owners.sort()
+        rows = []
+        next_account = np.zeros(self.clients, dtype=np.int64)
+        for client in owners.tolist():
+            rows.append((f'C{client:05d}-{next_account[client]:03d}', f'Client {client:05d}',
+                         client_ids[client]))
+            next_account[client] += 1
+        return rows
+
+    def holdings(self, account_ids, fund_names):
+        """Account and fund keys of every position; each account keeps its funds for the whole period."""
+        fund_index = np.argsort(self.rng.random((len(account_ids), len(fund_names))), axis=1)
+        fund_index = np.sort(fund_index[:, :self.funds_per_account], axis=1)
+        holding_accounts = np.repeat(np.arange(1, len(account_ids) + 1), self.funds_per_account)
+        holding_funds = fund_index.ravel() + 1
+        return holding_accounts.tolist(), holding_funds.tolist()
+
+    def generate(self):
+        """Create the database and load every table; returns the balance row count."""
+        started = time.perf_counter()
+        # Migrating the empty database leaves account_balances as the view
+        # over balance_facts, which is then filled directly
+        create_database(self.db_path)
+        apply_migrations(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        for pragma in LOAD_PRAGMAS:
+            conn.execute(pragma)
+
+        funds = self.fund_table()
+        mapping = self.client_mapping()
+        conn.executemany('INSERT INTO funds (fund_name, fund_ticker) VALUES (?, ?)', funds)
+        conn.executemany(
+            'INSERT INTO client_mapping (account_id, client_name, client_id) VALUES (?, ?, ?)', mapping
+        )
+        account_ids = [row[0] for row in mapping]
+        fund_names = [name for name, _ in funds]
+        conn.executemany('INSERT INTO balance_accounts (account_key, account_id) VALUES (?, ?)',
+                         enumerate(account_ids, start=1))
+        conn.executemany('INSERT INTO balance_funds (fund_key, fund_name) VALUES (?, ?)',
+                         enumerate(fund_names, start=1))
+        holding_accounts, holding_funds = self.holdings(account_ids, fund_names)
+        positions = len(holding_accounts)
+        logger.info(f"{self.clients} clients, {self.accounts} accounts, {len(funds)} funds, "
+                    f"{positions} positions x {self.days} days = {positions * self.days:,} balance rows")
+
+        # Same model as database.py: linear growth of 2-5% a year with
+        # +/-0.1% daily noise around a per-position base balance
+        base = self.rng.uniform(500000, 5000000, positions)
+        growth = self.rng.uniform(0.02, 0.05, positions) / 365
+        start_day = day_number((self.end_date - timedelta(days=self.days - 1)).isoformat())
+
+        row_count = 0
+        batch = []
+        for day in range(self.days):
+            noise = self.rng.uniform(-0.001, 0.001, positions)
+            cents = np.round(base * (1 + growth * day) * (1 + noise) * 100).astype(np.int64).tolist()
+            # Rows arrive in primary key order, so the B-tree is only appended to
+            batch.extend(zip([start_day + day] * positions, holding_accounts, holding_funds, cents))
+            if len(batch) >= self.batch_rows or day == self.days - 1:
+                conn.executemany(
+                    'INSERT INTO balance_facts (day, account_key, fund_key, balance_cents) '
+                    'VALUES (?, ?, ?, ?)', batch
+                )
+                row_count += len(batch)
+                batch = []
+        conn.commit()
+        elapsed = time.perf_counter() - started
+        logger.info(f"Inserted {row_count:,} balance rows in {elapsed:.1f}s "
+                    f"({row_count / elapsed:,.0f} rows/sec)")
+        conn.close()
+        return row_count
+
+    def finish(self, row_count):
+        """Build the rollups after the load, as database.py does."""
+        started = time.perf_counter()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        refresh_missing_rollups(conn)
+        record_data_load(conn, f'generate_data.py seed={self.seed}', row_count)
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.close()
+        logger.info(f"Rollups built in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate a reproducible synthetic dataset for benchmarks')
+    parser.add_argument('--db', default='client_exploration.db', help='Path to SQLite database')
+    parser.add_argument('--clients', type=int, default=10, help='Number of clients')
+    parser.add_argument('--accounts', type=int, default=35, help='Number of accounts')
+    parser.add_argument('--funds', type=int, default=6, help='Number of funds')
+    parser.add_argument('--funds-per-account', type=int, default=3, help='Funds held by each account')
+    parser.add_argument('--days', type=int, default=1095, help='Days of balance history')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--end-date', metavar='YYYY-MM-DD',
+                        help='Last balance date (default: today; fix it for identical datasets)')
+    parser.add_argument('--batch-rows', type=int, default=100000, help='Rows per executemany batch')
+    parser.add_argument('--force', action='store_true', help='Replace the database if it exists')
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        if not args.force:
+            parser.error(f"{args.db} exists; pass --force to replace it")
+        os.remove(args.db)
+
+    end_date = datetime.strptime(args.end_date, '%Y-%m-%d').date() if args.end_date else None
+    generator = BulkDataGenerator(args.db, args.clients, args.accounts, args.funds,
+                                  args.funds_per_account, args.days, args.seed, end_date,
+                                  args.batch_rows)
+    rows = generator.generate()
+    generator.finish(rows)
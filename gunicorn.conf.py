@@ -0,0 +1,61 @@
+"""
+Gunicorn configuration for the Client Exploration Tool.
+Used by the Dockerfile and run.sh:  gunicorn -c gunicorn.conf.py app:app
+Each setting can be overridden with the environment variable next to it.
+"""
+import multiprocessing
+import os
+
+MAX_WORKERS = int(os.environ.get("GUNICORN_MAX_WORKERS", "8"))
+
+
+def default_workers():
+    """(2 x cores) + 1, the usual starting point for I/O-bound workers, capped
+    so per-worker SQLite page caches (and cubes) stay within memory."""
+    return min(multiprocessing.cpu_count() * 2 + 1, MAX_WORKERS)
+
+
+bind = f"0.0.0.0:{os.environ.get('FLASK_PORT', '9095')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", default_workers()))
+
+# Threads let one worker keep serving while another request streams a CSV
+# download; SQLite reads release the GIL
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+# Import the app (and load the optional balance cube) once in the master;
+# workers share those pages copy-on-write and restart quickly
+preload_app = True
+
+# Large CSV exports stream for a while: the worker timeout only counts a
+# blocked worker, while graceful_timeout lets downloads finish on reload
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "60"))
+# Idle keep-alive connections wait in the gthread poller, not on a thread, so
+# browsers talking to the app directly (run.sh) can reuse them between the
+# dashboard's bursts of API calls
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "30"))
+
+# Recycle workers now and then to bound memory growth; jitter staggers them
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    """Runs in the master after the preloaded app is imported, before any fork."""
+    from repositories.connection_pool import get_pool
+    from services.balance_cube import get_cube
+
+    db_path = "client_exploration.db"
+    if get_cube(db_path) is not None:
+        server.log.info("Balance cube loaded before fork; workers share it copy-on-write")
+    # Workers open their own SQLite connections; do not hand them the master's
+    get_pool(db_path).close_all()
+
+
+def post_fork(server, worker):
+    server.log.info(f"Worker {worker.pid} started ({threads} threads)")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Index advisor for the Client Exploration Tool.
+Exercises the DashboardService and the Flask API endpoints against a real
+database, captures every SQL statement they execute, and runs EXPLAIN QUERY
+PLAN on each one to report queries that still fall back to full scans.
+"""
+import re
+import sqlite3
+import argparse
+import logging
+from collections import OrderedDict
+from urllib.parse import quote
+
+from repositories.connection_pool import get_pool
+from services.dashboard_service import DashboardService
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+IGNORED_PREFIXES = ('PRAGMA', 'SELECT 1', 'BEGIN', 'COMMIT', 'ROLLBACK')
+TABLE_ALIAS_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+SQL_KEYWORDS = {'WHERE', 'JOIN', 'LEFT', 'INNER', 'CROSS', 'ON', 'GROUP', 'ORDER', 'LIMIT', 'UNION', 'USING'}
+
+
+class IndexAdvisor:
+    def __init__(self, db_path="client_exploration.db", min_rows=1000):
+        self.db_path = db_path
+        self.min_rows = min_rows
+        self._row_counts = {}
+        self.conn = sqlite3.connect(db_path)
+        self.tables = {row[0] for row in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')"
+        )}
+        # statement -> set of sources that executed it
+        self.statements = OrderedDict()
+        self._source = None
+
+    def _trace(self, statement):
+        if statement.lstrip().upper().startswith(IGNORED_PREFIXES):
+            return
+        self.statements.setdefault(statement, set()).add(self._source)
+
+    def _sample_values(self):
+        """Pick representative filter values from the data."""
+        client_id, account_id = self.conn.execute(
+            "SELECT client_id, account_id FROM client_mapping ORDER BY account_id LIMIT 1"
+        ).fetchone()
+        fund_name = self.conn.execute(
+            "SELECT fund_name FROM account_balances WHERE account_id = ? LIMIT 1", (account_id,)
+        ).fetchone()[0]
+        latest = self.conn.execute("SELECT MAX(balance_date) FROM account_balances").fetchone()[0]
+        return client_id, fund_name, account_id, latest
+
+    def capture(self):
+        """Run the service and API code paths with SQL tracing enabled."""
+        # The service reads through the read-only pool, the v1 routes through the other
+        pools = [get_pool(self.db_path), get_pool(self.db_path, read_only=True)]
+        for pool in pools:
+            pool.close_all()
+            pool.set_trace_callback(self._trace)
+        client_id, fund_name, account_id, latest = self._sample_values()
+
+        try:
+            service = DashboardService(self.db_path)
+            service_cases = [
+                ('service: overview', {}),
+                ('service: client filter', {'client_ids': [client_id]}),
+                ('service: fund filter', {'fund_names': [fund_name], 'selection_source': 'fund'}),
+                ('service: account filter', {'account_ids': [account_id]}),
+                ('service: text filters', {'text_filters': {'client_name': 'a', 'fund_ticker': 'P'}}),
+                ('service: paginated', {'client_ids': [client_id], 'page_size': 10}),
+                ('service: as-of date', {'fund_names': [fund_name], 'date': latest}),
+            ]
+            for source, kwargs in service_cases:
+                self._source = source
+                service.get_dashboard_data(**kwargs)
+            self._source = 'service: account window'
+            service.get_account_window(client_ids=[client_id], sort='client_name', search='a')
+
+            self._capture_endpoints(client_id, fund_name, account_id, latest)
+        finally:
+            for pool in pools:
+                pool.set_trace_callback(None)
+            self._source = None
+
+    def _capture_endpoints(self, client_id, fund_name, account_id, latest):
+        try:
+            from app import app
+        except ImportError as e:
+            logger.warning(f"Skipping API endpoints (Flask app not importable: {e})")
+            return
+        if self.db_path != 'client_exploration.db':
+            logger.warning("Skipping API endpoints (app.py always uses client_exploration.db)")
+            return
+
+        fund = quote(fund_name)
+        urls = [
+            '/api/overview',
+            f'/api/client/{client_id}',
+            f'/api/fund/{fund}',
+            f'/api/account/{account_id}',
+            f'/api/client/{client_id}/fund/{fund}',
+            f'/api/date/{latest}',
+            f'/api/data?client_id={client_id}&fund_name={fund}',
+            f'/api/v2/dashboard?account_id={account_id}',
+            f'/api/download_csv/count?client_id={client_id}',
+        ]
+        client = app.test_client()
+        for url in urls:
+            self._source = f'GET {url}'
+            response = client.get(url)
+            if response.status_code >= 400:
+                logger.warning(f"{url} returned {response.status_code}")
+
+    def _resolve(self, name, statement):
+        """Map a plan target (alias or table name) back to a base table."""
+        if name in self.tables:
+            return name
+        for table, alias in TABLE_ALIAS_PATTERN.findall(statement):
+            if alias and alias.upper() not in SQL_KEYWORDS and alias == name:
+                return table if table in self.tables else None
+        return None
+
+    def _row_count(self, table):
+        if table not in self._row_counts:
+            self._row_counts[table] = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return self._row_counts[table]
+
+    def full_scans(self, statement):
+        """Return plan lines that scan a base table or index end to end.
+
+        Scans of tables smaller than min_rows (e.g. the client_mapping
+        dimension) are what the planner should do and are not reported.
+        """
+        scans = []
+        for row in self.conn.execute(f"EXPLAIN QUERY PLAN {statement}"):
+            detail = row[3]
+            match = re.match(r'SCAN (\w+)', detail)
+            if not match:
+                continue
+            table = self._resolve(match.group(1), statement)
+            if table and self._row_count(table) >= self.min_rows:
+                kind = 'full index scan' if 'USING' in detail else 'full table scan'
+                scans.append((table, kind, detail))
+        return scans
+
+    def report(self, verbose=False):
+        flagged = 0
+        for statement, sources in self.statements.items():
+            try:
+                scans = self.full_scans(statement)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not explain statement: {e}")
+                continue
+            if not scans and not verbose:
+                continue
+            flagged += bool(scans)
+
+            print('=' * 78)
+            print(f"Sources: {', '.join(sorted(s for s in sources if s))}")
+            print(' '.join(statement.split())[:600])
+            if scans:
+                for table, kind, detail in scans:
+                    print(f"  !! {kind} on {table}: {detail}")
+            else:
+                print("  ok: index search only")
+
+        print('=' * 78)
+        print(f"{len(self.statements)} distinct statements analysed, {flagged} with full scans")
+        return flagged
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Report queries that still do full scans')
+    parser.add_argument('--db', default='client_exploration.db', help='Path to SQLite database')
+    parser.add_argument('--verbose', action='store_true', help='Also list statements without full scans')
+    parser.add_argument('--min-rows', type=int, default=1000,
+                        help='Ignore scans of tables with fewer rows than this')
+    args = parser.parse_args()
+
+    advisor = IndexAdvisor(args.db, args.min_rows)
+    try:
+        advisor.capture()
+        flagged = advisor.report(args.verbose)
+    finally:
+        advisor.close()
+    raise SystemExit(1 if flagged else 0)
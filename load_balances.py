@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Incremental balance loader for the Client Exploration Tool.
+Appends one or more days of balances from a CSV, JSON lines or Parquet file
+without regenerating the database: rows are bulk-inserted with executemany
+in one transaction together with the rollups for the loaded dates. The same
+transaction drops the dashboard caches as of the loaded dates or later, which
+are then rewarmed.
+
+Files need account_id, fund_name and balance columns, plus balance_date
+unless --date is given. client_id and client_name are needed only for
+accounts not yet in client_mapping, and fund_ticker only for funds not yet in
+funds; both are added in the load's transaction. Rows already stored for a loaded date
+are replaced, so a day can be reloaded safely.
+"""
+import os
+import csv
+import json
+import time
+import sqlite3
+import logging
+import argparse
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+from repositories.balance_repository import BalanceWriter, uses_compact_storage
+from repositories.cache_repository import drop_cached_dates
+from repositories.data_load_repository import record_data_load
+from repositories.rollup_repository import refresh_rollups
+from services.data_version import invalidate_data_version
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency, only needed for Parquet files
+    pq = None
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BATCH_ROWS = 10000
+FORMATS = ('csv', 'jsonl', 'parquet')
+EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.json': 'jsonl',
+              '.parquet': 'parquet', '.pq': 'parquet'}
+REQUIRED_COLUMNS = ('account_id', 'fund_name', 'balance')
+
+
+def detect_format(path):
+    """File format from the extension."""
+    fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Cannot tell the format of {path}; pass --format ({', '.join(FORMATS)})")
+    return fmt
+
+
+def read_records(path, fmt):
+    """Yield each input row as a dict."""
+    if fmt == 'csv':
+        with open(path, newline='') as f:
+            yield from csv.DictReader(f)
+    elif fmt == 'jsonl':
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif fmt == 'parquet':
+        if pq is None:
+            raise RuntimeError("Reading Parquet needs pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=BATCH_ROWS):
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+class BalanceLoader:
+    def __init__(self, db_path="client_exploration.db", batch_rows=BATCH_ROWS):
+        self.db_path = db_path
+        self.batch_rows = batch_rows
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA busy_timeout = 5000")
+        self.writer = None
+        # Past dates whose dashboard caches the last load dropped
+        self.dropped_dates = set()
+        self.timings = OrderedDict()
+
+    @contextmanager
+    def stage(self, name):
+        """Time a load stage; durations are reported at the end of the run."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def parse_row(self, record, line, default_date):
+        """Validate one input row into (balance_date, account_id, fund_name, balance, client_id, client_name, fund_ticker)."""
+        missing = [column for column in REQUIRED_COLUMNS if record.get(column) in (None, '')]
+        balance_date = record.get('balance_date') or default_date
+        if missing or not balance_date:
+            raise ValueError(f"Row {line}: missing {', '.join(missing or ['balance_date'])}")
+        try:
+            balance = round(float(record['balance']), 2)
+        except ValueError as e:
+            raise ValueError(f"Row {line}: {e}") from None
+        return (str(balance_date)[:10], str(record['account_id']), str(record['fund_name']), balance,
+                record.get('client_id') or None, record.get('client_name') or None,
+                record.get('fund_ticker') or None)
+
+    def load(self, path, fmt=None, default_date=None, source=None):
+        """Load a file in one transaction; returns the loaded dates."""
+        fmt = fmt or detect_format(path)
+        known_accounts = {row[0] for row in self.conn.execute("SELECT account_id FROM client_mapping")}
+        known_funds = dict(self.conn.execute("SELECT fund_name, fund_ticker FROM funds"))
+        known_tickers = set(known_funds.values())
+        new_accounts = {}
+        pending_accounts = []
+        new_funds = {}
+        pending_funds = []
+        dates = set()
+        row_count = 0
+        replaced = 0
+
+        started = time.perf_counter()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Databases without migration 5 still store balances in a plain table
+            self.writer = BalanceWriter(self.conn) if uses_compact_storage(self.conn) else None
+            with self.stage('insert balances'):
+                batch = []
+                for line, record in enumerate(read_records(path, fmt), start=1):
+                    row = self.parse_row(record, line, default_date)
+                    balance_date, account_id, fund_name = row[0], row[1], row[2]
+                    if account_id not in known_accounts and account_id not in new_accounts:
+                        if not (row[4] and row[5]):
+                            raise ValueError(f"Row {line}: unknown account {account_id} "
+                                             f"(add client_id and client_name to create it)")
+                        new_accounts[account_id] = (account_id, row[5], row[4])
+                        pending_accounts.append(new_accounts[account_id])
+                    if fund_name not in known_funds and fund_name not in new_funds:
+                        fund_ticker = row[6] and str(row[6])
+                        if not fund_ticker:
+                            raise ValueError(f"Row {line}: unknown fund {fund_name} "
+                                             f"(add fund_ticker to create it)")
+                        if fund_ticker in known_tickers:
+                            raise ValueError(f"Row {line}: fund_ticker {fund_ticker} of new fund "
+                                             f"{fund_name} is already used")
+                        known_tickers.add(fund_ticker)
+                        new_funds[fund_name] = (fund_name, fund_ticker)
+                        pending_funds.append(new_funds[fund_name])
+                    if balance_date not in dates:
+                        try:
+                            datetime.strptime(balance_date, '%Y-%m-%d')
+                        except ValueError as e:
+                            raise ValueError(f"Row {line}: {e}") from None
+                        # Reloading a date replaces what was stored for it
+                        replaced += self.delete_date(balance_date)
+                        dates.add(balance_date)
+                    batch.append((account_id, fund_name, balance_date, row[3]))
+                    if len(batch) >= self.batch_rows:
+                        self.insert_batch(batch, pending_accounts, pending_funds)
+                        row_count += len(batch)
+                        batch, pending_accounts, pending_funds = [], [], []
+                if batch:
+                    self.insert_batch(batch, pending_accounts, pending_funds)
+                    row_count += len(batch)
+            if not dates:
+                raise ValueError(f"No rows in {path}")
+
+            with self.stage('refresh rollups'):
+                try:
+                    refresh_rollups(self.conn, dates)
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"Skipping rollup refresh ({e}); run migrations.py")
+            with self.stage('drop stale caches'):
+                self.dropped_dates = drop_cached_dates(self.conn, min(dates))
+            record_data_load(self.conn, source or f"load_balances.py {os.path.basename(path)}", row_count)
+            with self.stage('commit'):
+                self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        invalidate_data_version(self.db_path)
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"Loaded {row_count} rows for {len(dates)} date(s) ({min(dates)} to {max(dates)}) "
+                    f"in {elapsed:.2f}s: {row_count / elapsed:,.0f} rows/sec")
+        if replaced:
+            logger.info(f"Replaced {replaced} previously loaded rows")
+        if new_accounts:
+            logger.info(f"Added {len(new_accounts)} new account(s) to client_mapping")
+        if new_funds:
+            logger.info(f"Added {len(new_funds)} new fund(s) to funds: {', '.join(sorted(new_funds))}")
+        return sorted(dates)
+
+    def delete_date(self, balance_date):
+        """Delete the balances stored for a date; returns the row count."""
+        if self.writer is not None:
+            return self.writer.delete_date(balance_date)
+        return self.conn.execute(
+            "DELETE FROM account_balances WHERE balance_date = ?", (balance_date,)
+        ).rowcount
+
+    def insert_batch(self, batch, accounts, funds=()):
+        """Insert accounts and funds first seen in this batch, then its (account_id, fund_name, balance_date, balance) rows."""
+        if funds:
+            self.conn.executemany("INSERT INTO funds (fund_name, fund_ticker) VALUES (?, ?)", funds)
+        if accounts:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO client_mapping (account_id, client_name, client_id) VALUES (?, ?, ?)",
+                accounts
+            )
+        if self.writer is not None:
+            self.writer.insert(batch)
+            return
+        self.conn.executemany(
+            "INSERT INTO account_balances (id, account_id, fund_name, balance_date, balance) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(f"{balance_date}:{account_id}:{fund_name}", account_id, fund_name, balance_date, balance)
+             for account_id, fund_name, balance_date, balance in batch]
+        )
+
+    def warm_caches(self, dates):
+        """Rewarm the latest date and the given past dates (the load's dropped_dates).
+
+        The load drops the caches of the loaded dates and every later one,
+        since their QTD/YTD changes and charts read the loaded balances. The
+        latest date gets the full warm; past dates are rewarmed only if they
+        had been warmed (by a --backfill run).
+        """
+        from warm_cache import CacheWarmer
+
+        warmer = CacheWarmer(self.db_path)
+        try:
+            latest_date = warmer.get_latest_date()
+            try:
+                warmer.get_warmed_dates([latest_date])
+            except sqlite3.OperationalError:
+                logger.warning("Cache tables not found; run warm_cache.py to create them")
+                return
+            for as_of_date in sorted(set(dates) | {latest_date}):
+                with self.stage('warm caches'):
+                    if as_of_date == latest_date:
+                        warmer.warm_date(as_of_date)
+                    else:
+                        warmer.write_historical_rows(as_of_date, warmer.compute_historical_rows(as_of_date))
+                logger.info(f"Rewarmed caches for {as_of_date}")
+        finally:
+            warmer.close()
+
+    def show_timings(self):
+        """Log how long each load stage took."""
+        logger.info("Stage timings:")
+        for name, seconds in self.timings.items():
+            logger.info(f"  - {name}: {seconds * 1000:.1f} ms")
+        logger.info(f"  - total: {sum(self.timings.values()) * 1000:.1f} ms")
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Append balances from a CSV, JSON lines or Parquet file')
+    parser.add_argument('path', help='File to load')
+    parser.add_argument('--db', default='client_exploration.db', help='Path to SQLite database')
+    parser.add_argument('--format', choices=FORMATS, help='Input format (default: from the extension)')
+    parser.add_argument('--date', metavar='YYYY-MM-DD',
+                        help='Balance date for rows without a balance_date column')
+    parser.add_argument('--batch-rows', type=int, default=BATCH_ROWS,
+                        help='Rows per executemany batch')
+    parser.add_argument('--no-warm', action='store_true',
+                        help='Skip rewarming the dashboard caches the load dropped')
+    args = parser.parse_args()
+
+    loader = BalanceLoader(args.db, args.batch_rows)
+    try:
+        loader.load(args.path, args.format, args.date)
+        if not args.no_warm:
+            loader.warm_caches(loader.dropped_dates)
+        loader.show_timings()
+    finally:
+        loader.close()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Schema migrations for the Client Exploration Tool database.
+Each migration runs once per database and is recorded in schema_migrations.
+Run this after database.py (or against an existing database) to bring the
+schema up to date.
+"""
+import os
+import sqlite3
+import logging
+import argparse
+
+from repositories.rollup_repository import create_rollup_tables, rebuild_rollups
+from repositories.data_load_repository import create_data_loads_table
+from repositories.balance_repository import migrate_to_compact_storage
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CACHE_TABLES_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache_tables.sql')
+
+
+def create_cache_tables(conn):
+    """Create the cache tables from cache_tables.sql (all IF NOT EXISTS)."""
+    with open(CACHE_TABLES_SQL) as f:
+        conn.executescript(f.read())
+
+
+# (version, name, statements) - statements are SQL strings, or callables
+# taking the connection for migrations that need Python logic.
+MIGRATIONS = [
+    (1, "composite_covering_indexes", [
+        # Date-first: every dashboard table/KPI query filters on balance_date
+        # and joins on account_id; carrying fund_name and balance makes the
+        # index covering so the table itself is never read.
+        """CREATE INDEX IF NOT EXISTS idx_ab_date_account_fund_balance
+           ON account_balances(balance_date, account_id, fund_name, balance)""",
+        # Fund-first: fund detail pages and fund-filtered history ranges
+        """CREATE INDEX IF NOT EXISTS idx_ab_fund_date_account_balance
+           ON account_balances(fund_name, balance_date, account_id, balance)""",
+        # Account-first: account detail pages and account history ranges
+        """CREATE INDEX IF NOT EXISTS idx_ab_account_date_fund_balance
+           ON account_balances(account_id, balance_date, fund_name, balance)""",
+        # Client lookups resolve accounts and names without touching the table
+        """CREATE INDEX IF NOT EXISTS idx_cm_client_account_name
+           ON client_mapping(client_id, account_id, client_name)""",
+        # The single-column indexes are prefixes of the composites above
+        "DROP INDEX IF EXISTS idx_account_balances_date",
+        "DROP INDEX IF EXISTS idx_account_balances_account",
+        "DROP INDEX IF EXISTS idx_client_mapping_client",
+        "ANALYZE",
+    ]),
+    (2, "daily_rollup_tables", [
+        # Daily totals per fund, client, account and client x fund for charts
+        create_rollup_tables,
+        rebuild_rollups,
+    ]),
+    (3, "cache_tables", [
+        # Overview cache plus the filter-keyed cached_dashboard and access log
+        create_cache_tables,
+    ]),
+    (4, "data_load_log", [
+        # One row per balance data load; its sequence feeds the API's ETags
+        create_data_loads_table,
+    ]),
+    (5, "compact_balance_storage", [
+        # Integer day/account/fund keys and cents in a WITHOUT ROWID table;
+        # account_balances becomes a view with the same columns
+        migrate_to_compact_storage,
+        "ANALYZE",
+    ]),
+]
+
+
+def ensure_migrations_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+
+def get_applied_versions(conn):
+    ensure_migrations_table(conn)
+    return {row[0] for row in conn.execute('SELECT version FROM schema_migrations')}
+
+
+def apply_migrations(db_path='client_exploration.db', target=None):
+    """Apply all pending migrations (up to target, if given). Returns versions applied."""
+    conn = sqlite3.connect(db_path)
+    applied = []
+    try:
+        done = get_applied_versions(conn)
+        for version, name, statements in MIGRATIONS:
+            if version in done or (target is not None and version > target):
+                continue
+            logger.info(f"Applying migration {version}: {name}")
+            try:
+                for statement in statements:
+                    if callable(statement):
+                        statement(conn)
+                    else:
+                        conn.execute(statement)
+                conn.execute(
+                    'INSERT INTO schema_migrations (version, name) VALUES (?, ?)',
+                    (version, name)
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                logger.error(f"Migration {version} failed")
+                raise
+            applied.append(version)
+    finally:
+        conn.close()
+
+    if not applied:
+        logger.info("Schema is up to date")
+    return applied
+
+
+def show_status(db_path='client_exploration.db'):
+    conn = sqlite3.connect(db_path)
+    try:
+        done = get_applied_versions(conn)
+    finally:
+        conn.close()
+    for version, name, _ in MIGRATIONS:
+        state = 'applied' if version in done else 'pending'
+        print(f"{version:>4}  {state:<8} {name}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Apply schema migrations')
+    parser.add_argument('--db', default='client_exploration.db', help='Path to SQLite database')
+    parser.add_argument('--target', type=int, help='Only apply migrations up to this version')
+    parser.add_argument('--status', action='store_true', help='List migrations and whether they are applied')
+    args = parser.parse_args()
+
+    if args.status:
+        show_status(args.db)
+    else:
+        apply_migrations(args.db, args.target)
@@ -1,12 +1,21 @@
 """Repository layer for data access."""
 from .base import BaseRepository
+from .connection_pool import ConnectionPool, get_pool
 from .client_repository import ClientRepository
 from .fund_repository import FundRepository
 from .account_repository import AccountRepository
+from .rollup_repository import RollupRepository
+from .data_load_repository import DataLoadRepository
+from .balance_repository import BalanceRepository
 
 __all__ = [
     "BaseRepository",
+    "ConnectionPool",
+    "get_pool",
     "ClientRepository", 
     "FundRepository",
-    "AccountRepository"
+    "AccountRepository",
+    "RollupRepository",
+    "DataLoadRepository",
+    "BalanceRepository"
 ]
\ No newline at end of file
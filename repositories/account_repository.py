@@ -21,9 +21,7 @@ class AccountRepository(BaseRepository):
     
     def get_account_current_balance(self, account_id: str, date: Optional[str] = None) -> float:
         """Get total current balance for an account across all funds."""
-        date_condition = "AND balance_date = :date" if date else """
-            AND balance_date = (SELECT MAX(balance_date) FROM account_balances)
-        """
+        date_condition = "AND balance_date = :date"
         
         sql = f"""
         SELECT 
@@ -34,16 +32,13 @@ class AccountRepository(BaseRepository):
         """
         
         params = {"account_id": account_id}
-        if date:
-            params["date"] = date
+        params["date"] = date or self.latest_balance_date()
             
         return self.execute_scalar(sql, params) or 0
     
     def get_account_fund_balances(self, account_id: str, date: Optional[str] = None) -> List[Dict]:
         """Get fund-level balances for a specific account."""
-        date_condition = "AND balance_date = :date" if date else """
-            AND balance_date = (SELECT MAX(balance_date) FROM account_balances)
-        """
+        date_condition = "AND balance_date = :date"
         
         sql = f"""
         SELECT 
@@ -58,8 +53,7 @@ class AccountRepository(BaseRepository):
         """
         
         params = {"account_id": account_id}
-        if date:
-            params["date"] = date
+        params["date"] = date or self.latest_balance_date()
             
         return self.execute_query(sql, params)
     
@@ -74,11 +68,8 @@ class AccountRepository(BaseRepository):
         params = {}
         
         # Always need the date condition
-        date_condition = "AND ab.balance_date = :date" if date else """
-            AND ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
-        """
-        if date:
-            params["date"] = date
+        date_condition = "AND ab.balance_date = :date"
+        params["date"] = date or self.latest_balance_date()
         
         # Handle filters
         if account_ids:
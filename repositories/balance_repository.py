@@ -0,0 +1,219 @@
+"""Compact storage for daily account balances.
+
+Balances live in balance_facts, a WITHOUT ROWID table keyed on
+(day, account_key, fund_key) holding integer cents, with account_id and
+fund_name dictionary-encoded in balance_accounts and balance_funds.
+account_balances is a view over them with the original columns, so existing
+SQL keeps working; INSTEAD OF triggers make it writable as well.
+
+balance_facts is clustered on day and the view's balance_date is indexed, so
+single-date and date-range reads only visit the pages holding those days:
+the table is effectively partitioned by date without a UNION of per-period
+tables, which SQLite cannot prune for MAX() or non-date filters.
+"""
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+import sqlite3
+import logging
+
+from .base import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+# Days since 1970-01-01; the index below is on the same expression as the
+# view's balance_date, so balance_date filters and MAX(balance_date) stay
+# index lookups.
+EPOCH = date(1970, 1, 1)
+DAY_TO_DATE = "date({}day * 86400, 'unixepoch')"
+DATE_TO_DAY = "CAST(julianday({}) - 2440587.5 AS INTEGER)"
+
+COMPACT_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS balance_accounts (
+        account_key INTEGER PRIMARY KEY,
+        account_id TEXT NOT NULL UNIQUE
+    )""",
+    """CREATE TABLE IF NOT EXISTS balance_funds (
+        fund_key INTEGER PRIMARY KEY,
+        fund_name TEXT NOT NULL UNIQUE
+    )""",
+    """CREATE TABLE IF NOT EXISTS balance_facts (
+        day INTEGER NOT NULL,
+        account_key INTEGER NOT NULL REFERENCES balance_accounts(account_key),
+        fund_key INTEGER NOT NULL REFERENCES balance_funds(fund_key),
+        balance_cents INTEGER NOT NULL,
+        PRIMARY KEY (day, account_key, fund_key)
+    ) WITHOUT ROWID""",
+]
+
+COMPACT_INDEXES = [
+    # Covering index on the view's balance_date expression
+    f"""CREATE INDEX IF NOT EXISTS idx_balance_facts_date
+        ON balance_facts({DAY_TO_DATE.format('')}, account_key, fund_key, balance_cents)""",
+]
+
+COMPATIBILITY_VIEW = [
+    f"""CREATE VIEW IF NOT EXISTS account_balances AS
+        SELECT {DAY_TO_DATE.format('b.')} || ':' || a.account_id || ':' || f.fund_name AS id,
+               a.account_id AS account_id,
+               f.fund_name AS fund_name,
+               {DAY_TO_DATE.format('b.')} AS balance_date,
+               b.balance_cents / 100.0 AS balance
+        FROM balance_facts b
+        JOIN balance_accounts a ON a.account_key = b.account_key
+        JOIN balance_funds f ON f.fund_key = b.fund_key""",
+    f"""CREATE TRIGGER IF NOT EXISTS account_balances_insert
+        INSTEAD OF INSERT ON account_balances
+        BEGIN
+            INSERT OR IGNORE INTO balance_accounts (account_id) VALUES (NEW.account_id);
+            INSERT OR IGNORE INTO balance_funds (fund_name) VALUES (NEW.fund_name);
+            INSERT INTO balance_facts (day, account_key, fund_key, balance_cents)
+            VALUES ({DATE_TO_DAY.format('NEW.balance_date')},
+                    (SELECT account_key FROM balance_accounts WHERE account_id = NEW.account_id),
+                    (SELECT fund_key FROM balance_funds WHERE fund_name = NEW.fund_name),
+                    CAST(ROUND(NEW.balance * 100) AS INTEGER));
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS account_balances_delete
+        INSTEAD OF DELETE ON account_balances
+        BEGIN
+            DELETE FROM balance_facts
+            WHERE day = {DATE_TO_DAY.format('OLD.balance_date')}
+              AND account_key = (SELECT account_key FROM balance_accounts WHERE account_id = OLD.account_id)
+              AND fund_key = (SELECT fund_key FROM balance_funds WHERE fund_name = OLD.fund_name);
+        END""",
+]
+
+
+def day_number(balance_date: str) -> int:
+    """balance_facts day for a YYYY-MM-DD date."""
+    return (date.fromisoformat(balance_date[:10]) - EPOCH).days
+
+
+def uses_compact_storage(conn: sqlite3.Connection) -> bool:
+    """True once account_balances is the view over balance_facts."""
+    row = conn.execute(
+        "SELECT type FROM sqlite_master WHERE name = 'account_balances'"
+    ).fetchone()
+    return row is not None and row[0] == "view"
+
+
+def migrate_to_compact_storage(conn: sqlite3.Connection):
+    """Move the account_balances table into balance_facts behind the view (caller commits).
+
+    Dropping the table also drops its uuid primary key and the text indexes
+    from migration 1, which the facts table and its date index replace.
+    """
+    if uses_compact_storage(conn):
+        return
+    for statement in COMPACT_SCHEMA:
+        conn.execute(statement)
+    conn.execute("""
+        INSERT OR IGNORE INTO balance_accounts (account_id)
+        SELECT account_id FROM client_mapping
+        UNION SELECT account_id FROM account_balances
+        ORDER BY 1
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO balance_funds (fund_name)
+        SELECT fund_name FROM funds
+        UNION SELECT fund_name FROM account_balances
+        ORDER BY 1
+    """)
+    # Sorted by the primary key so the B-tree is built by appending
+    rows = conn.execute(f"""
+        INSERT INTO balance_facts (day, account_key, fund_key, balance_cents)
+        SELECT {DATE_TO_DAY.format('ab.balance_date')}, a.account_key, f.fund_key,
+               CAST(ROUND(ab.balance * 100) AS INTEGER)
+        FROM account_balances ab
+        JOIN balance_accounts a ON a.account_id = ab.account_id
+        JOIN balance_funds f ON f.fund_name = ab.fund_name
+        ORDER BY 1, 2, 3
+    """).rowcount
+    conn.execute("DROP TABLE account_balances")
+    for statement in COMPACT_INDEXES + COMPATIBILITY_VIEW:
+        conn.execute(statement)
+    logger.info(f"Moved {rows} balance rows to balance_facts")
+
+
+class BalanceWriter:
+    """Bulk writes straight into balance_facts, skipping the view's per-row triggers.
+
+    Dimension keys are cached for the life of the writer; it writes on the
+    caller's connection and the caller commits.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.account_keys: Dict[str, int] = dict(
+            conn.execute("SELECT account_id, account_key FROM balance_accounts")
+        )
+        self.fund_keys: Dict[str, int] = dict(
+            conn.execute("SELECT fund_name, fund_key FROM balance_funds")
+        )
+
+    def _key(self, keys: Dict[str, int], table: str, column: str, value: str) -> int:
+        key = keys.get(value)
+        if key is None:
+            key = self.conn.execute(f"INSERT INTO {table} ({column}) VALUES (?)", (value,)).lastrowid
+            keys[value] = key
+        return key
+
+    def insert(self, rows: Iterable[Tuple[str, str, str, float]]) -> int:
+        """Insert (account_id, fund_name, balance_date, balance) rows; returns the row count."""
+        days = {}
+        facts: List[Tuple[int, int, int, int]] = []
+        for account_id, fund_name, balance_date, balance in rows:
+            day = days.get(balance_date)
+            if day is None:
+                day = days[balance_date] = day_number(balance_date)
+            facts.append((
+                day,
+                self._key(self.account_keys, "balance_accounts", "account_id", account_id),
+                self._key(self.fund_keys, "balance_funds", "fund_name", fund_name),
+                round(balance * 100)
+            ))
+        self.conn.executemany(
+            "INSERT INTO balance_facts (day, account_key, fund_key, balance_cents) VALUES (?, ?, ?, ?)",
+            facts
+        )
+        return len(facts)
+
+    def delete_date(self, balance_date: str) -> int:
+        """Delete every balance stored for a date; returns the row count."""
+        return self.conn.execute(
+            "DELETE FROM balance_facts WHERE day = ?", (day_number(balance_date),)
+        ).rowcount
+
+
+class BalanceRepository(BaseRepository):
+    """Balance date reads for the balance calendar, bypassing the view on compact storage."""
+
+    _compact: Optional[bool] = None
+
+    def uses_compact_storage(self) -> bool:
+        """Whether migration 5 is applied; checked once per repository."""
+        if self._compact is None:
+            with self.get_connection() as conn:
+                self._compact = uses_compact_storage(conn)
+        return self._compact
+
+    def get_balance_dates(self) -> List[str]:
+        """Every loaded balance date, ascending.
+
+        On compact storage this walks the distinct days with one primary key
+        seek per day instead of reading every row.
+        """
+        if self.uses_compact_storage():
+            sql = """
+            WITH RECURSIVE days(day) AS (
+                SELECT MIN(day) FROM balance_facts
+                UNION ALL
+                SELECT (SELECT MIN(day) FROM balance_facts WHERE day > days.day)
+                FROM days WHERE days.day IS NOT NULL
+            )
+            SELECT date(day * 86400, 'unixepoch') FROM days WHERE day IS NOT NULL
+            """
+        else:
+            sql = "SELECT DISTINCT balance_date FROM account_balances ORDER BY balance_date"
+        with self.get_connection() as conn:
+            return [row[0] for row in conn.execute(sql)]
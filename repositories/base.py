@@ -4,29 +4,37 @@ from typing import Dict, List, Optional, Any
 from contextlib import contextmanager
 import logging
 
+from .connection_pool import get_pool
+
 logger = logging.getLogger(__name__)
 
 
 class BaseRepository:
     """Base repository with common database operations."""
     
-    def __init__(self, db_path: str = "client_exploration.db"):
+    def __init__(self, db_path: str = "client_exploration.db", read_only: bool = False):
         self.db_path = db_path
+        self.read_only = read_only
+    
+    @property
+    def pool(self):
+        """This process's pool; looked up per use so module-level repositories
+        created before a fork (gunicorn --preload) never reuse the parent's."""
+        return get_pool(self.db_path, self.read_only)
         
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections."""
+        """Context manager for pooled database connections."""
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self.pool.acquire()
             yield conn
         except sqlite3.Error as e:
             logger.error(f"Database error: {e}")
             raise
         finally:
             if conn:
-                conn.close()
+                self.pool.release(conn)
     
     def execute_query(self, sql: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Execute a query and return results as list of dicts."""
@@ -54,6 +62,11 @@ class BaseRepository:
             result = cursor.fetchone()
             return result[0] if result else None
     
+    def latest_balance_date(self) -> Optional[str]:
+        """Latest balance date from the cached calendar, to bind as a literal."""
+        from services.balance_calendar import get_balance_calendar
+        return get_balance_calendar(self.db_path).latest
+    
     def build_where_clause(self, filters: Dict[str, Any]) -> tuple[str, Dict[str, Any]]:
         """Build WHERE clause from filters dict."""
         if not filters:
@@ -1,12 +1,44 @@
 """Repository for accessing cached dashboard data."""
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime
+import sqlite3
 import logging
 
 from repositories.base import BaseRepository
 
 logger = logging.getLogger(__name__)
 
+# Every table holding precomputed dashboard data, keyed by as_of_date
+CACHE_TABLES = [
+    'cached_overview',
+    'cached_client_balances',
+    'cached_fund_balances',
+    'cached_account_details',
+    'cached_chart_data',
+    'cached_dashboard'
+]
+
+
+def drop_cached_dates(conn: sqlite3.Connection, since: str) -> Set[str]:
+    """Delete cached data as of a date or later on the loading connection (caller commits).
+
+    Changed balances for a date reach every later as-of date through QTD/YTD
+    changes and chart history. Returns the dates that had cached_dashboard
+    rows, so they can be rewarmed; empty when the cache tables do not exist.
+    """
+    try:
+        warmed = {row[0] for row in conn.execute(
+            "SELECT DISTINCT as_of_date FROM cached_dashboard WHERE as_of_date >= ?", (since,)
+        )}
+    except sqlite3.OperationalError:
+        warmed = set()
+    for table in CACHE_TABLES:
+        try:
+            conn.execute(f"DELETE FROM {table} WHERE as_of_date >= ?", (since,))
+        except sqlite3.OperationalError:
+            pass  # cache tables not created yet
+    return warmed
+
 
 class CacheRepository(BaseRepository):
     """Repository for cached dashboard data."""
@@ -79,4 +111,36 @@ class CacheRepository(BaseRepository):
         WHERE as_of_date = :as_of_date
         """
         result = self.execute_query(sql, {"as_of_date": as_of_date})
-        return result[0]['created_at'] if result else None
\ No newline at end of file
+        return result[0]['created_at'] if result else None
+    
+    def get_cached_dashboard(self, filter_hash: str, as_of_date: str) -> Optional[Dict]:
+        """Get a cached dashboard payload for a filter combination."""
+        sql = """
+        SELECT payload, created_at FROM cached_dashboard
+        WHERE filter_hash = :filter_hash AND as_of_date = :as_of_date
+        """
+        results = self.execute_query(sql, {"filter_hash": filter_hash, "as_of_date": as_of_date})
+        return results[0] if results else None
+    
+    def record_accesses(self, accesses: Iterable[Tuple[str, str, str, int]]):
+        """Add request counts: (filter_hash, access_date, filters_json, hits)."""
+        sql = """
+        INSERT INTO dashboard_access_log (filter_hash, access_date, filters, hits)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(filter_hash, access_date) DO UPDATE SET hits = hits + excluded.hits
+        """
+        with self.get_connection() as conn:
+            conn.executemany(sql, list(accesses))
+            conn.commit()
+    
+    def get_top_filter_combinations(self, since_date: str, limit: int) -> List[Dict]:
+        """Most requested filter combinations since a date, most popular first."""
+        sql = """
+        SELECT filter_hash, filters, SUM(hits) as hits
+        FROM dashboard_access_log
+        WHERE access_date >= :since_date
+        GROUP BY filter_hash
+        ORDER BY hits DESC
+        LIMIT :limit
+        """
+        return self.execute_query(sql, {"since_date": since_date, "limit": limit})
@@ -44,9 +44,7 @@ class ClientRepository(BaseRepository):
     
     def get_client_current_balance(self, client_id: str, date: Optional[str] = None) -> float:
         """Get total current balance for a client."""
-        date_condition = "AND ab.balance_date = :date" if date else """
-            AND ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
-        """
+        date_condition = "AND ab.balance_date = :date"
         
         sql = f"""
         SELECT 
@@ -58,8 +56,7 @@ class ClientRepository(BaseRepository):
         """
         
         params = {"client_id": client_id}
-        if date:
-            params["date"] = date
+        params["date"] = date or self.latest_balance_date()
             
         return self.execute_scalar(sql, params) or 0
     
@@ -72,11 +69,8 @@ class ClientRepository(BaseRepository):
             
         where_clause, params = self.build_where_clause(filters)
         
-        date_condition = "AND ab.balance_date = :date" if date else """
-            AND ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
-        """
-        if date:
-            params["date"] = date
+        date_condition = "AND ab.balance_date = :date"
+        params["date"] = date or self.latest_balance_date()
         
         sql = f"""
         SELECT 
@@ -0,0 +1,272 @@
+"""Thread-aware SQLite connection pool shared by repositories and the Flask app."""
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+DEFAULT_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+
+# Applied once to every connection the first time it is checked out
+DEFAULT_PRAGMAS = [
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -20000",      # ~20MB page cache per connection
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",    # 256MB memory-mapped I/O
+]
+
+
+class PooledConnection:
+    """Proxy around a pooled sqlite3 connection.
+
+    Behaves like a regular connection, except that close() hands the
+    connection back to the pool instead of closing it.
+    """
+
+    def __init__(self, pool: "ConnectionPool", conn: sqlite3.Connection):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        """Return the connection to the pool."""
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections.
+
+    Each thread preferentially gets back the connection it used last, so a
+    request handled on one thread keeps hitting the same warm page cache.
+    Connections are health-checked on checkout and replaced if broken.
+    A read_only pool opens the file with mode=ro, so its connections can
+    never take a write lock.
+    """
+
+    def __init__(self, db_path: str, max_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_POOL_TIMEOUT,
+                 pragmas: Optional[List[str]] = None,
+                 read_only: bool = False):
+        self.db_path = db_path
+        self.read_only = read_only
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+
+        self._idle: List[sqlite3.Connection] = []
+        self._initialized = set()
+        self._trace_callback = None
+        self._size = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+        self._stats = {
+            "checkouts": 0,
+            "hits": 0,
+            "thread_hits": 0,
+            "misses": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+        }
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """Open a new connection usable from any thread."""
+        if self.read_only:
+            uri = f"file:{urllib.parse.quote(os.path.abspath(self.db_path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        if self._trace_callback is not None:
+            conn.set_trace_callback(self._trace_callback)
+        return conn
+
+    def set_trace_callback(self, callback):
+        """Install a statement trace callback on every pooled connection.
+
+        Applies to idle connections immediately and to new connections as
+        they are opened; pass None to remove it.
+        """
+        with self._cond:
+            self._trace_callback = callback
+            for conn in self._idle:
+                conn.set_trace_callback(callback)
+
+    def _initialize(self, conn: sqlite3.Connection):
+        """Apply pragmas the first time a connection is handed out."""
+        if id(conn) in self._initialized:
+            return
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        self._initialized.add(id(conn))
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection):
+        """Drop a connection from the pool (caller holds the lock)."""
+        self._initialized.discard(id(conn))
+        self._size -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check a connection out of the pool, waiting if it is exhausted."""
+        preferred = getattr(self._local, "conn", None)
+
+        with self._cond:
+            self._stats["checkouts"] += 1
+            conn = None
+            waited = 0.0
+
+            while conn is None:
+                if self._idle:
+                    if preferred is not None and preferred in self._idle:
+                        self._idle.remove(preferred)
+                        conn = preferred
+                        self._stats["thread_hits"] += 1
+                    else:
+                        conn = self._idle.pop()
+                    self._stats["hits"] += 1
+                elif self._size < self.max_size:
+                    self._size += 1
+                    self._stats["misses"] += 1
+                    try:
+                        conn = self._create_connection()
+                    except sqlite3.Error:
+                        self._size -= 1
+                        raise
+                else:
+                    remaining = self.timeout - waited
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise sqlite3.OperationalError(
+                            f"Timed out after {self.timeout}s waiting for a database connection"
+                        )
+                    started = time.perf_counter()
+                    self._cond.wait(remaining)
+                    elapsed = time.perf_counter() - started
+                    waited += elapsed
+                    self._stats["waits"] += 1
+                    self._stats["wait_time_total"] += elapsed
+                    self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+                    continue
+
+                if not self._is_healthy(conn):
+                    logger.warning("Discarding unhealthy pooled connection")
+                    self._stats["health_check_failures"] += 1
+                    self._discard(conn)
+                    conn = None
+                    continue
+
+                self._initialize(conn)
+
+        self._local.conn = conn
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool, rolling back any open transaction."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            with self._cond:
+                self._discard(conn)
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and back in."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def checkout(self) -> PooledConnection:
+        """Check out a connection whose close() returns it to the pool."""
+        return PooledConnection(self, self.acquire())
+
+    def close_all(self):
+        """Close every idle connection (in-use connections close on release)."""
+        with self._cond:
+            while self._idle:
+                self._discard(self._idle.pop())
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool counters for monitoring contention."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "db_path": self.db_path,
+                "read_only": self.read_only,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+            })
+        checkouts = stats["checkouts"]
+        stats["hit_ratio"] = stats["hits"] / checkouts if checkouts else 0.0
+        stats["avg_wait_ms"] = (stats["wait_time_total"] / stats["waits"] * 1000) if stats["waits"] else 0.0
+        return stats
+
+
+_pools: Dict[Tuple[str, bool], ConnectionPool] = {}
+_pools_pid = os.getpid()
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str = "client_exploration.db", read_only: bool = False) -> ConnectionPool:
+    """Get the process-wide pool for a database file.
+
+    Read-only and read-write connections are pooled separately. Pools are
+    dropped after a fork so that worker processes never share SQLite
+    handles with their parent.
+    """
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get((db_path, read_only))
+        if pool is None:
+            pool = ConnectionPool(db_path, read_only=read_only)
+            _pools[(db_path, read_only)] = pool
+        return pool
+
+
+def get_all_pool_stats() -> List[Dict[str, Any]]:
+    """Stats for every pool in this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
@@ -0,0 +1,54 @@
+"""Repository for the data load log (one row per balance data load)."""
+from typing import Dict, Optional
+import sqlite3
+import logging
+
+from .base import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+DATA_LOADS_SCHEMA = """CREATE TABLE IF NOT EXISTS data_loads (
+    load_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)"""
+
+
+def create_data_loads_table(conn: sqlite3.Connection):
+    """Create the data_loads table (caller commits)."""
+    conn.execute(DATA_LOADS_SCHEMA)
+
+
+def record_data_load(conn: sqlite3.Connection, source: str, row_count: int) -> int:
+    """Log a data load on the loading connection (caller commits); returns its load_id."""
+    cursor = conn.execute(
+        "INSERT INTO data_loads (source, row_count) VALUES (?, ?)", (source, row_count)
+    )
+    return cursor.lastrowid
+
+
+class DataLoadRepository(BaseRepository):
+    """Reads the current data version: latest balance date plus load sequence."""
+
+    def get_data_version(self) -> Dict[str, Optional[str]]:
+        """Latest balance date, last load_id and when it was loaded.
+
+        load_id and loaded_at are None on databases without migration 4.
+        """
+        try:
+            results = self.execute_query("""
+            SELECT
+                (SELECT MAX(balance_date) FROM account_balances) as latest_date,
+                load_id,
+                loaded_at
+            FROM (SELECT 1)
+            LEFT JOIN (SELECT load_id, loaded_at FROM data_loads ORDER BY load_id DESC LIMIT 1)
+            """)
+        except sqlite3.OperationalError:
+            results = self.execute_query(
+                "SELECT MAX(balance_date) as latest_date, NULL as load_id, NULL as loaded_at "
+                "FROM account_balances"
+            )
+        return results[0]
@@ -31,9 +31,7 @@ class FundRepository(BaseRepository):
     
     def get_fund_current_balance(self, fund_name: str, date: Optional[str] = None) -> float:
         """Get total current balance for a fund."""
-        date_condition = "AND balance_date = :date" if date else """
-            AND balance_date = (SELECT MAX(balance_date) FROM account_balances)
-        """
+        date_condition = "AND balance_date = :date"
         
         sql = f"""
         SELECT 
@@ -44,8 +42,7 @@ class FundRepository(BaseRepository):
         """
         
         params = {"fund_name": fund_name}
-        if date:
-            params["date"] = date
+        params["date"] = date or self.latest_balance_date()
             
         return self.execute_scalar(sql, params) or 0
     
@@ -58,11 +55,8 @@ class FundRepository(BaseRepository):
             
         where_clause, params = self.build_where_clause(filters)
         
-        date_condition = "AND balance_date = :date" if date else """
-            AND balance_date = (SELECT MAX(balance_date) FROM account_balances)
-        """
-        if date:
-            params["date"] = date
+        date_condition = "AND balance_date = :date"
+        params["date"] = date or self.latest_balance_date()
         
         # Add the date condition to WHERE clause
         if where_clause:
@@ -85,9 +79,7 @@ class FundRepository(BaseRepository):
     
     def get_fund_accounts(self, fund_name: str, date: Optional[str] = None) -> List[Dict]:
         """Get all accounts that hold a specific fund."""
-        date_condition = "AND ab.balance_date = :date" if date else """
-            AND ab.balance_date = (SELECT MAX(balance_date) FROM account_balances)
-        """
+        date_condition = "AND ab.balance_date = :date"
         
         sql = f"""
         SELECT DISTINCT
@@ -104,7 +96,6 @@ class FundRepository(BaseRepository):
         """
         
         params = {"fund_name": fund_name}
-        if date:
-            params["date"] = date
+        params["date"] = date or self.latest_balance_date()
             
         return self.execute_query(sql, params)
\ No newline at end of file
@@ -0,0 +1,261 @@
+"""Repository for the pre-aggregated daily rollup tables."""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import sqlite3
+import logging
+
+from .base import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+# Rollup tables keyed by the dimensions they keep. All of them are built from
+# account_balances joined to client_mapping, the same join the dashboard uses.
+ROLLUP_TABLES = {
+    "daily_fund_totals": {
+        "columns": ["fund_name"],
+        "select": "ab.fund_name",
+    },
+    "daily_client_totals": {
+        "columns": ["client_id"],
+        "select": "cm.client_id",
+    },
+    "daily_account_totals": {
+        "columns": ["account_id"],
+        "select": "ab.account_id",
+    },
+    "daily_client_fund_totals": {
+        "columns": ["client_id", "fund_name"],
+        "select": "cm.client_id, ab.fund_name",
+    },
+}
+
+ROLLUP_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS daily_fund_totals (
+        balance_date DATE NOT NULL,
+        fund_name TEXT NOT NULL,
+        total_balance REAL NOT NULL,
+        PRIMARY KEY (balance_date, fund_name)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS daily_client_totals (
+        client_id TEXT NOT NULL,
+        balance_date DATE NOT NULL,
+        total_balance REAL NOT NULL,
+        PRIMARY KEY (client_id, balance_date)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS daily_account_totals (
+        account_id TEXT NOT NULL,
+        balance_date DATE NOT NULL,
+        total_balance REAL NOT NULL,
+        PRIMARY KEY (account_id, balance_date)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS daily_client_fund_totals (
+        client_id TEXT NOT NULL,
+        fund_name TEXT NOT NULL,
+        balance_date DATE NOT NULL,
+        total_balance REAL NOT NULL,
+        PRIMARY KEY (client_id, fund_name, balance_date)
+    ) WITHOUT ROWID""",
+]
+
+
+def create_rollup_tables(conn):
+    """Create the rollup tables if they do not exist."""
+    for statement in ROLLUP_SCHEMA:
+        conn.execute(statement)
+
+
+def refresh_rollups(conn, dates: Iterable[str]) -> int:
+    """Recompute every rollup for the given balance dates (caller commits)."""
+    dates = sorted(set(dates))
+    # Chunk to stay well below SQLite's bound-parameter limit
+    for i in range(0, len(dates), 500):
+        chunk = dates[i:i + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        for table, spec in ROLLUP_TABLES.items():
+            conn.execute(f"DELETE FROM {table} WHERE balance_date IN ({placeholders})", chunk)
+            columns = ", ".join(spec["columns"])
+            conn.execute(f"""
+                INSERT INTO {table} ({columns}, balance_date, total_balance)
+                SELECT {spec['select']}, ab.balance_date, SUM(ab.balance)
+                FROM account_balances ab
+                JOIN client_mapping cm ON ab.account_id = cm.account_id
+                WHERE ab.balance_date IN ({placeholders})
+                GROUP BY {spec['select']}, ab.balance_date
+            """, chunk)
+    return len(dates)
+
+
+def rebuild_rollups(conn) -> int:
+    """Recompute the rollups for every balance date (caller commits)."""
+    for table in ROLLUP_TABLES:
+        conn.execute(f"DELETE FROM {table}")
+    dates = [row[0] for row in conn.execute(
+        "SELECT DISTINCT balance_date FROM account_balances ORDER BY balance_date"
+    )]
+    refresh_rollups(conn, dates)
+    logger.info(f"Rebuilt rollups for {len(dates)} date(s)")
+    return len(dates)
+
+
+def refresh_missing_rollups(conn) -> int:
+    """Roll up balance dates newer than the latest rolled-up date (caller commits)."""
+    dates = [row[0] for row in conn.execute("""
+        SELECT DISTINCT balance_date FROM account_balances
+        WHERE balance_date > COALESCE((SELECT MAX(balance_date) FROM daily_fund_totals), '')
+    """)]
+    if dates:
+        refresh_rollups(conn, dates)
+        logger.info(f"Rolled up {len(dates)} new date(s)")
+    return len(dates)
+
+
+class RollupRepository(BaseRepository):
+    """Daily balance totals per fund, client, account and client x fund.
+
+    History queries read these instead of summing raw account_balances rows,
+    so their cost grows with the number of days rather than the number of
+    account/fund rows. Rollups are refreshed per balance date as data lands.
+    """
+
+    def refresh_dates(self, dates: Iterable[str]) -> int:
+        """Recompute every rollup for the given balance dates."""
+        with self.get_connection() as conn:
+            count = refresh_rollups(conn, dates)
+            conn.commit()
+        return count
+
+    def refresh_missing(self) -> int:
+        """Roll up any balance dates that are not in the rollups yet."""
+        with self.get_connection() as conn:
+            count = refresh_missing_rollups(conn)
+            conn.commit()
+        return count
+
+    def rebuild(self) -> int:
+        """Recompute the rollups for every balance date."""
+        with self.get_connection() as conn:
+            count = rebuild_rollups(conn)
+            conn.commit()
+        return count
+
+    def is_current(self) -> bool:
+        """True when the rollups include the latest loaded balance date."""
+        sql = """
+        SELECT
+            (SELECT MAX(balance_date) FROM account_balances) as raw_max,
+            (SELECT MAX(balance_date) FROM daily_fund_totals) as rollup_max
+        """
+        try:
+            with self.pool.connection() as conn:
+                row = conn.execute(sql).fetchone()
+        except sqlite3.OperationalError:
+            # Rollup tables not created yet (migration not applied)
+            return False
+        return row["raw_max"] is not None and row["raw_max"] == row["rollup_max"]
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def build_history_query(self, filters: Dict[str, Any]) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        """Pick the coarsest rollup able to answer a filtered history query.
+
+        Supported filter keys: client_ids, client_name_like, fund_names,
+        fund_name_like, fund_ticker_or_name_like, account_ids, account_id_like.
+        Returns (table, where_sql, params), or None when the filters combine
+        account and fund dimensions, which only the raw table can answer.
+        """
+        has_client = bool(filters.get("client_ids") or filters.get("client_name_like"))
+        has_fund = bool(filters.get("fund_names") or filters.get("fund_name_like")
+                        or filters.get("fund_ticker_or_name_like"))
+        has_account = bool(filters.get("account_ids") or filters.get("account_id_like"))
+
+        if has_account and has_fund:
+            return None
+        if has_account:
+            table = "daily_account_totals"
+        elif has_client and has_fund:
+            table = "daily_client_fund_totals"
+        elif has_client:
+            table = "daily_client_totals"
+        else:
+            table = "daily_fund_totals"
+
+        conditions = []
+        params: Dict[str, Any] = {}
+
+        # Client conditions resolve through client_mapping
+        client_conditions = []
+        if filters.get("client_ids"):
+            placeholders = ", ".join(f":_client_{i}" for i in range(len(filters["client_ids"])))
+            client_conditions.append(f"client_id IN ({placeholders})")
+            for i, client_id in enumerate(filters["client_ids"]):
+                params[f"_client_{i}"] = client_id
+        if filters.get("client_name_like"):
+            client_conditions.append("client_name LIKE :client_name_like")
+            params["client_name_like"] = filters["client_name_like"]
+        if client_conditions:
+            client_where = " AND ".join(client_conditions)
+            if table == "daily_account_totals":
+                conditions.append(f"account_id IN (SELECT account_id FROM client_mapping WHERE {client_where})")
+            elif filters.get("client_name_like"):
+                conditions.append(f"client_id IN (SELECT client_id FROM client_mapping WHERE {client_where})")
+            else:
+                conditions.append(client_where)
+
+        if filters.get("fund_names"):
+            placeholders = ", ".join(f":_fund_{i}" for i in range(len(filters["fund_names"])))
+            conditions.append(f"fund_name IN ({placeholders})")
+            for i, fund_name in enumerate(filters["fund_names"]):
+                params[f"_fund_{i}"] = fund_name
+        if filters.get("fund_name_like"):
+            conditions.append("fund_name LIKE :fund_name_like")
+            params["fund_name_like"] = filters["fund_name_like"]
+        if filters.get("fund_ticker_or_name_like"):
+            conditions.append("""(fund_name LIKE :fund_ticker_or_name_like OR fund_name IN (
+                SELECT fund_name FROM funds WHERE fund_ticker LIKE :fund_ticker_or_name_like))""")
+            params["fund_ticker_or_name_like"] = filters["fund_ticker_or_name_like"]
+
+        if filters.get("account_ids"):
+            placeholders = ", ".join(f":_account_{i}" for i in range(len(filters["account_ids"])))
+            conditions.append(f"account_id IN ({placeholders})")
+            for i, account_id in enumerate(filters["account_ids"]):
+                params[f"_account_{i}"] = account_id
+        if filters.get("account_id_like"):
+            conditions.append("account_id LIKE :account_id_like")
+            params["account_id_like"] = filters["account_id_like"]
+
+        where_sql = " AND " + " AND ".join(conditions) if conditions else ""
+        return table, where_sql, params
+
+    def get_history(self, filters: Dict[str, Any], start_date: str, end_date: str,
+                    date_alias: str = "date", balance_alias: str = "balance") -> Optional[List[Dict]]:
+        """Daily totals between two dates (inclusive) for the given filters.
+
+        Returns None when no rollup can answer the filters; callers then fall
+        back to aggregating account_balances.
+        """
+        query = self.build_history_query(filters)
+        if query is None:
+            return None
+        table, where_sql, params = query
+        params.update({"start_date": start_date, "end_date": end_date})
+
+        sql = f"""
+        SELECT
+            balance_date as {date_alias},
+            SUM(total_balance) as {balance_alias}
+        FROM {table}
+        WHERE balance_date BETWEEN :start_date AND :end_date
+        {where_sql}
+        GROUP BY balance_date
+        ORDER BY balance_date
+        """
+        return self.execute_query(sql, params)
+
+    def get_total(self, filters: Dict[str, Any], balance_date: str) -> Tuple[bool, Optional[float]]:
+        """Total balance on one date. Returns (answered, total)."""
+        history = self.get_history(filters, balance_date, balance_date)
+        if history is None:
+            return False, None
+        return True, history[0]["balance"] if history else None
@@ -140,8 +140,15 @@ run_with_venv() {
     echo -e "${YELLOW}Starting Flask application in background...${NC}"
     echo -e "${BLUE}Application will run at: http://localhost:${PORT}${NC}"
     
-    # Start the application in background and save PID
-    nohup env FLASK_PORT=${PORT} python app.py > "${LOG_FILE}" 2>&1 &
+    # Start the application in background and save PID. gunicorn (installed
+    # from requirements.txt) is used where it runs; Windows falls back to the
+    # Flask development server
+    if command_exists gunicorn; then
+        nohup env FLASK_PORT=${PORT} gunicorn -c gunicorn.conf.py app:app > "${LOG_FILE}" 2>&1 &
+    else
+        echo -e "${YELLOW}gunicorn not available; using the Flask development server${NC}"
+        nohup env FLASK_PORT=${PORT} python app.py > "${LOG_FILE}" 2>&1 &
+    fi
     APP_PID=$!
     
     # Save PID to file for stop function
@@ -236,7 +243,7 @@ stop_application() {
             PID=$(netstat -tulpn 2>/dev/null | grep ":${PORT}" | awk '{print $7}' | cut -d/ -f1)
         else
             # Try ps command as fallback
-            PID=$(ps aux | grep "[p]ython.*app.py" | awk '{print $2}')
+            PID=$(ps aux | grep -E "[p]ython.*app.py|[g]unicorn.*app:app" | awk '{print $2}')
         fi
         
         if [ -n "$PID" ]; then
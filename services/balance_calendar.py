@@ -0,0 +1,94 @@
+"""Cached calendar of the balance dates loaded in a database.
+
+Resolves the latest date, the last date on or before any day ("as of") and
+the QTD/YTD/30-day comparison dates with a bisect over the sorted dates, so SQL
+takes literal dates instead of MAX(balance_date) subqueries. A calendar is
+kept per database and reloaded when the data version changes (a new
+latest date or data load, see services/data_version.py).
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+import bisect
+import threading
+
+from repositories.balance_repository import BalanceRepository
+from services.data_version import get_data_version
+
+DateLike = Union[str, date]
+
+_calendars: Dict[str, "BalanceCalendar"] = {}
+_lock = threading.Lock()
+
+
+def _iso(value: DateLike) -> str:
+    return str(value)[:10]
+
+
+def quarter_start(value: DateLike) -> str:
+    """First day of the calendar quarter containing a date."""
+    day = date.fromisoformat(_iso(value))
+    return date(day.year, (day.month - 1) // 3 * 3 + 1, 1).isoformat()
+
+
+def year_start(value: DateLike) -> str:
+    """First day of the year containing a date."""
+    return f"{_iso(value)[:4]}-01-01"
+
+
+def days_before(value: DateLike, days: int) -> str:
+    """The date a number of days earlier."""
+    return (date.fromisoformat(_iso(value)) - timedelta(days=days)).isoformat()
+
+
+def sql_date(value: Optional[DateLike]) -> str:
+    """A date as a SQL literal ('YYYY-MM-DD', or NULL); rejects anything else."""
+    if value is None:
+        return "NULL"
+    return f"'{date.fromisoformat(_iso(value)).isoformat()}'"
+
+
+class BalanceCalendar:
+    """Sorted balance dates of one database."""
+
+    def __init__(self, dates: List[str], token: Optional[str] = None):
+        self.dates = dates
+        self.token = token
+
+    @property
+    def latest(self) -> Optional[str]:
+        return self.dates[-1] if self.dates else None
+
+    def has_date(self, value: DateLike) -> bool:
+        value = _iso(value)
+        i = bisect.bisect_left(self.dates, value)
+        return i < len(self.dates) and self.dates[i] == value
+
+    def as_of(self, value: DateLike) -> Optional[str]:
+        """Last balance date on or before a date (None if there is none)."""
+        i = bisect.bisect_right(self.dates, _iso(value))
+        return self.dates[i - 1] if i else None
+
+    def period_starts(self, value: DateLike) -> Tuple[Optional[str], Optional[str]]:
+        """Balance dates the QTD and YTD changes compare against: as of the quarter and year starts."""
+        return self.as_of(quarter_start(value)), self.as_of(year_start(value))
+
+    def prior_period_ends(self, value: DateLike) -> Tuple[Optional[str], Optional[str]]:
+        """Balance dates closing the previous quarter and year: as of the day before each start."""
+        return self.as_of(days_before(quarter_start(value), 1)), self.as_of(days_before(year_start(value), 1))
+
+    def as_of_days_before(self, value: DateLike, days: int) -> Optional[str]:
+        """Last balance date at least a number of days before a date."""
+        return self.as_of(days_before(value, days))
+
+
+def get_balance_calendar(db_path: str = "client_exploration.db") -> BalanceCalendar:
+    """This database's calendar, reloaded when its data version changes."""
+    token = get_data_version(db_path).token
+    with _lock:
+        calendar = _calendars.get(db_path)
+    if calendar is not None and calendar.token == token:
+        return calendar
+    calendar = BalanceCalendar(BalanceRepository(db_path, read_only=True).get_balance_dates(), token)
+    with _lock:
+        _calendars[db_path] = calendar
+    return calendar
@@ -0,0 +1,392 @@
+"""Optional in-memory columnar engine for dashboard tables, KPIs and charts.
+
+Enable with BALANCE_CUBE=1 (requires numpy). The whole of account_balances is
+held as a dense date x position matrix, where a position is an
+(account_id, fund_name) pair that has ever held a balance, with index arrays
+mapping positions to accounts, funds and clients. Every filter becomes a
+boolean mask over accounts/funds, and table, KPI and chart numbers are
+vectorized reductions over the masked positions instead of SQL.
+"""
+from typing import Dict, List, Optional, Tuple
+import os
+import re
+import threading
+import time
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+from repositories.connection_pool import get_pool
+from services.balance_snapshot import pct_change
+from services.data_version import get_data_version
+
+logger = logging.getLogger(__name__)
+
+CUBE_ENABLED = os.environ.get("BALANCE_CUBE", "0").lower() in ("1", "true", "yes", "on")
+# Refuse to load a cube larger than this; the service then keeps using SQL
+CUBE_MAX_MB = int(os.environ.get("BALANCE_CUBE_MAX_MB", "512"))
+
+
+def cube_available() -> bool:
+    """True when the cube is enabled and numpy is installed."""
+    return CUBE_ENABLED and np is not None
+
+
+def like_to_regex(pattern: str):
+    """Compile a SQL LIKE pattern with SQLite semantics (ASCII case-insensitive)."""
+    parts = []
+    for char in pattern:
+        if char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.IGNORECASE | re.DOTALL)
+
+
+class BalanceCube:
+    """Every balance row, held as NumPy arrays.
+
+    values[d, p] is the balance of position p on dates[d]; present[d, p]
+    records whether a row existed, so "no row" and "zero balance" stay
+    distinct exactly as they are in SQL.
+    """
+
+    def __init__(self, dates, account_ids, account_client, account_client_names,
+                 client_ids, client_names, fund_names, position_account, position_fund, values, present,
+                 load_seconds: float = 0.0):
+        self.dates = dates
+        self.account_ids = account_ids
+        self.account_client = account_client
+        self.account_client_names = account_client_names
+        self.client_ids = client_ids
+        self.client_names = client_names
+        self.fund_names = fund_names
+        self.position_account = position_account
+        self.position_fund = position_fund
+        self.position_client = account_client[position_account]
+        self.values = values
+        self.present = present
+        self.load_seconds = load_seconds
+        self.latest_date = str(dates[-1]) if len(dates) else None
+        # Data version the cube was loaded at; set by get_cube
+        self.token: Optional[str] = None
+        self._date_index = {str(d): i for i, d in enumerate(dates)}
+
+    @classmethod
+    def load(cls, conn) -> Optional["BalanceCube"]:
+        """Build a cube from a connection; None if it would exceed CUBE_MAX_MB."""
+        started = time.perf_counter()
+
+        mapping = conn.execute(
+            "SELECT account_id, client_id, client_name FROM client_mapping ORDER BY account_id"
+        ).fetchall()
+        account_ids = [row[0] for row in mapping]
+        client_ids = sorted({row[1] for row in mapping})
+        client_pos = {client_id: i for i, client_id in enumerate(client_ids)}
+        client_names = [None] * len(client_ids)
+        for _, client_id, client_name in mapping:
+            client_names[client_pos[client_id]] = client_name
+        account_client = np.array([client_pos[row[1]] for row in mapping], dtype=np.int32)
+        account_pos = {account_id: i for i, account_id in enumerate(account_ids)}
+
+        # Only rows that join to client_mapping, like every dashboard query
+        dates = [row[0] for row in conn.execute(
+            "SELECT DISTINCT balance_date FROM account_balances ORDER BY balance_date"
+        )]
+        positions = conn.execute("""
+            SELECT DISTINCT ab.account_id, ab.fund_name
+            FROM account_balances ab
+            JOIN client_mapping cm ON ab.account_id = cm.account_id
+            ORDER BY ab.account_id, ab.fund_name
+        """).fetchall()
+        fund_names = sorted({row[1] for row in positions})
+        fund_pos = {fund_name: i for i, fund_name in enumerate(fund_names)}
+        position_index = {(row[0], row[1]): i for i, row in enumerate(positions)}
+
+        size_mb = len(dates) * len(positions) * 9 / (1024 * 1024)
+        if size_mb > CUBE_MAX_MB:
+            logger.warning(f"Balance cube would need {size_mb:.0f}MB (limit {CUBE_MAX_MB}MB); not loading")
+            return None
+
+        date_pos = {balance_date: i for i, balance_date in enumerate(dates)}
+        rows = conn.execute("""
+            SELECT ab.balance_date, ab.account_id, ab.fund_name, ab.balance
+            FROM account_balances ab
+            JOIN client_mapping cm ON ab.account_id = cm.account_id
+        """).fetchall()
+        date_idx = np.fromiter((date_pos[row[0]] for row in rows), dtype=np.int32, count=len(rows))
+        position_idx = np.fromiter((position_index[(row[1], row[2])] for row in rows),
+                                   dtype=np.int32, count=len(rows))
+        balances = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+
+        values = np.zeros((len(dates), len(positions)), dtype=np.float64)
+        present = np.zeros((len(dates), len(positions)), dtype=bool)
+        np.add.at(values, (date_idx, position_idx), balances)
+        present[date_idx, position_idx] = True
+
+        cube = cls(
+            dates=np.array(dates),
+            account_ids=np.array(account_ids),
+            account_client=account_client,
+            account_client_names=np.array([row[2] for row in mapping]),
+            client_ids=np.array(client_ids),
+            client_names=np.array(client_names),
+            fund_names=np.array(fund_names),
+            position_account=np.array([account_pos[row[0]] for row in positions], dtype=np.int32),
+            position_fund=np.array([fund_pos[row[1]] for row in positions], dtype=np.int32),
+            values=values,
+            present=present,
+            load_seconds=time.perf_counter() - started,
+        )
+        logger.info(f"Loaded balance cube: {len(dates)} dates x {len(positions)} positions "
+                    f"({cube.memory_bytes() / 1024 / 1024:.1f}MB) in {cube.load_seconds:.2f}s")
+        return cube
+
+    def has_date(self, balance_date: str) -> bool:
+        return balance_date in self._date_index
+
+    def memory_bytes(self) -> int:
+        return int(self.values.nbytes + self.present.nbytes)
+
+    def stats(self) -> Dict:
+        return {
+            "latest_date": self.latest_date,
+            "token": self.token,
+            "dates": len(self.dates),
+            "accounts": len(self.account_ids),
+            "clients": len(self.client_ids),
+            "funds": len(self.fund_names),
+            "positions": len(self.position_account),
+            "memory_bytes": self.memory_bytes(),
+            "load_seconds": round(self.load_seconds, 4),
+        }
+
+    # ------------------------------------------------------------------
+    # Filters
+    # ------------------------------------------------------------------
+
+    def _match(self, labels, values: Optional[List[str]] = None, like: Optional[str] = None):
+        """Boolean mask over a label array for an IN list and/or LIKE pattern."""
+        mask = np.ones(len(labels), dtype=bool)
+        if values:
+            mask &= np.isin(labels, list(values))
+        if like:
+            regex = like_to_regex(like)
+            mask &= np.array([regex.fullmatch(label) is not None for label in labels], dtype=bool)
+        return mask
+
+    def position_mask(self, filters: Dict, exclude_source: Optional[str] = None):
+        """Positions matching the service filters, optionally without one list filter.
+
+        Mirrors DashboardService._build_full_where_clause: only the list filter
+        of the selection source is dropped, text filters always apply.
+        """
+        client_mask = self._match(
+            self.client_ids,
+            filters.get("client_ids") if exclude_source != "client" else None
+        )
+        if filters.get("client_name_like"):
+            client_mask &= self._match(self.client_names, like=filters["client_name_like"])
+        account_mask = client_mask[self.account_client] & self._match(
+            self.account_ids,
+            filters.get("account_ids") if exclude_source != "account" else None,
+            filters.get("account_id_like")
+        )
+        fund_mask = self._match(
+            self.fund_names,
+            filters.get("fund_names") if exclude_source != "fund" else None,
+            filters.get("fund_ticker_like")
+        )
+        return account_mask[self.position_account] & fund_mask[self.position_fund]
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def snapshot(self, filters: Dict, ref_date: str, qtd_start: str, ytd_start: str,
+                 days_30_ago: str, selection_source: Optional[str] = None) -> "CubeSnapshot":
+        """Table and KPI view for one reference date, like BalanceSnapshot."""
+        exclude_source = selection_source if selection_source in ("client", "fund", "account") else None
+        full_mask = self.position_mask(filters)
+        masks = {"client": full_mask, "fund": full_mask, "account": full_mask}
+        if exclude_source:
+            masks[exclude_source] = self.position_mask(filters, exclude_source=exclude_source)
+        return CubeSnapshot(self, masks, full_mask, ref_date, qtd_start, ytd_start, days_30_ago)
+
+    def history(self, filters: Dict, start_date: str, end_date: str) -> List[Dict]:
+        """Daily totals between two dates (inclusive), dates with rows only."""
+        mask = self.position_mask(filters)
+        start = int(np.searchsorted(self.dates, start_date, side="left"))
+        end = int(np.searchsorted(self.dates, end_date, side="right"))
+        totals = self.values[start:end][:, mask].sum(axis=1)
+        has_rows = self.present[start:end][:, mask].any(axis=1)
+        return [
+            {"date": str(self.dates[start + i]), "balance": float(totals[i])}
+            for i in np.flatnonzero(has_rows)
+        ]
+
+
+class CubeSnapshot:
+    """BalanceSnapshot-compatible tables and KPIs computed from a BalanceCube."""
+
+    def __init__(self, cube: BalanceCube, masks: Dict, intersection_mask,
+                 ref_date: str, qtd_start: str, ytd_start: str, days_30_ago: str):
+        self.cube = cube
+        self.masks = masks
+        self.intersection_mask = intersection_mask
+        self.ref_date = ref_date
+        self.qtd_start = qtd_start
+        self.ytd_start = ytd_start
+        self.days_30_ago = days_30_ago
+
+    def _selected(self, balance_date: str, mask):
+        """Positions with a row on the date within the mask, and their balances."""
+        index = self.cube._date_index.get(balance_date)
+        if index is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        selected = np.flatnonzero(self.cube.present[index] & mask)
+        return selected, self.cube.values[index, selected]
+
+    def _totals(self, balance_date: str, mask, groups, size: int) -> Tuple:
+        """Per-group totals on a date and which groups had any rows."""
+        selected, balances = self._selected(balance_date, mask)
+        keys = groups[selected]
+        totals = np.bincount(keys, weights=balances, minlength=size)
+        has_rows = np.bincount(keys, minlength=size) > 0
+        return totals, has_rows
+
+    def _rollup(self, table: str, groups, size: int):
+        mask = self.masks[table]
+        current, has_current = self._totals(self.ref_date, mask, groups, size)
+        qtd, has_qtd = self._totals(self.qtd_start, mask, groups, size)
+        ytd, has_ytd = self._totals(self.ytd_start, mask, groups, size)
+        for i in np.flatnonzero(has_current):
+            balance = float(current[i])
+            yield (
+                i,
+                balance,
+                pct_change(balance, float(qtd[i]) if has_qtd[i] else None),
+                pct_change(balance, float(ytd[i]) if has_ytd[i] else None),
+            )
+
+    def client_balances(self) -> List[Dict]:
+        """Client balances with QTD/YTD metrics, largest first."""
+        cube = self.cube
+        results = [
+            {
+                "client_id": str(cube.client_ids[i]),
+                "client_name": str(cube.client_names[i]),
+                "total_balance": balance,
+                "qtd_change": qtd_change,
+                "ytd_change": ytd_change,
+            }
+            for i, balance, qtd_change, ytd_change
+            in self._rollup("client", cube.position_client, len(cube.client_ids))
+        ]
+        results.sort(key=lambda r: -r["total_balance"])
+        return results
+
+    def fund_balances(self) -> List[Dict]:
+        """Fund balances with QTD/YTD metrics, largest first."""
+        cube = self.cube
+        results = [
+            {
+                "fund_name": str(cube.fund_names[i]),
+                "fund_ticker": str(cube.fund_names[i])[:3],
+                "total_balance": balance,
+                "qtd_change": qtd_change,
+                "ytd_change": ytd_change,
+            }
+            for i, balance, qtd_change, ytd_change
+            in self._rollup("fund", cube.position_fund, len(cube.fund_names))
+        ]
+        results.sort(key=lambda r: -r["total_balance"])
+        return results
+
+    def account_details(self) -> List[Dict]:
+        """Account balances with QTD/YTD metrics, largest first."""
+        cube = self.cube
+        results = [
+            {
+                "account_id": str(cube.account_ids[i]),
+                "client_name": str(cube.account_client_names[i]),
+                "client_id": str(cube.client_ids[cube.account_client[i]]),
+                "balance": balance,
+                "qtd_change": qtd_change,
+                "ytd_change": ytd_change,
+            }
+            for i, balance, qtd_change, ytd_change
+            in self._rollup("account", cube.position_account, len(cube.account_ids))
+            if balance > 0
+        ]
+        results.sort(key=lambda r: -r["balance"])
+        return results
+
+    def kpi_metrics(self) -> Dict:
+        """Dashboard KPIs over the full filter intersection."""
+        cube = self.cube
+        selected, balances = self._selected(self.ref_date, self.intersection_mask)
+        selected_30d, balances_30d = self._selected(self.days_30_ago, self.intersection_mask)
+
+        total_aum = float(balances.sum()) if len(selected) else None
+        balance_30d_ago = float(balances_30d.sum()) if len(selected_30d) else None
+
+        change_30d = 0
+        if balance_30d_ago:
+            change_30d = pct_change(total_aum, balance_30d_ago)
+
+        return {
+            "active_clients": int(len(np.unique(cube.position_client[selected]))),
+            "active_funds": int(len(np.unique(cube.position_fund[selected]))),
+            "active_accounts": int(len(np.unique(cube.position_account[selected]))),
+            "total_aum": total_aum,
+            "balance_30d_ago": balance_30d_ago,
+            "change_30d": change_30d
+        }
+
+
+_cubes: Dict[str, BalanceCube] = {}
+# db_path -> data version token for which the cube was too large to load
+_oversized: Dict[str, str] = {}
+_cubes_lock = threading.Lock()
+
+
+def get_cube(db_path: str) -> Optional[BalanceCube]:
+    """Process-wide cube for a database, reloaded when its data version changes.
+
+    The version covers reloads of existing dates and historical loads, not
+    just a new MAX(balance_date), so no load leaves the cube stale.
+    """
+    if not cube_available():
+        return None
+    token = get_data_version(db_path).token
+    with _cubes_lock:
+        if _oversized.get(db_path) == token:
+            return None
+        cube = _cubes.get(db_path)
+        if cube is None or cube.token != token:
+            with get_pool(db_path).connection() as conn:
+                cube = BalanceCube.load(conn)
+            if cube is None:
+                _cubes.pop(db_path, None)
+                _oversized[db_path] = token
+                return None
+            cube.token = token
+            _cubes[db_path] = cube
+        return cube
+
+
+def get_all_cube_stats() -> Dict:
+    """Status of the cube engine and every loaded cube."""
+    with _cubes_lock:
+        cubes = dict(_cubes)
+    return {
+        "enabled": CUBE_ENABLED,
+        "numpy_available": np is not None,
+        "cubes": {db_path: cube.stats() for db_path, cube in cubes.items()},
+    }
@@ -0,0 +1,158 @@
+"""In-memory rollups over a single fetch of the balance rows a dashboard needs."""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def pct_change(current: Optional[float], start: Optional[float]) -> Optional[float]:
+    """Percent change, or None when there is no usable starting balance."""
+    if current is None or start is None or start == 0:
+        return None
+    return ((current - start) / start) * 100
+
+
+class BalanceSnapshot:
+    """Balance rows for the reference, QTD, YTD and 30-day comparison dates.
+
+    One query loads every row the dashboard tables and KPIs need; client,
+    fund and account rollups plus KPIs are then derived in memory so that
+    all numbers come from the same consistent result set.
+
+    Rows are (balance_date, account_id, fund_name, balance, client_id,
+    client_name).
+    """
+
+    def __init__(self, rows: Iterable[Tuple], ref_date: str, qtd_start: str,
+                 ytd_start: str, days_30_ago: str,
+                 selection_source: Optional[str] = None,
+                 source_values: Optional[List[str]] = None):
+        self.ref_date = ref_date
+        self.qtd_start = qtd_start
+        self.ytd_start = ytd_start
+        self.days_30_ago = days_30_ago
+        self.selection_source = selection_source
+
+        # Rows were fetched without the selection_source filter so that the
+        # source table can show every item; the intersection re-applies it.
+        self._all_rows = list(rows)
+        if selection_source and source_values:
+            allowed = set(source_values)
+            column = {"client": 4, "fund": 2, "account": 1}[selection_source]
+            self._intersection_rows = [r for r in self._all_rows if r[column] in allowed]
+        else:
+            self._intersection_rows = self._all_rows
+
+    def _rows_for(self, table: str) -> List[Tuple]:
+        """Rows for a table: unfiltered by its own selection when it is the source."""
+        if self.selection_source == table:
+            return self._all_rows
+        return self._intersection_rows
+
+    def _sum_by(self, rows: List[Tuple], key_index: int) -> Dict[str, Dict]:
+        """Sum balances per key for each snapshot date."""
+        totals = {
+            self.ref_date: defaultdict(float),
+            self.qtd_start: defaultdict(float),
+            self.ytd_start: defaultdict(float),
+        }
+        for row in rows:
+            bucket = totals.get(row[0])
+            if bucket is not None:
+                bucket[row[key_index]] += row[3]
+        return totals
+
+    def client_balances(self) -> List[Dict]:
+        """Client balances with QTD/YTD metrics, largest first."""
+        rows = self._rows_for("client")
+        totals = self._sum_by(rows, 4)
+        names = {row[4]: row[5] for row in rows}
+
+        current = totals[self.ref_date]
+        qtd = totals[self.qtd_start]
+        ytd = totals[self.ytd_start]
+        results = [
+            {
+                "client_id": client_id,
+                "client_name": names[client_id],
+                "total_balance": balance,
+                "qtd_change": pct_change(balance, qtd.get(client_id)),
+                "ytd_change": pct_change(balance, ytd.get(client_id)),
+            }
+            for client_id, balance in current.items()
+        ]
+        results.sort(key=lambda r: -r["total_balance"])
+        return results
+
+    def fund_balances(self) -> List[Dict]:
+        """Fund balances with QTD/YTD metrics, largest first."""
+        rows = self._rows_for("fund")
+        totals = self._sum_by(rows, 2)
+
+        current = totals[self.ref_date]
+        qtd = totals[self.qtd_start]
+        ytd = totals[self.ytd_start]
+        results = [
+            {
+                "fund_name": fund_name,
+                "fund_ticker": fund_name[:3],
+                "total_balance": balance,
+                "qtd_change": pct_change(balance, qtd.get(fund_name)),
+                "ytd_change": pct_change(balance, ytd.get(fund_name)),
+            }
+            for fund_name, balance in current.items()
+        ]
+        results.sort(key=lambda r: -r["total_balance"])
+        return results
+
+    def account_details(self) -> List[Dict]:
+        """Account balances with QTD/YTD metrics, largest first."""
+        rows = self._rows_for("account")
+        totals = self._sum_by(rows, 1)
+        clients = {row[1]: (row[4], row[5]) for row in rows}
+
+        current = totals[self.ref_date]
+        qtd = totals[self.qtd_start]
+        ytd = totals[self.ytd_start]
+        results = [
+            {
+                "account_id": account_id,
+                "client_name": clients[account_id][1],
+                "client_id": clients[account_id][0],
+                "balance": balance,
+                "qtd_change": pct_change(balance, qtd.get(account_id)),
+                "ytd_change": pct_change(balance, ytd.get(account_id)),
+            }
+            for account_id, balance in current.items()
+            if balance > 0
+        ]
+        results.sort(key=lambda r: -r["balance"])
+        return results
+
+    def kpi_metrics(self) -> Dict:
+        """Dashboard KPIs over the full filter intersection."""
+        clients: Set[str] = set()
+        funds: Set[str] = set()
+        accounts: Set[str] = set()
+        total_aum = None
+        balance_30d_ago = None
+
+        for row in self._intersection_rows:
+            if row[0] == self.ref_date:
+                clients.add(row[4])
+                funds.add(row[2])
+                accounts.add(row[1])
+                total_aum = (total_aum or 0) + row[3]
+            if row[0] == self.days_30_ago:
+                balance_30d_ago = (balance_30d_ago or 0) + row[3]
+
+        change_30d = 0
+        if balance_30d_ago:
+            change_30d = pct_change(total_aum, balance_30d_ago)
+
+        return {
+            "active_clients": len(clients),
+            "active_funds": len(funds),
+            "active_accounts": len(accounts),
+            "total_aum": total_aum,
+            "balance_30d_ago": balance_30d_ago,
+            "change_30d": change_30d
+        }
@@ -0,0 +1,50 @@
+"""Compact wire format for chart history series.
+
+By default a history series is a list of {date, balance} objects (v1 uses
+balance_date/total_balance). The columnar encoding sends the same points as
+a start date, the day gaps between consecutive points and a parallel list of
+balances rounded to cents:
+
+    {"format": "columnar", "start": "2023-10-17",
+     "day_deltas": [0, 1, 1, 3, ...], "balances": [1234.56, ...]}
+
+charts-v2.js decodes it straight into Chart.js labels and data.
+"""
+from datetime import datetime
+from typing import Dict, List
+
+CHART_FORMATS = ("rows", "columnar")
+HISTORY_KEYS = ("recent_history", "long_term_history")
+
+
+def encode_columnar(history: List[Dict], date_key: str, balance_key: str) -> Dict:
+    """Encode a list of history rows (sorted by date) as columns."""
+    day_deltas = []
+    balances = []
+    previous = None
+    for point in history:
+        day = datetime.strptime(point[date_key], "%Y-%m-%d").date()
+        day_deltas.append((day - previous).days if previous else 0)
+        balances.append(round(point[balance_key] or 0, 2))
+        previous = day
+    return {
+        "format": "columnar",
+        "start": history[0][date_key] if history else None,
+        "day_deltas": day_deltas,
+        "balances": balances,
+    }
+
+
+def apply_chart_format(container: Dict, chart_format: str, date_key: str, balance_key: str) -> Dict:
+    """Return container with its history series in the requested format.
+
+    container is a response dict (v1) or its "charts" dict (v2); it is
+    copied, not modified, since it may be shared with a cache.
+    """
+    if chart_format != "columnar" or not container:
+        return container
+    encoded = dict(container)
+    for key in HISTORY_KEYS:
+        if isinstance(encoded.get(key), list):
+            encoded[key] = encode_columnar(encoded[key], date_key, balance_key)
+    return encoded
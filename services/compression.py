@@ -0,0 +1,73 @@
+"""HTTP response compression (gzip, and brotli when installed).
+
+Encodings are negotiated from Accept-Encoding. Bodies are compressed once:
+cached API responses are stored already encoded (see app.py), everything
+else is compressed on the way out, streamed bodies chunk by chunk.
+
+brotli is optional (pip install brotli); without it only gzip is offered.
+"""
+from typing import Iterable, Iterator, Optional
+import gzip
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSION_ENABLED = os.environ.get("RESPONSE_COMPRESSION", "1").lower() in ("1", "true", "yes", "on")
+# Smaller bodies are sent as-is; compression would not pay for itself
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", "5"))
+
+COMPRESSIBLE_MIMETYPES = (
+    "application/json",
+    "application/javascript",
+    "text/csv",
+    "text/css",
+    "text/html",
+    "text/plain",
+)
+
+
+def supported_encodings():
+    """Content codings this process can produce, preferred first."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """Best supported coding for a werkzeug Accept-Encoding header, or None."""
+    if not COMPRESSION_ENABLED:
+        return None
+    return accept_encodings.best_match(supported_encodings())
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compress a streamed body, flushing after each chunk so it still streams."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    if encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+        return
+    raise ValueError(f"Unsupported encoding: {encoding}")
@@ -1,29 +1,86 @@
 """Service layer for dashboard data aggregation and business logic."""
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from collections import Counter
+import hashlib
 import logging
 import base64
 import json
+import os
+import sqlite3
+import threading
+import time
 
 from repositories.base import BaseRepository
 from repositories.client_repository import ClientRepository
 from repositories.fund_repository import FundRepository
 from repositories.account_repository import AccountRepository
 from repositories.cache_repository import CacheRepository
+from repositories.rollup_repository import RollupRepository
+from services.balance_snapshot import BalanceSnapshot
+from services.balance_cube import cube_available, get_cube
+from services.downsample import downsample_charts
+from services.data_version import get_data_version
+from services.balance_calendar import days_before, get_balance_calendar, quarter_start, year_start
+from services.page_snapshots import PageSnapshot, get_page_snapshots
+from services.query_executor import run_components
+from services.response_cache import get_response_cache
 
 logger = logging.getLogger(__name__)
 
+# Filtered requests are counted in memory and written to dashboard_access_log
+# in batches, keeping a database write off most requests
+ACCESS_LOG_FLUSH_EVERY = int(os.environ.get("ACCESS_LOG_FLUSH_EVERY", "50"))
+ACCESS_LOG_FLUSH_SECONDS = float(os.environ.get("ACCESS_LOG_FLUSH_SECONDS", "30"))
+_access_counts: Counter = Counter()
+_access_lock = threading.Lock()
+_access_last_flush = time.monotonic()
+
+# selection_source views: the filter each one drops, and its column in snapshot rows
+SELECTION_SOURCES = ("client", "fund", "account")
+SOURCE_FILTERS = {"client": "client_ids", "fund": "fund_names", "account": "account_ids"}
+SOURCE_COLUMNS = {"client": 4, "fund": 2, "account": 1}
+SOURCE_TABLES = {"client": "client_balances", "fund": "fund_balances", "account": "account_details"}
+
+
+def canonical_filters(client_ids: Optional[List[str]] = None,
+                      fund_names: Optional[List[str]] = None,
+                      account_ids: Optional[List[str]] = None,
+                      text_filters: Optional[Dict[str, str]] = None,
+                      selection_source: Optional[str] = None) -> Dict:
+    """Order-insensitive description of a dashboard filter combination."""
+    return {
+        "client_ids": sorted(set(client_ids)) if client_ids else None,
+        "fund_names": sorted(set(fund_names)) if fund_names else None,
+        "account_ids": sorted(set(account_ids)) if account_ids else None,
+        "text_filters": dict(sorted(text_filters.items())) if text_filters else None,
+        "selection_source": selection_source if selection_source in SELECTION_SOURCES else None,
+    }
+
+
+def filter_hash(filter_spec: Dict) -> str:
+    """Stable key for a canonical filter combination."""
+    encoded = json.dumps(filter_spec, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
 
 class DashboardService:
     """Service for complex dashboard data operations."""
     
     def __init__(self, db_path: str = "client_exploration.db"):
         self.db_path = db_path
-        self._base_repo = BaseRepository(db_path)
+        # Dashboard queries run concurrently (see query_executor) on read-only
+        # connections; only the access log is written, through cache_repo
+        self._base_repo = BaseRepository(db_path, read_only=True)
         self.client_repo = ClientRepository(db_path)
         self.fund_repo = FundRepository(db_path)
         self.account_repo = AccountRepository(db_path)
         self.cache_repo = CacheRepository(db_path)
+        self._cache_reader = CacheRepository(db_path, read_only=True)
+        self.rollup_repo = RollupRepository(db_path, read_only=True)
+        self.use_cube = cube_available()
+        self.response_cache = get_response_cache()
+        self.page_snapshots = get_page_snapshots()
     
     def get_dashboard_data(self, 
                           client_ids: Optional[List[str]] = None,
@@ -36,53 +93,196 @@ class DashboardService:
                           fund_cursor: Optional[str] = None,
                           account_cursor: Optional[str] = None,
                           include_charts: bool = True,
-                          selection_source: Optional[str] = None) -> Dict:
-        """Get complete dashboard data with all tables and charts."""
+                          selection_source: Optional[str] = None,
+                          max_points: Optional[int] = None,
+                          sort: str = "total_balance",
+                          use_cache: bool = True) -> Dict:
+        """Get complete dashboard data with all tables and charts.
+        
+        Responses are kept in the process-wide LRU cache, keyed by the
+        normalized request and invalidated when a new balance date lands.
+        Callers that cache the encoded response themselves pass
+        use_cache=False, so each response is stored once.
+        With max_points, chart series are downsampled (LTTB) to at most that
+        many points; the downsampled response is what gets cached.
+        With page_size, each table is paged with a keyset cursor in the given
+        sort order (see services/page_snapshots.py).
+        """
+        ref_date = date or self._get_latest_date()
         
-        # Build filter conditions
-        filters = self._build_filters(client_ids, fund_names, account_ids, text_filters)
+        self.record_access(client_ids, fund_names, account_ids, text_filters, selection_source)
         
-        # Get the reference date
+        # Shared with the v1 endpoints: the latest balance date plus load sequence
+        generation = get_data_version(self.db_path).token
+        self.response_cache.set_generation(generation)
+        self.page_snapshots.set_generation(generation)
+        cache_key = self._response_cache_key(
+            client_ids, fund_names, account_ids, ref_date, text_filters, page_size,
+            client_cursor, fund_cursor, account_cursor, include_charts, selection_source, max_points,
+            sort
+        )
+        cached = self.response_cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            return self._with_filters_applied(cached, client_ids, fund_names, account_ids, text_filters)
+        
+        result = self._build_dashboard_data(
+            client_ids, fund_names, account_ids, ref_date, text_filters, page_size,
+            client_cursor, fund_cursor, account_cursor, include_charts, selection_source, sort
+        )
+        if max_points and "charts" in result:
+            result["charts"] = downsample_charts(result["charts"], max_points, "date", "balance")
+        if use_cache:
+            self.response_cache.set(cache_key, result)
+        return result
+    
+    def get_dashboard_views(self, views: List[str],
+                            client_ids: Optional[List[str]] = None,
+                            fund_names: Optional[List[str]] = None,
+                            account_ids: Optional[List[str]] = None,
+                            date: Optional[str] = None,
+                            text_filters: Optional[Dict[str, str]] = None,
+                            include_charts: bool = True,
+                            max_points: Optional[int] = None,
+                            use_cache: bool = True) -> Dict:
+        """Intersection plus selection_source variants of one filter set, in one response.
+        
+        The result is the intersection response with a "views" entry holding,
+        for each requested selection_source, the one table that differs from
+        the intersection (its source table listing every item). KPIs, charts
+        and the other tables are identical across variants and sent once.
+        All views come from one shared scan, or from the warm cache when every
+        one of them is warmed.
+        """
+        views = [source for source in SELECTION_SOURCES if source in views]
         ref_date = date or self._get_latest_date()
         
+        for source in [None] + views:
+            self.record_access(client_ids, fund_names, account_ids, text_filters, source)
+        
+        self.response_cache.set_generation(get_data_version(self.db_path).token)
+        cache_key = ("views", tuple(views)) + self._response_cache_key(
+            client_ids, fund_names, account_ids, ref_date, text_filters, None,
+            None, None, None, include_charts, None, max_points
+        )
+        cached = self.response_cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            return self._with_filters_applied(cached, client_ids, fund_names, account_ids, text_filters)
+        
+        filters = self._build_filters(client_ids, fund_names, account_ids, text_filters)
+        payloads = self._get_warm_views(client_ids, fund_names, account_ids, text_filters, views, ref_date)
+        if payloads is not None:
+            cache_timestamp = payloads[None][1]
+            payloads = {source: payload for source, (payload, _) in payloads.items()}
+        else:
+            cache_timestamp = None
+            snapshots, charts = self._compute_snapshots(filters, ref_date,
+                                                        (None,) + tuple(views), include_charts)
+            intersection = snapshots[None]
+            payloads = {None: {
+                "client_balances": intersection.client_balances(),
+                "fund_balances": intersection.fund_balances(),
+                "account_details": intersection.account_details(),
+                "kpi_metrics": intersection.kpi_metrics(),
+                "charts": charts
+            }}
+            for source in views:
+                table = SOURCE_TABLES[source]
+                payloads[source] = {table: getattr(snapshots[source], table)()}
+        
+        payload = payloads[None]
+        result = {
+            "metadata": {
+                "as_of_date": ref_date,
+                "filters_applied": {
+                    "client_ids": client_ids,
+                    "fund_names": fund_names,
+                    "account_ids": account_ids,
+                    "text_filters": text_filters
+                },
+                "views": views
+            },
+            "client_balances": payload["client_balances"],
+            "fund_balances": payload["fund_balances"],
+            "account_details": payload["account_details"],
+            "kpi_metrics": payload["kpi_metrics"],
+            "views": {
+                source: {SOURCE_TABLES[source]: payloads[source][SOURCE_TABLES[source]]}
+                for source in views
+            }
+        }
+        if cache_timestamp is not None:
+            result["metadata"]["from_cache"] = True
+            result["metadata"]["cache_timestamp"] = cache_timestamp
+        if include_charts:
+            result["charts"] = payload["charts"]
+            if max_points:
+                result["charts"] = downsample_charts(result["charts"], max_points, "date", "balance")
+        
+        if use_cache:
+            self.response_cache.set(cache_key, result)
+        return result
+    
+    def _get_warm_views(self, client_ids, fund_names, account_ids, text_filters,
+                        views: List[str], ref_date: str) -> Optional[Dict]:
+        """Warm payloads and timestamps for the intersection and every view, or None if any is missing."""
+        warm = {}
+        for source in [None] + views:
+            cached = self._get_warm_dashboard(
+                canonical_filters(client_ids, fund_names, account_ids, text_filters, source), ref_date
+            )
+            if cached is None:
+                return None
+            warm[source] = cached
+        return warm
+    
+    def _build_dashboard_data(self, client_ids: Optional[List[str]],
+                              fund_names: Optional[List[str]],
+                              account_ids: Optional[List[str]],
+                              ref_date: str,
+                              text_filters: Optional[Dict[str, str]],
+                              page_size: Optional[int],
+                              client_cursor: Optional[str],
+                              fund_cursor: Optional[str],
+                              account_cursor: Optional[str],
+                              include_charts: bool,
+                              selection_source: Optional[str],
+                              sort: str = "total_balance") -> Dict:
+        """Compute the dashboard response for a reference date."""
+        # Build filter conditions
+        filters = self._build_filters(client_ids, fund_names, account_ids, text_filters)
+        
         # Check if we can use cached data for overview (no filters, no pagination)
         use_cache = (not client_ids and not fund_names and not account_ids and 
                     not text_filters and not page_size)
         
-        if use_cache and self.cache_repo.is_cache_valid(ref_date):
+        if use_cache and self._cache_reader.is_cache_valid(ref_date):
             logger.info(f"Using cached data for date: {ref_date}")
             return self._get_cached_dashboard_data(ref_date, include_charts)
         
-        # Get all component data with pagination support
+        filter_spec = canonical_filters(client_ids, fund_names, account_ids, text_filters, selection_source)
+        load_payload = lambda: self._get_dashboard_payload(
+            filter_spec, filters, ref_date, selection_source, include_charts
+        )
         pagination_info = {}
-        
-        # Pass selection_source to all methods and let each method decide 
-        # whether to exclude its own filters for Tableau-like behavior
-        
         if page_size:
-            # Paginated responses
-            client_data, client_pagination = self._get_client_balances_with_metrics_paginated(
-                filters, ref_date, page_size, client_cursor, selection_source
+            # Tables are sorted once per filter set and date; every page of
+            # them is then a bisect on the cursor
+            snapshot = self._get_page_snapshot(filter_spec, ref_date, include_charts, load_payload)
+            payload, cache_timestamp = snapshot.payload, snapshot.cache_timestamp
+            client_data, pagination_info["client_balances"] = self._paginate(
+                snapshot, "client_balances", sort, page_size, client_cursor
             )
-            fund_data, fund_pagination = self._get_fund_balances_with_metrics_paginated(
-                filters, ref_date, page_size, fund_cursor, selection_source
+            fund_data, pagination_info["fund_balances"] = self._paginate(
+                snapshot, "fund_balances", sort, page_size, fund_cursor
             )
-            account_data, account_pagination = self._get_account_details_with_metrics_paginated(
-                filters, ref_date, page_size, account_cursor, selection_source
+            account_data, pagination_info["account_details"] = self._paginate(
+                snapshot, "account_details", sort, page_size, account_cursor
             )
-            
-            # Store pagination info
-            if client_pagination:
-                pagination_info["client_balances"] = client_pagination
-            if fund_pagination:
-                pagination_info["fund_balances"] = fund_pagination
-            if account_pagination:
-                pagination_info["account_details"] = account_pagination
         else:
-            # Regular responses
-            client_data = self._get_client_balances_with_metrics(filters, ref_date, selection_source)
-            fund_data = self._get_fund_balances_with_metrics(filters, ref_date, selection_source)
-            account_data = self._get_account_details_with_metrics(filters, ref_date, selection_source)
+            payload, cache_timestamp = load_payload()
+            client_data = payload["client_balances"]
+            fund_data = payload["fund_balances"]
+            account_data = payload["account_details"]
         
         result = {
             "metadata": {
@@ -97,22 +297,230 @@ class DashboardService:
             "client_balances": client_data,
             "fund_balances": fund_data,
             "account_details": account_data,
-            "kpi_metrics": self._calculate_kpi_metrics(filters, ref_date)
+            "kpi_metrics": payload["kpi_metrics"]
         }
+        if cache_timestamp is not None:
+            result["metadata"]["from_cache"] = True
+            result["metadata"]["cache_timestamp"] = cache_timestamp
         
         # Only include charts if requested (default true for backward compatibility)
         # When paginating, charts are typically excluded to reduce payload size
         if include_charts:
-            result["charts"] = {
-                "recent_history": self._get_chart_history(filters, ref_date, days=90),
-                "long_term_history": self._get_chart_history(filters, ref_date, days=1095)
-            }
+            result["charts"] = payload["charts"]
         
         if pagination_info:
             result["pagination"] = pagination_info
         
         return result
     
+    def get_account_window(self, client_ids: Optional[List[str]] = None,
+                           fund_names: Optional[List[str]] = None,
+                           account_ids: Optional[List[str]] = None,
+                           date: Optional[str] = None,
+                           text_filters: Optional[Dict[str, str]] = None,
+                           selection_source: Optional[str] = None,
+                           sort: str = "balance",
+                           descending: bool = True,
+                           search: Optional[str] = None,
+                           offset: int = 0,
+                           limit: int = 100) -> Dict:
+        """A window of account rows in server-side sort order, optionally searched.
+        
+        Backs the virtual-scrolling account table: the account table of a
+        filter set and date is built and sorted once (the same snapshot that
+        paginated dashboard requests use), so each window is a slice of it.
+        search matches account IDs and client names.
+        """
+        ref_date = date or self._get_latest_date()
+        
+        generation = get_data_version(self.db_path).token
+        self.response_cache.set_generation(generation)
+        self.page_snapshots.set_generation(generation)
+        filters = self._build_filters(client_ids, fund_names, account_ids, text_filters)
+        filter_spec = canonical_filters(client_ids, fund_names, account_ids, text_filters, selection_source)
+        snapshot = self._get_page_snapshot(filter_spec, ref_date, False, lambda: self._get_dashboard_payload(
+            filter_spec, filters, ref_date, selection_source, False
+        ))
+        rows = snapshot.search("account_details", sort, descending, search or "",
+                               ("account_id", "client_name"))
+        return {
+            "metadata": {
+                "as_of_date": ref_date,
+                "sort": sort,
+                "order": "desc" if descending else "asc",
+                "search": search or None
+            },
+            "total": len(rows),
+            "offset": offset,
+            "limit": limit,
+            "rows": rows[offset:offset + limit]
+        }
+    
+    def _get_page_snapshot(self, filter_spec: Dict, ref_date: str, include_charts: bool,
+                           load_payload) -> PageSnapshot:
+        """Sorted-table snapshot of a filter set and date, loaded on first use."""
+        return self.page_snapshots.get(
+            (self.db_path, filter_hash(filter_spec), ref_date, include_charts),
+            lambda: PageSnapshot(*load_payload())
+        )
+    
+    def _get_dashboard_payload(self, filter_spec: Dict, filters: Dict, ref_date: str,
+                               selection_source: Optional[str],
+                               include_charts: bool) -> Tuple[Dict, Optional[str]]:
+        """Payload precomputed by warm_cache.py (with its timestamp), or computed now."""
+        cached = self._get_warm_dashboard(filter_spec, ref_date)
+        if cached is not None:
+            return cached
+        return self._compute_dashboard_payload(
+            filters, ref_date, selection_source, include_charts
+        ), None
+    
+    def _compute_dashboard_payload(self, filters: Dict, ref_date: str,
+                                   selection_source: Optional[str], include_charts: bool) -> Dict:
+        """Unpaginated tables, KPIs and (optionally) charts for a filter set."""
+        snapshots, charts = self._compute_snapshots(filters, ref_date,
+                                                    (selection_source,), include_charts)
+        snapshot = snapshots[selection_source]
+        payload = {
+            "client_balances": snapshot.client_balances(),
+            "fund_balances": snapshot.fund_balances(),
+            "account_details": snapshot.account_details(),
+            "kpi_metrics": snapshot.kpi_metrics()
+        }
+        if charts is not None:
+            payload["charts"] = charts
+        return payload
+    
+    def _compute_snapshots(self, filters: Dict, ref_date: str,
+                           sources: Tuple[Optional[str], ...],
+                           include_charts: bool) -> Tuple[Dict, Optional[Dict]]:
+        """Snapshots for each selection_source view (None for the intersection), plus charts.
+        
+        The snapshot scan and the two chart histories are independent queries
+        and run concurrently; the cube answers all of them in memory instead.
+        Charts do not depend on selection_source, so every view shares them.
+        """
+        # One scan for all tables and KPIs; selection_source is handled inside
+        # the snapshot so the source table keeps Tableau-like "show all" behavior
+        cube = self._get_cube(ref_date)
+        if cube is not None:
+            snapshot_dates = self._get_snapshot_dates(ref_date)
+            snapshots = {
+                source: cube.snapshot(filters, ref_date, *snapshot_dates, selection_source=source)
+                for source in sources
+            }
+            charts = None
+            if include_charts:
+                charts = {
+                    "recent_history": self._get_chart_history(filters, ref_date, days=90, cube=cube),
+                    "long_term_history": self._get_chart_history(filters, ref_date, days=1095, cube=cube)
+                }
+        else:
+            components = {"snapshots": lambda: self._load_snapshots(filters, ref_date, sources)}
+            if include_charts:
+                use_rollups = self.rollup_repo.is_current()
+                components["recent_history"] = lambda: self._get_chart_history(
+                    filters, ref_date, days=90, use_rollups=use_rollups)
+                components["long_term_history"] = lambda: self._get_chart_history(
+                    filters, ref_date, days=1095, use_rollups=use_rollups)
+            results = run_components(components)
+            snapshots = results["snapshots"]
+            charts = None
+            if include_charts:
+                charts = {
+                    "recent_history": results["recent_history"],
+                    "long_term_history": results["long_term_history"]
+                }
+        return snapshots, charts
+    
+    def build_cache_payload(self, filter_spec: Dict, as_of_date: str) -> Dict:
+        """Full dashboard payload (with charts) for warm_cache.py to store."""
+        filters = self._build_filters(filter_spec["client_ids"], filter_spec["fund_names"],
+                                      filter_spec["account_ids"], filter_spec["text_filters"])
+        return self._compute_dashboard_payload(
+            filters, as_of_date, filter_spec["selection_source"], True
+        )
+    
+    def _get_warm_dashboard(self, filter_spec: Dict, ref_date: str) -> Optional[Tuple[Dict, str]]:
+        """Payload and timestamp precomputed by the cache warmer, if any."""
+        try:
+            row = self._cache_reader.get_cached_dashboard(filter_hash(filter_spec), ref_date)
+        except sqlite3.OperationalError:
+            # cached_dashboard not created yet (migration 3 not applied)
+            return None
+        if row is None:
+            return None
+        return json.loads(row["payload"]), row["created_at"]
+    
+    def record_access(self, client_ids: Optional[List[str]], fund_names: Optional[List[str]],
+                      account_ids: Optional[List[str]], text_filters: Optional[Dict[str, str]],
+                      selection_source: Optional[str]):
+        """Count a filtered request for warm_cache.py's popularity ranking.
+        
+        get_dashboard_data() does this itself; callers that answer a request
+        from their own cache call it directly.
+        """
+        if client_ids or fund_names or account_ids or text_filters:
+            self._log_access(canonical_filters(client_ids, fund_names, account_ids,
+                                               text_filters, selection_source))
+    
+    def _log_access(self, filter_spec: Dict):
+        """Count a request for its filter combination; flushed in batches."""
+        global _access_last_flush
+        key = (filter_hash(filter_spec), datetime.now().strftime("%Y-%m-%d"),
+               json.dumps(filter_spec, sort_keys=True, separators=(",", ":")))
+        with _access_lock:
+            _access_counts[key] += 1
+            due = (sum(_access_counts.values()) >= ACCESS_LOG_FLUSH_EVERY or
+                   time.monotonic() - _access_last_flush >= ACCESS_LOG_FLUSH_SECONDS)
+            if not due:
+                return
+            batch = [key + (hits,) for key, hits in _access_counts.items()]
+            _access_counts.clear()
+            _access_last_flush = time.monotonic()
+        try:
+            self.cache_repo.record_accesses(batch)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not record dashboard access log: {e}")
+    
+    def _response_cache_key(self, client_ids, fund_names, account_ids, ref_date, text_filters,
+                            page_size, client_cursor, fund_cursor, account_cursor,
+                            include_charts, selection_source, max_points=None,
+                            sort="total_balance") -> Tuple:
+        """Canonical cache key: list filters are order- and duplicate-insensitive."""
+        return (
+            self.db_path,
+            tuple(sorted(set(client_ids))) if client_ids else None,
+            tuple(sorted(set(fund_names))) if fund_names else None,
+            tuple(sorted(set(account_ids))) if account_ids else None,
+            ref_date,
+            tuple(sorted(text_filters.items())) if text_filters is not None else None,
+            page_size,
+            client_cursor,
+            fund_cursor,
+            account_cursor,
+            include_charts,
+            selection_source,
+            max_points,
+            sort,
+        )
+    
+    def _with_filters_applied(self, result: Dict, client_ids, fund_names,
+                              account_ids, text_filters) -> Dict:
+        """Shallow copy of a cached response echoing this request's filters."""
+        metadata = result.get("metadata", {})
+        if not metadata.get("filters_applied"):
+            # Unfiltered overview served from the cached_* tables
+            return result
+        result = dict(result)
+        result["metadata"] = dict(metadata, filters_applied={
+            "client_ids": client_ids,
+            "fund_names": fund_names,
+            "account_ids": account_ids,
+            "text_filters": text_filters
+        })
+        return result
+    
     def _build_filters(self, client_ids: Optional[List[str]], 
                       fund_names: Optional[List[str]], 
                       account_ids: Optional[List[str]],
@@ -136,232 +544,112 @@ class DashboardService:
         return filters
     
     def _get_latest_date(self) -> str:
-        """Get the latest date in the database."""
-        sql = "SELECT MAX(balance_date) FROM account_balances"
-        return self._base_repo.execute_scalar(sql)
+        """Get the latest date in the database (cached until the data version changes)."""
+        return get_balance_calendar(self.db_path).latest
     
-    def _get_client_balances_with_metrics(self, filters: Dict, ref_date: str, selection_source: Optional[str] = None) -> List[Dict]:
-        """Get client balances with QTD/YTD metrics."""
-        # Build WHERE clause - exclude client filter if this is the selection source
-        if selection_source == 'client':
-            where_conditions, params = self._build_full_where_clause(filters, exclude_source='client')
-        else:
-            where_conditions, params = self._build_full_where_clause(filters)
-        
-        # Get quarter and year start dates
-        qtd_start, ytd_start = self._get_period_start_dates(ref_date)
-        params.update({
-            "ref_date": ref_date,
-            "qtd_start": qtd_start,
-            "ytd_start": ytd_start
-        })
-        
-        sql = f"""
-        WITH current_balances AS (
-            SELECT 
-                cm.client_id,
-                cm.client_name,
-                SUM(ab.balance) as total_balance
-            FROM account_balances ab
-            JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.balance_date = :ref_date
-            {where_conditions}
-            GROUP BY cm.client_id, cm.client_name
-        ),
-        qtd_start_balances AS (
-            SELECT 
-                cm.client_id,
-                SUM(ab.balance) as start_balance
-            FROM account_balances ab
-            JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.balance_date = :qtd_start
-            {where_conditions}
-            GROUP BY cm.client_id
-        ),
-        ytd_start_balances AS (
-            SELECT 
-                cm.client_id,
-                SUM(ab.balance) as start_balance
-            FROM account_balances ab
-            JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.balance_date = :ytd_start
-            {where_conditions}
-            GROUP BY cm.client_id
-        )
-        SELECT 
-            cb.client_id,
-            cb.client_name,
-            cb.total_balance,
-            CASE 
-                WHEN qsb.start_balance IS NULL OR qsb.start_balance = 0 THEN NULL
-                ELSE ((cb.total_balance - qsb.start_balance) / qsb.start_balance) * 100
-            END as qtd_change,
-            CASE 
-                WHEN ysb.start_balance IS NULL OR ysb.start_balance = 0 THEN NULL
-                ELSE ((cb.total_balance - ysb.start_balance) / ysb.start_balance) * 100
-            END as ytd_change
-        FROM current_balances cb
-        LEFT JOIN qtd_start_balances qsb ON cb.client_id = qsb.client_id
-        LEFT JOIN ytd_start_balances ysb ON cb.client_id = ysb.client_id
-        ORDER BY cb.total_balance DESC
-        """
-        
-        return self._base_repo.execute_query(sql, params)
+    def _get_cube(self, ref_date: str):
+        """The in-memory balance cube, when enabled and holding ref_date."""
+        if not self.use_cube:
+            return None
+        cube = get_cube(self.db_path)
+        if cube is None or not cube.has_date(ref_date):
+            return None
+        return cube
     
-    def _get_fund_balances_with_metrics(self, filters: Dict, ref_date: str, selection_source: Optional[str] = None) -> List[Dict]:
-        """Get fund balances with QTD/YTD metrics."""
-        # Build WHERE clause - exclude fund filter if this is the selection source
-        if selection_source == 'fund':
-            where_conditions, params = self._build_full_where_clause(filters, exclude_source='fund')
-        else:
-            where_conditions, params = self._build_full_where_clause(filters)
+    def _get_snapshot_dates(self, ref_date: str) -> Tuple[str, str, str]:
+        """QTD start, YTD start and 30-days-ago dates for a snapshot."""
+        return quarter_start(ref_date), year_start(ref_date), days_before(ref_date, 30)
+    
+    def _load_snapshots(self, filters: Dict, ref_date: str,
+                        sources: Tuple[Optional[str], ...] = (None,)) -> Dict[Optional[str], BalanceSnapshot]:
+        """Fetch every balance row the tables and KPIs need in a single scan.
+
+        Rows for the reference, QTD start, YTD start and 30-days-ago dates are
+        loaded once; the selection_source filter is left out of the SQL so the
+        source table can still list all items, and is re-applied in memory
+        for the intersection.
+
+        Several views (None for the intersection) share the scan: it keeps
+        rows that fail at most one of the views' source filters, and each
+        view's rows are picked out in memory.
+        """
+        excluded = [source for source in SELECTION_SOURCES
+                    if source in sources and filters.get(SOURCE_FILTERS[source])]
+        where_conditions, params = self._build_full_where_clause(filters, exclude_sources=excluded)
+        if len(excluded) > 1:
+            matches = " + ".join(
+                f"({self._in_condition(source, filters[SOURCE_FILTERS[source]], params)})"
+                for source in excluded
+            )
+            where_conditions += f" AND ({matches}) >= {len(excluded) - 1}"
         
-        # Get quarter and year start dates
-        qtd_start, ytd_start = self._get_period_start_dates(ref_date)
+        qtd_start, ytd_start, days_30_ago = self._get_snapshot_dates(ref_date)
         params.update({
             "ref_date": ref_date,
             "qtd_start": qtd_start,
-            "ytd_start": ytd_start
+            "ytd_start": ytd_start,
+            "days_30_ago": days_30_ago
         })
         
-        # Need to handle JOIN to client_mapping conditionally
-        join_clause = ""
-        if any(key in filters for key in ["client_ids", "client_name_like"]):
-            join_clause = "JOIN client_mapping cm ON ab.account_id = cm.account_id"
-        
         sql = f"""
-        WITH current_balances AS (
-            SELECT 
-                ab.fund_name,
-                SUBSTR(ab.fund_name, 1, 3) as fund_ticker,
-                SUM(ab.balance) as total_balance
-            FROM account_balances ab
-            {join_clause}
-            WHERE ab.balance_date = :ref_date
-            {where_conditions}
-            GROUP BY ab.fund_name
-        ),
-        qtd_start_balances AS (
-            SELECT 
-                ab.fund_name,
-                SUM(ab.balance) as start_balance
-            FROM account_balances ab
-            {join_clause}
-            WHERE ab.balance_date = :qtd_start
-            {where_conditions}
-            GROUP BY ab.fund_name
-        ),
-        ytd_start_balances AS (
-            SELECT 
-                ab.fund_name,
-                SUM(ab.balance) as start_balance
-            FROM account_balances ab
-            {join_clause}
-            WHERE ab.balance_date = :ytd_start
-            {where_conditions}
-            GROUP BY ab.fund_name
-        )
         SELECT 
-            cb.fund_name,
-            cb.fund_ticker,
-            cb.total_balance,
-            CASE 
-                WHEN qsb.start_balance IS NULL OR qsb.start_balance = 0 THEN NULL
-                ELSE ((cb.total_balance - qsb.start_balance) / qsb.start_balance) * 100
-            END as qtd_change,
-            CASE 
-                WHEN ysb.start_balance IS NULL OR ysb.start_balance = 0 THEN NULL
-                ELSE ((cb.total_balance - ysb.start_balance) / ysb.start_balance) * 100
-            END as ytd_change
-        FROM current_balances cb
-        LEFT JOIN qtd_start_balances qsb ON cb.fund_name = qsb.fund_name
-        LEFT JOIN ytd_start_balances ysb ON cb.fund_name = ysb.fund_name
-        ORDER BY cb.total_balance DESC
+            ab.balance_date,
+            ab.account_id,
+            ab.fund_name,
+            ab.balance,
+            cm.client_id,
+            cm.client_name
+        FROM account_balances ab
+        JOIN client_mapping cm ON ab.account_id = cm.account_id
+        WHERE ab.balance_date IN (:ref_date, :qtd_start, :ytd_start, :days_30_ago)
+        {where_conditions}
         """
         
-        return self._base_repo.execute_query(sql, params)
-    
-    def _get_account_details_with_metrics(self, filters: Dict, ref_date: str, selection_source: Optional[str] = None) -> List[Dict]:
-        """Get account details with QTD/YTD metrics."""
-        # Build WHERE clause - exclude account filter if this is the selection source
-        if selection_source == 'account':
-            where_conditions, params = self._build_full_where_clause(filters, exclude_source='account')
-        else:
-            where_conditions, params = self._build_full_where_clause(filters)
+        with self._base_repo.get_connection() as conn:
+            rows = [tuple(row) for row in conn.execute(sql, params)]
         
-        # Get quarter and year start dates
-        qtd_start, ytd_start = self._get_period_start_dates(ref_date)
-        params.update({
-            "ref_date": ref_date,
-            "qtd_start": qtd_start,
-            "ytd_start": ytd_start
-        })
+        allowed = {source: set(filters[SOURCE_FILTERS[source]]) for source in excluded}
+        snapshots = {}
+        for selection_source in sources:
+            exclude_source = selection_source if selection_source in SELECTION_SOURCES else None
+            source_values = filters.get(SOURCE_FILTERS[exclude_source]) if exclude_source else None
+            
+            checks = [(SOURCE_COLUMNS[source], allowed[source]) for source in excluded
+                      if source != exclude_source]
+            view_rows = rows
+            if checks:
+                view_rows = [row for row in rows
+                             if all(row[column] in values for column, values in checks)]
+            
+            snapshots[selection_source] = BalanceSnapshot(
+                view_rows,
+                ref_date, qtd_start, ytd_start, days_30_ago,
+                selection_source=exclude_source,
+                source_values=source_values
+            )
+        return snapshots
+    
+    def _get_chart_history(self, filters: Dict, ref_date: str, days: int,
+                           use_rollups: bool = False, cube=None) -> List[Dict]:
+        """Get historical balance data for charts.
         
-        sql = f"""
-        WITH current_balances AS (
-            SELECT 
-                ab.account_id,
-                cm.client_name,
-                cm.client_id,
-                SUM(ab.balance) as balance
-            FROM account_balances ab
-            JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.balance_date = :ref_date
-            {where_conditions}
-            GROUP BY ab.account_id, cm.client_name, cm.client_id
-            HAVING SUM(ab.balance) > 0
-        ),
-        qtd_start_balances AS (
-            SELECT 
-                ab.account_id,
-                SUM(ab.balance) as start_balance
-            FROM account_balances ab
-            JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.balance_date = :qtd_start
-            {where_conditions}
-            GROUP BY ab.account_id
-        ),
-        ytd_start_balances AS (
-            SELECT 
-                ab.account_id,
-                SUM(ab.balance) as start_balance
-            FROM account_balances ab
-            JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.balance_date = :ytd_start
-            {where_conditions}
-            GROUP BY ab.account_id
-        )
-        SELECT 
-            cb.account_id,
-            cb.client_name,
-            cb.client_id,
-            cb.balance,
-            CASE 
-                WHEN qsb.start_balance IS NULL OR qsb.start_balance = 0 THEN NULL
-                ELSE ((cb.balance - qsb.start_balance) / qsb.start_balance) * 100
-            END as qtd_change,
-            CASE 
-                WHEN ysb.start_balance IS NULL OR ysb.start_balance = 0 THEN NULL
-                ELSE ((cb.balance - ysb.start_balance) / ysb.start_balance) * 100
-            END as ytd_change
-        FROM current_balances cb
-        LEFT JOIN qtd_start_balances qsb ON cb.account_id = qsb.account_id
-        LEFT JOIN ytd_start_balances ysb ON cb.account_id = ysb.account_id
-        ORDER BY cb.balance DESC
+        Served from the in-memory cube when one is loaded, then from the daily
+        rollup tables when they are current and can answer the filters, and
+        otherwise by aggregating account_balances directly.
         """
+        start_date = days_before(ref_date, days)
         
-        return self._base_repo.execute_query(sql, params)
-    
-    def _get_chart_history(self, filters: Dict, ref_date: str, days: int) -> List[Dict]:
-        """Get historical balance data for charts."""
-        where_conditions, params = self._build_full_where_clause(filters)
+        if cube is not None:
+            return cube.history(filters, start_date, ref_date)
         
-        # Calculate start date
-        ref_dt = datetime.strptime(ref_date, "%Y-%m-%d")
-        start_dt = ref_dt - timedelta(days=days)
+        if use_rollups:
+            history = self.rollup_repo.get_history(self._rollup_filters(filters), start_date, ref_date)
+            if history is not None:
+                return history
         
+        where_conditions, params = self._build_full_where_clause(filters)
         params.update({
-            "start_date": start_dt.strftime("%Y-%m-%d"),
+            "start_date": start_date,
             "end_date": ref_date
         })
         
@@ -384,93 +672,33 @@ class DashboardService:
         
         return self._base_repo.execute_query(sql, params)
     
-    def _calculate_kpi_metrics(self, filters: Dict, ref_date: str) -> Dict:
-        """Calculate KPI metrics for the dashboard."""
-        where_conditions, params = self._build_full_where_clause(filters)
-        params["ref_date"] = ref_date
-        
-        # Need conditional JOIN
-        join_clause = ""
-        if any(key in filters for key in ["client_ids", "client_name_like"]):
-            join_clause = "JOIN client_mapping cm ON ab.account_id = cm.account_id"
-        
-        # Calculate 30 days ago
-        ref_dt = datetime.strptime(ref_date, "%Y-%m-%d")
-        days_30_ago = (ref_dt - timedelta(days=30)).strftime("%Y-%m-%d")
-        params["days_30_ago"] = days_30_ago
-        
-        sql = f"""
-        WITH current_metrics AS (
-            SELECT 
-                COUNT(DISTINCT cm.client_id) as active_clients,
-                COUNT(DISTINCT ab.fund_name) as active_funds,
-                COUNT(DISTINCT ab.account_id) as active_accounts,
-                SUM(ab.balance) as total_aum
-            FROM account_balances ab
-            JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.balance_date = :ref_date
-            {where_conditions}
-        ),
-        historical_balance AS (
-            SELECT 
-                SUM(ab.balance) as balance_30d_ago
-            FROM account_balances ab
-            {join_clause}
-            WHERE ab.balance_date = :days_30_ago
-            {where_conditions}
-        )
-        SELECT 
-            cm.active_clients,
-            cm.active_funds,
-            cm.active_accounts,
-            cm.total_aum,
-            hb.balance_30d_ago,
-            CASE 
-                WHEN hb.balance_30d_ago IS NULL OR hb.balance_30d_ago = 0 THEN 0
-                ELSE ((cm.total_aum - hb.balance_30d_ago) / hb.balance_30d_ago) * 100
-            END as change_30d
-        FROM current_metrics cm
-        CROSS JOIN historical_balance hb
-        """
-        
-        results = self._base_repo.execute_query(sql, params)
-        return results[0] if results else {
-            "active_clients": 0,
-            "active_funds": 0,
-            "active_accounts": 0,
-            "total_aum": 0,
-            "balance_30d_ago": 0,
-            "change_30d": 0
+    def _rollup_filters(self, filters: Dict) -> Dict:
+        """Translate service filters to RollupRepository filter keys."""
+        return {
+            "client_ids": filters.get("client_ids"),
+            "client_name_like": filters.get("client_name_like"),
+            "fund_names": filters.get("fund_names"),
+            # The service's fund ticker filter is a prefix match on fund_name
+            "fund_name_like": filters.get("fund_ticker_like"),
+            "account_ids": filters.get("account_ids"),
+            "account_id_like": filters.get("account_id_like"),
         }
     
-    def _build_full_where_clause(self, filters: Dict, exclude_source: Optional[str] = None) -> Tuple[str, Dict]:
+    def _build_full_where_clause(self, filters: Dict, exclude_sources: Iterable[str] = ()) -> Tuple[str, Dict]:
         """Build comprehensive WHERE clause from all filters.
         
         Args:
             filters: Filter conditions
-            exclude_source: If set to 'client', 'fund', or 'account', excludes those specific filters
+            exclude_sources: Any of 'client', 'fund' and 'account'; their list filters are left out
         """
         conditions = []
         params = {}
         
         # Handle list filters with conditional exclusion
-        if filters.get("client_ids") and exclude_source != 'client':
-            placeholders = ", ".join([f":_client_{i}" for i in range(len(filters["client_ids"]))])
-            conditions.append(f"cm.client_id IN ({placeholders})")
-            for i, cid in enumerate(filters["client_ids"]):
-                params[f"_client_{i}"] = cid
-        
-        if filters.get("fund_names") and exclude_source != 'fund':
-            placeholders = ", ".join([f":_fund_{i}" for i in range(len(filters["fund_names"]))])
-            conditions.append(f"ab.fund_name IN ({placeholders})")
-            for i, fname in enumerate(filters["fund_names"]):
-                params[f"_fund_{i}"] = fname
-        
-        if filters.get("account_ids") and exclude_source != 'account':
-            placeholders = ", ".join([f":_account_{i}" for i in range(len(filters["account_ids"]))])
-            conditions.append(f"ab.account_id IN ({placeholders})")
-            for i, aid in enumerate(filters["account_ids"]):
-                params[f"_account_{i}"] = aid
+        for source in SELECTION_SOURCES:
+            values = filters.get(SOURCE_FILTERS[source])
+            if values and source not in exclude_sources:
+                conditions.append(self._in_condition(source, values, params))
         
         # Handle text filters
         if filters.get("client_name_like"):
@@ -488,18 +716,13 @@ class DashboardService:
         where_clause = " AND " + " AND ".join(conditions) if conditions else ""
         return where_clause, params
     
-    def _get_period_start_dates(self, ref_date: str) -> Tuple[str, str]:
-        """Get quarter and year start dates for a reference date."""
-        ref_dt = datetime.strptime(ref_date, "%Y-%m-%d")
-        
-        # Quarter start
-        quarter = (ref_dt.month - 1) // 3
-        qtd_start = datetime(ref_dt.year, quarter * 3 + 1, 1)
-        
-        # Year start
-        ytd_start = datetime(ref_dt.year, 1, 1)
-        
-        return qtd_start.strftime("%Y-%m-%d"), ytd_start.strftime("%Y-%m-%d")
+    def _in_condition(self, source: str, values: List[str], params: Dict) -> str:
+        """IN condition for a client/fund/account list filter; adds its params."""
+        column = {"client": "cm.client_id", "fund": "ab.fund_name", "account": "ab.account_id"}[source]
+        for i, value in enumerate(values):
+            params[f"_{source}_{i}"] = value
+        placeholders = ", ".join(f":_{source}_{i}" for i in range(len(values)))
+        return f"{column} IN ({placeholders})"
     
     def _encode_cursor(self, *values) -> str:
         """Encode cursor values to base64 string."""
@@ -514,334 +737,52 @@ class DashboardService:
         except:
             return None
     
-    def _get_client_balances_with_metrics_paginated(self, filters: Dict, ref_date: str, 
-                                                   page_size: int, cursor: Optional[str], selection_source: Optional[str] = None) -> Tuple[List[Dict], Dict]:
-        """Get client balances with QTD/YTD metrics and pagination."""
-        # Decode cursor if provided
-        last_values = self._decode_cursor(cursor) if cursor else None
-        
-        # Build WHERE clause - exclude client filter if this is the selection source
-        if selection_source == 'client':
-            where_conditions, params = self._build_full_where_clause(filters, exclude_source='client')
-        else:
-            where_conditions, params = self._build_full_where_clause(filters)
-        
-        # Add cursor condition if provided
-        cursor_condition = ""
-        if last_values and len(last_values) >= 2:
-            cursor_condition = """
-            AND (cb.client_name > :last_client_name OR 
-                 (cb.client_name = :last_client_name AND cb.client_id > :last_client_id))
-            """
-            params["last_client_name"] = last_values[0]
-            params["last_client_id"] = last_values[1]
-        
-        # Get quarter and year start dates
-        qtd_start, ytd_start = self._get_period_start_dates(ref_date)
-        params.update({
-            "ref_date": ref_date,
-            "qtd_start": qtd_start,
-            "ytd_start": ytd_start,
-            "page_size": page_size + 1  # Get one extra to check if there are more
-        })
-        
-        sql = f"""
-        WITH current_balances AS (
-            SELECT 
-                cm.client_id,
-                cm.client_name,
-                SUM(ab.balance) as total_balance
-            FROM account_balances ab
-            JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.balance_date = :ref_date
-            {where_conditions}
-            GROUP BY cm.client_id, cm.client_name
-        ),
-        qtd_start_balances AS (
-            SELECT 
-                cm.client_id,
-                SUM(ab.balance) as start_balance
-            FROM account_balances ab
-            JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.balance_date = :qtd_start
-            {where_conditions}
-            GROUP BY cm.client_id
-        ),
-        ytd_start_balances AS (
-            SELECT 
-                cm.client_id,
-                SUM(ab.balance) as start_balance
-            FROM account_balances ab
-            JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.balance_date = :ytd_start
-            {where_conditions}
-            GROUP BY cm.client_id
-        )
-        SELECT 
-            cb.client_id,
-            cb.client_name,
-            cb.total_balance,
-            CASE 
-                WHEN qsb.start_balance IS NULL OR qsb.start_balance = 0 THEN NULL
-                ELSE ((cb.total_balance - qsb.start_balance) / qsb.start_balance) * 100
-            END as qtd_change,
-            CASE 
-                WHEN ysb.start_balance IS NULL OR ysb.start_balance = 0 THEN NULL
-                ELSE ((cb.total_balance - ysb.start_balance) / ysb.start_balance) * 100
-            END as ytd_change
-        FROM current_balances cb
-        LEFT JOIN qtd_start_balances qsb ON cb.client_id = qsb.client_id
-        LEFT JOIN ytd_start_balances ysb ON cb.client_id = ysb.client_id
-        WHERE 1=1 {cursor_condition}
-        ORDER BY cb.total_balance DESC, cb.client_id
-        LIMIT :page_size
-        """
-        
-        results = self._base_repo.execute_query(sql, params)
-        
-        # Check if there are more results
-        has_more = len(results) > page_size
-        if has_more:
-            results = results[:page_size]  # Remove the extra result
-        
-        # Generate next cursor if there are more results
-        next_cursor = None
-        if has_more and results:
-            last_result = results[-1]
-            next_cursor = self._encode_cursor(last_result["client_name"], last_result["client_id"])
-        
-        pagination = {
-            "has_more": has_more,
-            "page_size": page_size
-        }
-        if next_cursor:
-            pagination["next_cursor"] = next_cursor
-        
-        return results, pagination
-    
-    def _get_fund_balances_with_metrics_paginated(self, filters: Dict, ref_date: str, 
-                                                 page_size: int, cursor: Optional[str], selection_source: Optional[str] = None) -> Tuple[List[Dict], Dict]:
-        """Get fund balances with QTD/YTD metrics and pagination."""
-        # Decode cursor if provided
-        last_fund_name = self._decode_cursor(cursor)[0] if cursor else None
-        
-        # Build WHERE clause - exclude fund filter if this is the selection source
-        if selection_source == 'fund':
-            where_conditions, params = self._build_full_where_clause(filters, exclude_source='fund')
-        else:
-            where_conditions, params = self._build_full_where_clause(filters)
-        
-        # Add cursor condition if provided
-        cursor_condition = ""
-        if last_fund_name:
-            cursor_condition = "AND cb.fund_name > :last_fund_name"
-            params["last_fund_name"] = last_fund_name
-        
-        # Get quarter and year start dates
-        qtd_start, ytd_start = self._get_period_start_dates(ref_date)
-        params.update({
-            "ref_date": ref_date,
-            "qtd_start": qtd_start,
-            "ytd_start": ytd_start,
-            "page_size": page_size + 1
-        })
-        
-        # Need to handle JOIN to client_mapping conditionally
-        join_clause = ""
-        if any(key in filters for key in ["client_ids", "client_name_like"]):
-            join_clause = "JOIN client_mapping cm ON ab.account_id = cm.account_id"
-        
-        sql = f"""
-        WITH current_balances AS (
-            SELECT 
-                ab.fund_name,
-                SUBSTR(ab.fund_name, 1, 3) as fund_ticker,
-                SUM(ab.balance) as total_balance
-            FROM account_balances ab
-            {join_clause}
-            WHERE ab.balance_date = :ref_date
-            {where_conditions}
-            GROUP BY ab.fund_name
-        ),
-        qtd_start_balances AS (
-            SELECT 
-                ab.fund_name,
-                SUM(ab.balance) as start_balance
-            FROM account_balances ab
-            {join_clause}
-            WHERE ab.balance_date = :qtd_start
-            {where_conditions}
-            GROUP BY ab.fund_name
-        ),
-        ytd_start_balances AS (
-            SELECT 
-                ab.fund_name,
-                SUM(ab.balance) as start_balance
-            FROM account_balances ab
-            {join_clause}
-            WHERE ab.balance_date = :ytd_start
-            {where_conditions}
-            GROUP BY ab.fund_name
-        )
-        SELECT 
-            cb.fund_name,
-            cb.fund_ticker,
-            cb.total_balance,
-            CASE 
-                WHEN qsb.start_balance IS NULL OR qsb.start_balance = 0 THEN NULL
-                ELSE ((cb.total_balance - qsb.start_balance) / qsb.start_balance) * 100
-            END as qtd_change,
-            CASE 
-                WHEN ysb.start_balance IS NULL OR ysb.start_balance = 0 THEN NULL
-                ELSE ((cb.total_balance - ysb.start_balance) / ysb.start_balance) * 100
-            END as ytd_change
-        FROM current_balances cb
-        LEFT JOIN qtd_start_balances qsb ON cb.fund_name = qsb.fund_name
-        LEFT JOIN ytd_start_balances ysb ON cb.fund_name = ysb.fund_name
-        WHERE 1=1 {cursor_condition}
-        ORDER BY cb.total_balance DESC, cb.fund_name
-        LIMIT :page_size
-        """
-        
-        results = self._base_repo.execute_query(sql, params)
-        
-        # Check if there are more results
-        has_more = len(results) > page_size
-        if has_more:
-            results = results[:page_size]
-        
-        # Generate next cursor
-        next_cursor = None
-        if has_more and results:
-            next_cursor = self._encode_cursor(results[-1]["fund_name"])
+    def _paginate(self, snapshot: PageSnapshot, table: str, sort: str, page_size: int,
+                  cursor: Optional[str]) -> Tuple[List[Dict], Dict]:
+        """One page of a snapshot table after a keyset cursor of its sort fields."""
+        sorted_table = snapshot.table(table, sort)
+        after = self._decode_cursor(cursor) if cursor else None
+        results, has_more = sorted_table.page(after, page_size)
         
         pagination = {
             "has_more": has_more,
-            "page_size": page_size
+            "page_size": page_size,
+            "sort": sort
         }
-        if next_cursor:
-            pagination["next_cursor"] = next_cursor
-        
-        return results, pagination
-    
-    def _get_account_details_with_metrics_paginated(self, filters: Dict, ref_date: str, 
-                                                   page_size: int, cursor: Optional[str], selection_source: Optional[str] = None) -> Tuple[List[Dict], Dict]:
-        """Get account details with QTD/YTD metrics and pagination."""
-        # Decode cursor if provided
-        last_account_id = self._decode_cursor(cursor)[0] if cursor else None
-        
-        # Build WHERE clause - exclude account filter if this is the selection source
-        if selection_source == 'account':
-            where_conditions, params = self._build_full_where_clause(filters, exclude_source='account')
-        else:
-            where_conditions, params = self._build_full_where_clause(filters)
-        
-        # Add cursor condition if provided
-        cursor_condition = ""
-        if last_account_id:
-            cursor_condition = "AND cb.account_id > :last_account_id"
-            params["last_account_id"] = last_account_id
-        
-        # Get quarter and year start dates
-        qtd_start, ytd_start = self._get_period_start_dates(ref_date)
-        params.update({
-            "ref_date": ref_date,
-            "qtd_start": qtd_start,
-            "ytd_start": ytd_start,
-            "page_size": page_size + 1
-        })
-        
-        sql = f"""
-        WITH current_balances AS (
-            SELECT 
-                ab.account_id,
-                cm.client_name,
-                cm.client_id,
-                SUM(ab.balance) as balance
-            FROM account_balances ab
-            JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.balance_date = :ref_date
-            {where_conditions}
-            GROUP BY ab.account_id, cm.client_name, cm.client_id
-            HAVING SUM(ab.balance) > 0
-        ),
-        qtd_start_balances AS (
-            SELECT 
-                ab.account_id,
-                SUM(ab.balance) as start_balance
-            FROM account_balances ab
-            JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.balance_date = :qtd_start
-            {where_conditions}
-            GROUP BY ab.account_id
-        ),
-        ytd_start_balances AS (
-            SELECT 
-                ab.account_id,
-                SUM(ab.balance) as start_balance
-            FROM account_balances ab
-            JOIN client_mapping cm ON ab.account_id = cm.account_id
-            WHERE ab.balance_date = :ytd_start
-            {where_conditions}
-            GROUP BY ab.account_id
-        )
-        SELECT 
-            cb.account_id,
-            cb.client_name,
-            cb.client_id,
-            cb.balance,
-            CASE 
-                WHEN qsb.start_balance IS NULL OR qsb.start_balance = 0 THEN NULL
-                ELSE ((cb.balance - qsb.start_balance) / qsb.start_balance) * 100
-            END as qtd_change,
-            CASE 
-                WHEN ysb.start_balance IS NULL OR ysb.start_balance = 0 THEN NULL
-                ELSE ((cb.balance - ysb.start_balance) / ysb.start_balance) * 100
-            END as ytd_change
-        FROM current_balances cb
-        LEFT JOIN qtd_start_balances qsb ON cb.account_id = qsb.account_id
-        LEFT JOIN ytd_start_balances ysb ON cb.account_id = ysb.account_id
-        WHERE 1=1 {cursor_condition}
-        ORDER BY cb.balance DESC, cb.account_id
-        LIMIT :page_size
-        """
-        
-        results = self._base_repo.execute_query(sql, params)
-        
-        # Check if there are more results
-        has_more = len(results) > page_size
-        if has_more:
-            results = results[:page_size]
-        
-        # Generate next cursor
-        next_cursor = None
         if has_more and results:
-            next_cursor = self._encode_cursor(results[-1]["account_id"])
-        
-        pagination = {
-            "has_more": has_more,
-            "page_size": page_size
-        }
-        if next_cursor:
-            pagination["next_cursor"] = next_cursor
+            pagination["next_cursor"] = self._encode_cursor(
+                *(results[-1][field] for field in sorted_table.fields)
+            )
         
         return results, pagination
     
     def _get_cached_dashboard_data(self, ref_date: str, include_charts: bool) -> Dict:
-        """Get dashboard data from cache."""
-        # Get cached overview for KPIs
-        overview = self.cache_repo.get_cached_overview(ref_date)
+        """Get dashboard data from cache, reading the cached_* tables concurrently."""
+        reader = self._cache_reader
+        components = {
+            "account_details": lambda: reader.get_cached_account_details(ref_date),
+            "client_balances": lambda: reader.get_cached_client_balances(ref_date),
+            "fund_balances": lambda: reader.get_cached_fund_balances(ref_date),
+            "overview": lambda: reader.get_cached_overview(ref_date),
+            "cache_timestamp": lambda: reader.get_cache_timestamp(ref_date),
+        }
+        if include_charts:
+            components["recent_history"] = lambda: reader.get_cached_chart_data("chart_90d", ref_date)
+            components["long_term_history"] = lambda: reader.get_cached_chart_data("chart_3y", ref_date)
+        cached = run_components(components)
+        # Cached overview for KPIs
+        overview = cached["overview"]
         
         result = {
             "metadata": {
                 "as_of_date": ref_date,
                 "filters_applied": {},
                 "from_cache": True,
-                "cache_timestamp": self.cache_repo.get_cache_timestamp(ref_date)
+                "cache_timestamp": cached["cache_timestamp"]
             },
-            "client_balances": self.cache_repo.get_cached_client_balances(ref_date),
-            "fund_balances": self.cache_repo.get_cached_fund_balances(ref_date),
-            "account_details": self.cache_repo.get_cached_account_details(ref_date),
+            "client_balances": cached["client_balances"],
+            "fund_balances": cached["fund_balances"],
+            "account_details": cached["account_details"],
             "kpi_metrics": {
                 "active_clients": overview["total_clients"],
                 "active_funds": overview["total_funds"],
@@ -854,8 +795,8 @@ class DashboardService:
         
         if include_charts:
             result["charts"] = {
-                "recent_history": self.cache_repo.get_cached_chart_data("chart_90d", ref_date),
-                "long_term_history": self.cache_repo.get_cached_chart_data("chart_3y", ref_date)
+                "recent_history": cached["recent_history"],
+                "long_term_history": cached["long_term_history"]
             }
         
         return result
@@ -0,0 +1,71 @@
+"""Cheap data version for HTTP validators (ETag / Last-Modified).
+
+The version is the latest balance date plus the last data load sequence
+number. It is read with one small query and then held in memory for
+DATA_VERSION_TTL seconds, so conditional requests inside that window are
+answered without touching the database. Loaders in this process call
+invalidate_data_version() after committing.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+import hashlib
+import os
+import threading
+import time
+
+from repositories.data_load_repository import DataLoadRepository
+
+DATA_VERSION_TTL = float(os.environ.get("DATA_VERSION_TTL", "5"))
+
+_versions: Dict[str, Tuple[float, "DataVersion"]] = {}
+_lock = threading.Lock()
+
+
+class DataVersion:
+    """Identity of the loaded data at one point in time."""
+
+    def __init__(self, latest_date: Optional[str], load_id: Optional[int], loaded_at: Optional[str]):
+        self.latest_date = latest_date
+        self.load_id = load_id
+        self.loaded_at = loaded_at
+
+    @property
+    def token(self) -> str:
+        return f"{self.latest_date}:{self.load_id}"
+
+    @property
+    def last_modified(self) -> Optional[datetime]:
+        """When the data last changed (UTC): the last load, else the latest date."""
+        if self.loaded_at:
+            return datetime.strptime(self.loaded_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+        if self.latest_date:
+            return datetime.strptime(self.latest_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        return None
+
+    def etag(self, *parts) -> str:
+        """Validator for a response derived from this version and the given request parts."""
+        digest = hashlib.sha256(repr((self.token,) + parts).encode("utf-8")).hexdigest()
+        return digest[:32]
+
+
+def get_data_version(db_path: str = "client_exploration.db") -> DataVersion:
+    """Current data version, re-read from the database at most every DATA_VERSION_TTL seconds."""
+    now = time.monotonic()
+    with _lock:
+        cached = _versions.get(db_path)
+    if cached is not None and now - cached[0] < DATA_VERSION_TTL:
+        return cached[1]
+    row = DataLoadRepository(db_path).get_data_version()
+    version = DataVersion(row["latest_date"], row["load_id"], row["loaded_at"])
+    with _lock:
+        _versions[db_path] = (now, version)
+    return version
+
+
+def invalidate_data_version(db_path: Optional[str] = None):
+    """Forget cached versions (all databases when db_path is None)."""
+    with _lock:
+        if db_path is None:
+            _versions.clear()
+        else:
+            _versions.pop(db_path, None)
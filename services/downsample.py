@@ -0,0 +1,70 @@
+"""Chart history downsampling.
+
+Largest-Triangle-Three-Buckets (Steinarsson, 2013) reduces a time series to
+a fixed number of points that keeps its visual shape: the first and last
+points are kept, the rest is split into equal buckets and from each bucket
+the point forming the largest triangle with the previously kept point and
+the next bucket's average is chosen, so peaks and troughs survive.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from services.chart_format import HISTORY_KEYS
+
+MIN_POINTS = 3
+MAX_POINTS = 10000
+
+
+def lttb(points: List[Dict], max_points: int, date_key: str, balance_key: str) -> List[Dict]:
+    """Downsample date-ordered history rows to at most max_points rows."""
+    count = len(points)
+    if max_points < MIN_POINTS or count <= max_points:
+        return points
+
+    # Dates as day ordinals so uneven gaps (weekends, holidays) weigh correctly
+    xs = [datetime.strptime(p[date_key], "%Y-%m-%d").toordinal() for p in points]
+    ys = [p[balance_key] or 0 for p in points]
+
+    sampled = [points[0]]
+    bucket_size = (count - 2) / (max_points - 2)
+    a = 0
+    for i in range(max_points - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket (the last point for the final bucket)
+        next_start = end
+        next_end = min(int((i + 2) * bucket_size) + 1, count)
+        if next_start >= next_end:
+            next_start, next_end = count - 1, count
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def downsample_charts(container: Dict, max_points: Optional[int],
+                      date_key: str, balance_key: str) -> Dict:
+    """Return container with its history series reduced to max_points.
+
+    container is a response dict (v1) or its "charts" dict (v2); it is
+    copied, not modified, since it may be shared with a cache.
+    """
+    if not max_points or not container:
+        return container
+    sampled = dict(container)
+    for key in HISTORY_KEYS:
+        if isinstance(sampled.get(key), list):
+            sampled[key] = lttb(sampled[key], max_points, date_key, balance_key)
+    return sampled
@@ -0,0 +1,94 @@
+"""Incremental JSON encoding for large API responses.
+
+Instead of serializing a whole response into one string, the encoder walks
+the top-level object and emits the JSON piece by piece: lists and row
+iterators (for example a SQLite cursor wrapped in iter_rows) are encoded a
+batch of rows at a time, so the first bytes can be sent while later rows are
+still being fetched and the full body is never held in memory at once.
+
+orjson is used when installed (pip install orjson); otherwise the standard
+library json module.
+"""
+from collections.abc import Iterator
+from itertools import islice
+from typing import Iterator as IteratorType
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+# Stream JSON responses unless the request says otherwise (?stream=0)
+JSON_STREAM_DEFAULT = os.environ.get("JSON_STREAM", "0").lower() in ("1", "true", "yes", "on")
+# Rows encoded per chunk, and bytes buffered before a chunk is sent
+STREAM_BATCH_ROWS = int(os.environ.get("JSON_STREAM_BATCH_ROWS", "500"))
+STREAM_FLUSH_BYTES = int(os.environ.get("JSON_STREAM_FLUSH_BYTES", str(64 * 1024)))
+
+
+def serializer_backend() -> str:
+    """Name of the JSON encoder in use."""
+    return "orjson" if orjson is not None else "json"
+
+
+def dumps(obj) -> bytes:
+    """Compact JSON encoding of obj as UTF-8 bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def iter_rows(cursor, batch_rows: int = STREAM_BATCH_ROWS) -> IteratorType[dict]:
+    """Yield a cursor's rows as dicts, fetching batch_rows at a time."""
+    while True:
+        rows = cursor.fetchmany(batch_rows)
+        if not rows:
+            return
+        for row in rows:
+            yield dict(row)
+
+
+def _encode(obj, batch_rows: int) -> IteratorType[bytes]:
+    if isinstance(obj, dict):
+        yield b"{"
+        for i, (key, value) in enumerate(obj.items()):
+            yield (b"," if i else b"") + dumps(str(key)) + b":"
+            yield from _encode(value, batch_rows)
+        yield b"}"
+    elif isinstance(obj, (list, tuple, Iterator)):
+        items = iter(obj)
+        yield b"["
+        first = True
+        while True:
+            batch = list(islice(items, batch_rows))
+            if not batch:
+                break
+            # Encode the batch as an array and splice its elements in
+            yield (b"" if first else b",") + dumps(batch)[1:-1]
+            first = False
+        yield b"]"
+    else:
+        yield dumps(obj)
+
+
+def iter_json(obj, batch_rows: int = STREAM_BATCH_ROWS,
+              flush_bytes: int = STREAM_FLUSH_BYTES) -> IteratorType[bytes]:
+    """Encode obj as a stream of JSON chunks.
+
+    Dict values are encoded in order; lists, tuples and iterators become
+    arrays encoded batch_rows elements at a time. The first piece is sent
+    immediately and later pieces are coalesced into chunks of about
+    flush_bytes.
+    """
+    buffer = bytearray()
+    first = True
+    for piece in _encode(obj, batch_rows):
+        buffer += piece
+        if first or len(buffer) >= flush_bytes:
+            yield bytes(buffer)
+            buffer.clear()
+            first = False
+    if buffer:
+        yield bytes(buffer)
+
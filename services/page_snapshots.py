@@ -0,0 +1,201 @@
+"""Sorted dashboard tables for keyset pagination and windowed account reads.
+
+The first page of a filter set and date sorts its client, fund and account
+tables once, precomputing each row's sort key, and keeps them in a small
+in-process LRU with a TTL. Later pages bisect the keys for the cursor, so
+page N is a lookup instead of recomputing and re-sorting every row.
+/api/v2/accounts slices windows out of the same snapshots, sorted on any
+account column and optionally searched.
+Snapshots belong to a data version and are dropped when new data lands.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import bisect
+import os
+import threading
+import time
+
+PAGE_SNAPSHOT_SIZE = int(os.environ.get("PAGE_SNAPSHOT_SIZE", "32"))
+PAGE_SNAPSHOT_TTL = float(os.environ.get("PAGE_SNAPSHOT_TTL", "300"))
+
+# Cursor fields of each table per sort order; "total_balance" sorts by the
+# balance descending, "name" by the name ascending, both tie-broken by the id
+TABLE_SORTS = {
+    "client_balances": {"total_balance": ("total_balance", "client_id"),
+                        "name": ("client_name", "client_id")},
+    "fund_balances": {"total_balance": ("total_balance", "fund_name"),
+                      "name": ("fund_name",)},
+    "account_details": {"total_balance": ("balance", "account_id"),
+                        "name": ("account_id",)},
+}
+SORT_ORDERS = ("total_balance", "name")
+
+# Columns /api/v2/accounts windows can be sorted by, either direction
+ACCOUNT_SORT_COLUMNS = ("balance", "account_id", "client_name", "qtd_change", "ytd_change")
+SEARCHES_PER_SNAPSHOT = 8
+
+
+class SortedTable:
+    """Rows of one table in a sort order, with their keys for bisecting."""
+
+    def __init__(self, rows: List[Dict], fields: Tuple[str, ...], descending: bool):
+        self.fields = fields
+        self.descending = descending
+        keyed = sorted(((self.key([row[field] for field in fields]), row) for row in rows),
+                       key=lambda pair: pair[0])
+        self.keys = [key for key, _ in keyed]
+        self.rows = [row for _, row in keyed]
+
+    def key(self, values: List[Any]) -> Tuple:
+        """Sort key for cursor field values; the first is negated when descending."""
+        if self.descending:
+            return (-(values[0] or 0),) + tuple(values[1:])
+        return tuple(values)
+
+    def page(self, after: Optional[List[Any]], page_size: int) -> Tuple[List[Dict], bool]:
+        """Rows following a cursor's field values (from the start without one) and whether more follow."""
+        start = 0
+        if after is not None and len(after) == len(self.fields):
+            try:
+                start = bisect.bisect_right(self.keys, self.key(after))
+            except TypeError:
+                # Cursor from another sort order; start over
+                start = 0
+        rows = self.rows[start:start + page_size]
+        return rows, start + page_size < len(self.rows)
+
+
+class PageSnapshot:
+    """A dashboard payload whose tables are sorted on first use per sort order."""
+
+    def __init__(self, payload: Dict, cache_timestamp: Optional[str] = None):
+        self.payload = payload
+        self.cache_timestamp = cache_timestamp
+        self._tables: Dict[Tuple[str, str], SortedTable] = {}
+        self._orders: Dict[Tuple[str, str, bool], List[Dict]] = {}
+        # Most recent searches, so scrolling through a search result is a slice
+        self._searches: "OrderedDict[Tuple, List[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def table(self, name: str, sort: str) -> SortedTable:
+        with self._lock:
+            table = self._tables.get((name, sort))
+            if table is None:
+                table = self._tables[(name, sort)] = SortedTable(
+                    self.payload[name], TABLE_SORTS[name][sort], sort == "total_balance"
+                )
+            return table
+
+    def ordered(self, name: str, column: str, descending: bool) -> List[Dict]:
+        """Table rows sorted on any column, empty values last and ties by id."""
+        with self._lock:
+            rows = self._orders.get((name, column, descending))
+            if rows is None:
+                id_field = TABLE_SORTS[name]["name"][-1]
+                rows = sorted(self.payload[name], key=lambda row: row[id_field])
+                missing = [row for row in rows if row.get(column) is None]
+                rows = [row for row in rows if row.get(column) is not None]
+                # Stable in both directions, so ties keep the id order
+                rows.sort(key=lambda row: row[column], reverse=descending)
+                rows = self._orders[(name, column, descending)] = rows + missing
+            return rows
+
+    def search(self, name: str, column: str, descending: bool, text: str,
+               fields: Tuple[str, ...]) -> List[Dict]:
+        """Sorted rows with text (case-insensitive) in any of the fields."""
+        rows = self.ordered(name, column, descending)
+        if not text:
+            return rows
+        key = (name, column, descending, text, fields)
+        with self._lock:
+            found = self._searches.get(key)
+            if found is not None:
+                self._searches.move_to_end(key)
+                return found
+        needle = text.lower()
+        found = [row for row in rows
+                 if any(needle in str(row.get(field) or "").lower() for field in fields)]
+        with self._lock:
+            self._searches[key] = found
+            while len(self._searches) > SEARCHES_PER_SNAPSHOT:
+                self._searches.popitem(last=False)
+        return found
+
+
+class PageSnapshotCache:
+    """Least-recently-used snapshots with per-entry expiry, for one data generation."""
+
+    def __init__(self, max_entries: int = PAGE_SNAPSHOT_SIZE, ttl: float = PAGE_SNAPSHOT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._generation: Optional[Hashable] = None
+        # key -> (expires_at, snapshot)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def set_generation(self, generation: Hashable):
+        """Switch to a new data generation, dropping older snapshots."""
+        with self._lock:
+            if generation == self._generation:
+                return
+            if self._generation is not None:
+                self._stats["invalidations"] += 1
+            self._generation = generation
+            self._entries.clear()
+
+    def get(self, key: Hashable, build: Callable[[], PageSnapshot]) -> PageSnapshot:
+        """The snapshot for a key, built (outside the lock) on a miss."""
+        if not self.enabled:
+            return build()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+            self._stats["misses"] += 1
+            generation = self._generation
+        snapshot = build()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, snapshot)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats["evictions"] += 1
+        return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), generation=self._generation,
+                         max_entries=self.max_entries, ttl_seconds=self.ttl)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_page_snapshots: Optional[PageSnapshotCache] = None
+_page_snapshots_pid = os.getpid()
+_page_snapshots_lock = threading.Lock()
+
+
+def get_page_snapshots() -> PageSnapshotCache:
+    """The process-wide snapshot cache used by DashboardService."""
+    global _page_snapshots, _page_snapshots_pid
+    with _page_snapshots_lock:
+        if _page_snapshots is None or _page_snapshots_pid != os.getpid():
+            _page_snapshots = PageSnapshotCache()
+            _page_snapshots_pid = os.getpid()
+        return _page_snapshots
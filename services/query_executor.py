@@ -0,0 +1,80 @@
+"""Bounded thread pool for running independent dashboard queries concurrently.
+
+A dashboard response is assembled from components (the balance snapshot and
+each chart history, or the cached_* overview tables) that do not depend on
+each other. sqlite3 releases the GIL while a statement runs, so running them
+on separate read-only connections makes a request take about as long as its
+slowest component instead of the sum of all of them.
+
+DASHBOARD_QUERY_WORKERS bounds the threads per process (0 runs everything
+serially on the request thread).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import os
+import threading
+
+DASHBOARD_QUERY_WORKERS = int(os.environ.get("DASHBOARD_QUERY_WORKERS", "4"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid = None
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_executor() -> Optional[ThreadPoolExecutor]:
+    """This process's executor (recreated after a fork), or None when disabled."""
+    global _executor, _executor_pid
+    if DASHBOARD_QUERY_WORKERS <= 0:
+        return None
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=DASHBOARD_QUERY_WORKERS,
+                                           thread_name_prefix="dashboard-query",
+                                           initializer=_mark_worker_thread)
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _mark_worker_thread():
+    _local.in_worker = True
+
+
+def run_components(components: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """Call each zero-argument callable and return their results by name.
+
+    The first component runs on the calling thread while the rest run on the
+    executor. Components submitted from an executor thread run serially, so
+    nested use cannot deadlock the bounded pool. The first exception raised
+    by any component is re-raised after all of them have finished.
+    """
+    names = list(components)
+    executor = get_executor()
+    if executor is None or len(names) < 2 or getattr(_local, "in_worker", False):
+        return {name: components[name]() for name in names}
+
+    futures = {name: executor.submit(components[name]) for name in names[1:]}
+    results = {}
+    error = None
+    try:
+        results[names[0]] = components[names[0]]()
+    except Exception as e:
+        error = e
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            if error is None:
+                error = e
+    if error is not None:
+        raise error
+    return results
+
+
+def executor_stats() -> Dict[str, Any]:
+    """Executor settings and queue depth for /api/v2/stats."""
+    executor = _executor if _executor_pid == os.getpid() else None
+    return {
+        "workers": DASHBOARD_QUERY_WORKERS,
+        "queued": executor._work_queue.qsize() if executor is not None else 0,
+    }
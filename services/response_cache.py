@@ -0,0 +1,437 @@
+"""Dashboard response caches: in-process LRU, shared SQLite file, or Redis.
+
+The backend is chosen with CACHE_BACKEND (memory, sqlite or redis). The
+shared backends let every gunicorn worker and every app container reuse a
+response computed by any one of them.
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import logging
+
+try:
+    import redis
+except ImportError:  # optional dependency, only needed for CACHE_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory").lower()
+CACHE_NAMESPACE = os.environ.get("CACHE_NAMESPACE", "cet")
+CACHE_SQLITE_PATH = os.environ.get("CACHE_SQLITE_PATH", "response_cache.db")
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+# After a connection error or timeout, skip Redis for this many seconds
+CACHE_REDIS_RETRY_SECONDS = float(os.environ.get("CACHE_REDIS_RETRY_SECONDS", "30"))
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_MAX_MB = float(os.environ.get("RESPONSE_CACHE_MAX_MB", "64"))
+
+
+# Marks a stored value as raw bytes (e.g. a precompressed body) rather than
+# JSON; JSON text never starts with a NUL byte
+RAW_BYTES_PREFIX = b"\x00"
+
+
+def dump_value(value: Any) -> bytes:
+    """Serialize a cache value for the shared backends."""
+    if isinstance(value, bytes):
+        return RAW_BYTES_PREFIX + value
+    return json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def load_value(payload: bytes) -> Any:
+    if payload[:1] == RAW_BYTES_PREFIX:
+        return bytes(payload[1:])
+    return json.loads(payload)
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate deep memory footprint of a JSON-like value in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class ResponseCache(ABC):
+    """Common behaviour for response cache backends.
+
+    Entries belong to a generation (the data version). Backends never serve
+    an entry from another generation, so new data is never answered with
+    responses computed before it landed. Values are JSON-like objects or
+    bytes (returned as bytes).
+    """
+
+    backend = "base"
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE,
+                 ttl: float = RESPONSE_CACHE_TTL,
+                 max_bytes: int = int(RESPONSE_CACHE_MAX_MB * 1024 * 1024),
+                 namespace: str = CACHE_NAMESPACE):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+        self._generation = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "errors": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def storage_key(self, key: Hashable) -> str:
+        """Stable string key, scoped to the namespace and current generation."""
+        digest = hashlib.sha256(
+            json.dumps([self._generation, key], default=str).encode("utf-8")
+        ).hexdigest()
+        return f"{self.namespace}:{digest}"
+
+    def set_generation(self, generation: Hashable):
+        """Switch to a new data generation, dropping entries of older ones."""
+        with self._stats_lock:
+            if generation == self._generation:
+                return
+            previous, self._generation = self._generation, generation
+        if previous is not None:
+            logger.info(f"Response cache invalidated: {previous} -> {generation}")
+            self._count("invalidations")
+        self._on_new_generation()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        try:
+            value = self._get(self.storage_key(key))
+        except Exception as e:
+            logger.warning(f"{self.backend} cache read failed: {e}")
+            self._count("errors")
+            value = None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        if not self.enabled:
+            return
+        try:
+            self._set(self.storage_key(key), value)
+        except Exception as e:
+            logger.warning(f"{self.backend} cache write failed: {e}")
+            self._count("errors")
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters, hit ratio and storage footprint."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            "backend": self.backend,
+            "namespace": self.namespace,
+            "generation": self._generation,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "max_bytes": self.max_bytes,
+        })
+        try:
+            stats.update(self._storage_stats())
+        except Exception as e:
+            logger.warning(f"{self.backend} cache stats failed: {e}")
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    # Backend hooks
+
+    @abstractmethod
+    def _get(self, storage_key: str) -> Optional[Any]:
+        """The value stored under a key, or None when missing or expired."""
+
+    @abstractmethod
+    def _set(self, storage_key: str, value: Any):
+        """Store a value under a key for the TTL."""
+
+    def _on_new_generation(self):
+        pass
+
+    def _storage_stats(self) -> Dict[str, Any]:
+        return {}
+
+    @abstractmethod
+    def clear(self):
+        """Drop every stored entry."""
+
+
+class MemoryResponseCache(ResponseCache):
+    """Least-recently-used in-process cache with per-entry expiry."""
+
+    backend = "memory"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # storage_key -> (expires_at, size, value)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _get(self, storage_key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(storage_key)
+            if entry is None:
+                return None
+            expires_at, _, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(storage_key)
+                self._count("expirations")
+                return None
+            self._entries.move_to_end(storage_key)
+            return value
+
+    def _set(self, storage_key: str, value: Any):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if storage_key in self._entries:
+                self._remove(storage_key)
+            self._entries[storage_key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            self._count("sets")
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._count("evictions")
+
+    def _remove(self, storage_key: str):
+        """Remove an entry (caller holds the lock)."""
+        _, size, _ = self._entries.pop(storage_key)
+        self._bytes -= size
+
+    def _on_new_generation(self):
+        self.clear()
+
+    def _storage_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "memory_bytes": self._bytes}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Cache in a shared SQLite file (WAL mode), usable by many processes.
+
+    Point every worker or container at the same file, e.g. on a shared
+    volume. Least-recently-used entries are pruned once the file holds more
+    than max_entries rows or max_bytes of payload.
+    """
+
+    backend = "sqlite"
+    PRUNE_EVERY = 32
+
+    def __init__(self, path: str = CACHE_SQLITE_PATH, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    value BLOB NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_accessed ON response_cache(accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _get(self, storage_key: str) -> Optional[Any]:
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires_at, accessed_at FROM response_cache WHERE key = ?", (storage_key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at <= now:
+            conn.execute("DELETE FROM response_cache WHERE key = ?", (storage_key,))
+            self._count("expirations")
+            return None
+        # Coarse LRU bookkeeping keeps hits from turning into a write each time
+        if now - accessed_at > 5:
+            conn.execute("UPDATE response_cache SET accessed_at = ? WHERE key = ?", (now, storage_key))
+        return load_value(value)
+
+    def _set(self, storage_key: str, value: Any):
+        payload = dump_value(value)
+        if len(payload) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO response_cache (key, namespace, expires_at, accessed_at, size, value) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (storage_key, self.namespace, now + self.ttl, now, len(payload), payload)
+        )
+        self._count("sets")
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection):
+        """Drop expired rows, then least-recently-used rows over the limits."""
+        expired = conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+        self._count("expirations", expired)
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache").fetchone()
+        evicted = 0
+        if count > self.max_entries:
+            evicted += conn.execute("""
+                DELETE FROM response_cache WHERE key IN (
+                    SELECT key FROM response_cache ORDER BY accessed_at LIMIT ?
+                )
+            """, (count - self.max_entries,)).rowcount
+        if total > self.max_bytes:
+            evicted += conn.execute("""
+                DELETE FROM response_cache WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC) as running
+                        FROM response_cache
+                    ) WHERE running > ?
+                )
+            """, (self.max_bytes,)).rowcount
+        self._count("evictions", evicted)
+
+    def _on_new_generation(self):
+        # Other generations are unreachable (keys include the generation); let
+        # them age out through TTL and LRU pruning rather than racing other
+        # processes that may still be on the previous date.
+        self._prune(self._connection())
+
+    def _storage_stats(self) -> Dict[str, Any]:
+        count, total = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache WHERE namespace = ?",
+            (self.namespace,)
+        ).fetchone()
+        return {"path": self.path, "entries": count, "memory_bytes": total}
+
+    def clear(self):
+        self._connection().execute("DELETE FROM response_cache WHERE namespace = ?", (self.namespace,))
+
+
+class RedisResponseCache(ResponseCache):
+    """Cache in Redis or any Redis-protocol server (KeyDB, Dragonfly, ...).
+
+    Expiry is delegated to the server (SETEX); size limits are the server's
+    maxmemory/eviction policy, e.g. allkeys-lru. When the server cannot be
+    reached, the cache stands aside for retry_seconds (every lookup is a
+    miss) instead of making each request wait out the socket timeouts.
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str = CACHE_REDIS_URL, *args,
+                 retry_seconds: float = CACHE_REDIS_RETRY_SECONDS, **kwargs):
+        super().__init__(*args, **kwargs)
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        self.url = url
+        self.retry_seconds = retry_seconds
+        self.client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self._down_until = 0.0
+        self._stats["skipped"] = 0
+
+    def _call(self, method: str, *args):
+        """Run a client command, or return None while the server is marked down."""
+        if time.monotonic() < self._down_until:
+            self._count("skipped")
+            return None
+        try:
+            return getattr(self.client, method)(*args)
+        except (redis.ConnectionError, redis.TimeoutError):
+            self._down_until = time.monotonic() + self.retry_seconds
+            logger.warning(f"Redis unreachable; skipping the response cache for {self.retry_seconds:g}s")
+            raise
+
+    def _get(self, storage_key: str) -> Optional[Any]:
+        payload = self._call("get", storage_key)
+        return load_value(payload) if payload is not None else None
+
+    def _set(self, storage_key: str, value: Any):
+        payload = dump_value(value)
+        if len(payload) > self.max_bytes:
+            return
+        if self._call("setex", storage_key, max(1, int(self.ttl)), payload):
+            self._count("sets")
+
+    def _storage_stats(self) -> Dict[str, Any]:
+        if time.monotonic() < self._down_until:
+            return {"url": self.url, "available": False}
+        memory = self._call("info", "memory")
+        return {"url": self.url, "available": True, "server_keys": self._call("dbsize"),
+                "memory_bytes": memory.get("used_memory")}
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.namespace}:*"):
+            self.client.delete(key)
+
+
+def create_response_cache(backend: str = CACHE_BACKEND) -> ResponseCache:
+    """Build the configured backend, falling back to memory if it is unusable."""
+    try:
+        if backend == "sqlite":
+            return SQLiteResponseCache()
+        if backend == "redis":
+            return RedisResponseCache()
+        if backend != "memory":
+            logger.warning(f"Unknown CACHE_BACKEND '{backend}', using memory")
+    except (RuntimeError, sqlite3.Error) as e:
+        logger.warning(f"Could not use {backend} response cache ({e}); using memory")
+    return MemoryResponseCache()
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_pid = os.getpid()
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """The process-wide response cache shared by DashboardService and app.py."""
+    global _response_cache, _response_cache_pid
+    with _response_cache_lock:
+        if _response_cache is None or _response_cache_pid != os.getpid():
+            _response_cache = create_response_cache()
+            _response_cache_pid = os.getpid()
+        return _response_cache
@@ -201,6 +201,13 @@ function buildQueryString(includeSelections = false) {
     if (textFilters.accountNumber) {
         params.append('account_number', textFilters.accountNumber);
     }
+    if (chartsV2.usesCompactFormat()) {
+        params.append('chart_format', 'columnar');
+    }
+    const maxPoints = chartsV2.maxChartPoints();
+    if (maxPoints) {
+        params.append('max_points', maxPoints);
+    }
     
     // Include selections if requested
     if (includeSelections) {
@@ -269,9 +276,12 @@ function updateKPICards(data) {
     let aumChange = null;
     if (filteredData.kpi_metrics) {
         aumChange = filteredData.kpi_metrics.change_30d_pct;
-    } else if (data.recent_history && data.recent_history.length >= 30) {
-        const thirtyDaysAgo = data.recent_history[data.recent_history.length - 30].total_balance;
-        aumChange = ((totalAUM - thirtyDaysAgo) / thirtyDaysAgo * 100);
+    } else if (data.recent_history) {
+        const recentBalances = chartsV2.decodeHistory(data.recent_history).balances;
+        if (recentBalances.length >= 30) {
+            const thirtyDaysAgo = recentBalances[recentBalances.length - 30];
+            aumChange = ((totalAUM - thirtyDaysAgo) / thirtyDaysAgo * 100);
+        }
     }
     
     // Update label and count based on filter context
@@ -443,8 +453,11 @@ function calculateFallbackAUM(filteredData) {
         totalAUM = filteredData.fund_balances.reduce((sum, fund) => sum + (fund.total_balance || 0), 0);
     } else if (filteredData.account_details && filteredData.account_details.length > 0) {
         totalAUM = filteredData.account_details.reduce((sum, account) => sum + (account.balance || account.total_balance || 0), 0);
-    } else if (filteredData.recent_history && filteredData.recent_history.length > 0) {
-        totalAUM = filteredData.recent_history[filteredData.recent_history.length - 1].total_balance;
+    } else if (filteredData.recent_history) {
+        const recentBalances = chartsV2.decodeHistory(filteredData.recent_history).balances;
+        if (recentBalances.length > 0) {
+            totalAUM = recentBalances[recentBalances.length - 1];
+        }
     }
     return totalAUM;
 }
@@ -1811,10 +1824,10 @@ async function updateDataBasedOnSelections() {
     restoreSelectionVisuals();
 }
 
-// Helper function to append selection_source parameter correctly
-function appendSelectionSource(queryString, source) {
+// Helper function to append the batched selection_source views correctly
+function appendViews(queryString, views) {
     const separator = queryString ? '&' : '?';
-    return `${queryString}${separator}selection_source=${source}`;
+    return `${queryString}${separator}views=${views.join(',')}`;
 }
 
 // Load filtered data based on multiple selections
@@ -1824,64 +1837,30 @@ async function loadFilteredData() {
         const hasFunds = selectionState.funds.size > 0;
         const hasAccounts = selectionState.accounts.size > 0;
         
-        // Get filtered intersection data for charts, KPIs, and non-selected tables
-        const queryString = buildQueryString(true);
+        // One request returns the filtered intersection (charts, KPIs and
+        // non-selected tables) plus, per selected dimension, the "all items"
+        // table computed from the same scan
+        const views = [];
+        if (hasClients) views.push('client');
+        if (hasFunds) views.push('fund');
+        if (hasAccounts) views.push('account');
+        
+        let queryString = buildQueryString(true);
+        if (views.length > 0) {
+            queryString = appendViews(queryString, views);
+        }
         const response = await fetch(`/api/v2/dashboard${queryString}`);
         const data = await response.json();
         
         if (!response.ok) {
-            console.error('Error loading filtered data:', data.error);
+            console.error('Error loading filtered data:', data.detail || data.error);
             return;
         }
         
-        // Prepare promises for parallel fetching of "all items" data
-        const promises = [];
-        const sources = [];
-        
-        if (hasClients) {
-            const url = `/api/v2/dashboard${appendSelectionSource(queryString, 'client')}`;
-            promises.push(fetch(url).then(r => r.json()));
-            sources.push('client');
-        }
-        if (hasFunds) {
-            const url = `/api/v2/dashboard${appendSelectionSource(queryString, 'fund')}`;
-            promises.push(fetch(url).then(r => r.json()));
-            sources.push('fund');
-        }
-        if (hasAccounts) {
-            const url = `/api/v2/dashboard${appendSelectionSource(queryString, 'account')}`;
-            promises.push(fetch(url).then(r => r.json()));
-            sources.push('account');
-        }
-        
-        // Execute all promises and handle failures gracefully
-        let allClientsData = null;
-        let allFundsData = null;
-        let allAccountsData = null;
-        
-        if (promises.length > 0) {
-            const results = await Promise.allSettled(promises);
-            
-            results.forEach((result, index) => {
-                const source = sources[index];
-                if (result.status === 'fulfilled') {
-                    switch (source) {
-                        case 'client':
-                            allClientsData = result.value;
-                            break;
-                        case 'fund':
-                            allFundsData = result.value;
-                            break;
-                        case 'account':
-                            allAccountsData = result.value;
-                            break;
-                    }
-                } else {
-                    console.error(`Failed to fetch all ${source} data:`, result.reason);
-                    // Fallback handled by null checks below
-                }
-            });
-        }
+        const variants = data.views || {};
+        const allClientsData = variants.client || null;
+        const allFundsData = variants.fund || null;
+        const allAccountsData = variants.account || null;
         
         // Update filter type for indicator
         currentFilter = { type: 'multi', filters: data.metadata ? data.metadata.filters_applied : data.filters };
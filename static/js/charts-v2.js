@@ -22,6 +22,49 @@ const chartsV2 = {
         }
     },
     
+    // Request chart history in the compact columnar format
+    usesCompactFormat() {
+        return Boolean(window.featureFlags?.useV2Charts && window.featureFlags?.compactChartFormat);
+    },
+    
+    // Server-side downsampling target: about one point per pixel of the
+    // long-term chart (null keeps every point)
+    maxChartPoints() {
+        if (!window.featureFlags?.downsampleCharts) {
+            return null;
+        }
+        const canvas = document.getElementById('longTermChart');
+        const width = canvas ? Math.round(canvas.clientWidth) : 0;
+        return width >= 3 ? width : 500;
+    },
+    
+    // Decode a history series into parallel date/balance arrays.
+    // Accepts row arrays (v1 balance_date/total_balance, v2 date/balance) and
+    // the columnar format: {format: 'columnar', start, day_deltas, balances}
+    decodeHistory(historyData) {
+        if (!historyData) {
+            return { dates: [], balances: [] };
+        }
+        
+        if (historyData.format === 'columnar') {
+            const dates = new Array(historyData.day_deltas.length);
+            if (historyData.start) {
+                const [year, month, day] = historyData.start.split('-').map(Number);
+                let time = Date.UTC(year, month - 1, day);
+                for (let i = 0; i < dates.length; i++) {
+                    time += historyData.day_deltas[i] * 86400000;
+                    dates[i] = new Date(time).toISOString().slice(0, 10);
+                }
+            }
+            return { dates, balances: historyData.balances };
+        }
+        
+        return {
+            dates: historyData.map(item => item.balance_date || item.date),
+            balances: historyData.map(item => item.total_balance || item.balance)
+        };
+    },
+    
     // Initialize charts (called once on page load)
     init() {
         console.log('[Charts V2] Initializing charts with v2 API');
@@ -170,12 +213,15 @@ const chartsV2 = {
     
     // Update individual chart
     updateChart(chart, historyData, chartType) {
-        if (!chart || !historyData || historyData.length === 0) {
+        if (!chart || !historyData) {
             return;
         }
         
-        // Extract balances - support both v1 (total_balance) and v2 (balance) formats
-        const balances = historyData.map(item => item.total_balance || item.balance);
+        // Supports v1 (total_balance), v2 (balance) and columnar series
+        const { dates, balances } = this.decodeHistory(historyData);
+        if (balances.length === 0) {
+            return;
+        }
         
         // Calculate statistics like v1
         const avgBalance = balances.reduce((sum, val) => sum + val, 0) / balances.length;
@@ -194,13 +240,7 @@ const chartsV2 = {
         }
         
         // Extract labels using v1 date formatters
-        const labels = historyData.map(item => {
-            if (chartType === 'recent') {
-                return formatDate(item.balance_date || item.date);
-            } else {
-                return formatDateLong(item.balance_date || item.date);
-            }
-        });
+        const labels = dates.map(date => chartType === 'recent' ? formatDate(date) : formatDateLong(date));
         
         // Update chart data with v1 styling
         chart.data.labels = labels;
@@ -254,8 +294,8 @@ const chartsV2 = {
             }
         ];
         
-        // Store original data for click handling
-        chart._chartData = historyData;
+        // Store dates for click handling
+        chart._chartDates = dates;
         
         // Refresh chart with animation like v1
         chart.update();
@@ -274,8 +314,8 @@ const chartsV2 = {
         // Get the actual date value from the chart's dataset
         // The chart should have the original date data stored
         let clickedDate;
-        if (chart._chartData && chart._chartData[index]) {
-            clickedDate = chart._chartData[index].balance_date || chart._chartData[index].date;
+        if (chart._chartDates && chart._chartDates[index]) {
+            clickedDate = chart._chartDates[index];
         } else {
             // Fallback: try to parse the label
             const label = chart.data.labels[index];
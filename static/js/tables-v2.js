@@ -1,5 +1,28 @@
 // V2 Table implementation using v2 API
 const tablesV2 = {
+    // Virtual-scrolling account table (featureFlags.virtualAccountTable):
+    // rows come a window at a time from /api/v2/accounts, sorted and searched
+    // server-side, and only the visible rows are kept in the DOM
+    virtualAccounts: {
+        endpoint: '/api/v2/accounts',
+        windowSize: 100,
+        overscan: 10,
+        rowHeight: 32, // re-measured from the first rendered row
+        columns: ['account_id', 'balance', 'qtd_change', 'ytd_change'], // by header position
+        sort: 'balance',
+        order: 'desc',
+        search: '',
+        total: 0,
+        rows: new Map(), // row index -> account
+        pending: new Set(), // window offsets being fetched
+        generation: 0, // bumped on every reset so stale windows are dropped
+        renderQueued: false
+    },
+    
+    usesVirtualAccountTable() {
+        return !!(window.featureFlags && window.featureFlags.virtualAccountTable);
+    },
+    
     // Table update functions
     updateClientTable(data) {
         const tbody = document.querySelector('#clientTable tbody');
@@ -59,6 +82,12 @@ const tablesV2 = {
     },
     
     updateAccountTable(data) {
+        if (this.usesVirtualAccountTable()) {
+            // Rows are fetched for the current selections instead
+            this.resetVirtualAccounts();
+            return;
+        }
+        
         const tbody = document.querySelector('#accountTable tbody');
         tbody.innerHTML = '';
         
@@ -85,6 +114,160 @@ const tablesV2 = {
         });
     },
     
+    // Query parameters for the current selections, text filters, sort and search
+    virtualAccountParams(offset) {
+        const state = this.virtualAccounts;
+        const selection = getCurrentSelectionParams();
+        const params = new URLSearchParams();
+        selection.clientIds.forEach(id => params.append('client_id', id));
+        selection.fundNames.forEach(name => params.append('fund_name', name));
+        selection.accountIds.forEach(id => params.append('account_id', id));
+        if (selection.textFilters.fundTicker) params.append('fund_ticker', selection.textFilters.fundTicker);
+        if (selection.textFilters.clientName) params.append('client_name', selection.textFilters.clientName);
+        if (selection.textFilters.accountNumber) params.append('account_number', selection.textFilters.accountNumber);
+        if (selection.date) params.append('date', selection.date);
+        if (selection.selectionSource) params.append('selection_source', selection.selectionSource);
+        params.append('sort', state.sort);
+        params.append('order', state.order);
+        if (state.search) params.append('search', state.search);
+        params.append('offset', offset);
+        params.append('limit', state.windowSize);
+        return params;
+    },
+    
+    // Drop loaded rows (filters, sort or search changed) and reload; a new
+    // sort or search also scrolls back to the top
+    resetVirtualAccounts(scrollToTop = false) {
+        const state = this.virtualAccounts;
+        state.generation++;
+        state.rows.clear();
+        state.pending.clear();
+        state.total = 0;
+        const wrapper = document.querySelector('#accountTable').parentElement;
+        if (scrollToTop) wrapper.scrollTop = 0;
+        this.updateSortIndicators();
+        const visible = Math.floor(wrapper.scrollTop / state.rowHeight);
+        this.loadAccountWindow(visible - visible % state.windowSize);
+    },
+    
+    async loadAccountWindow(offset) {
+        const state = this.virtualAccounts;
+        if (state.pending.has(offset)) return;
+        const generation = state.generation;
+        state.pending.add(offset);
+        try {
+            const response = await fetch(`${state.endpoint}?${this.virtualAccountParams(offset)}`, {
+                headers: { 'Accept': 'application/json' }
+            });
+            if (!response.ok) {
+                const errorData = await response.json();
+                throw new Error(errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
+            }
+            const data = await response.json();
+            if (generation !== state.generation) return; // superseded by a reset
+            state.total = data.total;
+            data.rows.forEach((account, i) => state.rows.set(offset + i, account));
+            this.renderVirtualAccounts();
+        } catch (error) {
+            console.error('[Tables V2] Error loading account window:', error);
+        } finally {
+            if (generation === state.generation) state.pending.delete(offset);
+        }
+    },
+    
+    // Render the visible rows between spacers sized for the rows around them
+    renderVirtualAccounts() {
+        const state = this.virtualAccounts;
+        const wrapper = document.querySelector('#accountTable').parentElement;
+        const tbody = document.querySelector('#accountTable tbody');
+        const last = Math.min(state.total,
+            Math.ceil((wrapper.scrollTop + wrapper.clientHeight) / state.rowHeight) + state.overscan);
+        const first = Math.min(last, Math.max(0, Math.floor(wrapper.scrollTop / state.rowHeight) - state.overscan));
+        
+        // Fetch any window of the visible range not loaded yet
+        for (let offset = first - first % state.windowSize; offset < last; offset += state.windowSize) {
+            if (!state.rows.has(offset)) this.loadAccountWindow(offset);
+        }
+        
+        const rows = [`<tr class="virtual-spacer"><td colspan="4" style="height: ${first * state.rowHeight}px"></td></tr>`];
+        for (let i = first; i < last; i++) {
+            const account = state.rows.get(i);
+            if (!account) {
+                rows.push('<tr class="virtual-loading"><td colspan="4">Loading...</td></tr>');
+                continue;
+            }
+            const selected = selectionState.accounts.has(account.account_id) ? ' class="selected"' : '';
+            rows.push(`
+                <tr data-account-id="${account.account_id}"${selected}>
+                    <td>${account.account_id}</td>
+                    <td class="number">${formatCurrency(account.balance || 0)}</td>
+                    <td class="number">${formatPercentage(account.qtd_change)}</td>
+                    <td class="number">${formatPercentage(account.ytd_change)}</td>
+                </tr>`);
+        }
+        rows.push(`<tr class="virtual-spacer"><td colspan="4" style="height: ${(state.total - last) * state.rowHeight}px"></td></tr>`);
+        tbody.innerHTML = rows.join('');
+        
+        const rendered = tbody.querySelector('tr[data-account-id]');
+        if (rendered && rendered.offsetHeight) state.rowHeight = rendered.offsetHeight;
+    },
+    
+    // Re-render at most once per frame while scrolling
+    queueVirtualRender() {
+        const state = this.virtualAccounts;
+        if (state.renderQueued) return;
+        state.renderQueued = true;
+        requestAnimationFrame(() => {
+            state.renderQueued = false;
+            this.renderVirtualAccounts();
+        });
+    },
+    
+    updateSortIndicators() {
+        const state = this.virtualAccounts;
+        document.querySelectorAll('#accountTable thead th').forEach((th, i) => {
+            th.classList.toggle('sorted-asc', state.columns[i] === state.sort && state.order === 'asc');
+            th.classList.toggle('sorted-desc', state.columns[i] === state.sort && state.order === 'desc');
+        });
+    },
+    
+    // Header clicks sort server-side; a search box filters server-side
+    initVirtualAccountTable() {
+        const state = this.virtualAccounts;
+        const table = document.querySelector('#accountTable');
+        table.classList.add('virtual-table');
+        table.parentElement.addEventListener('scroll', () => this.queueVirtualRender());
+        
+        table.querySelectorAll('thead th').forEach((th, i) => {
+            th.classList.add('sortable');
+            th.addEventListener('click', () => {
+                const column = state.columns[i];
+                if (state.sort === column) {
+                    state.order = state.order === 'desc' ? 'asc' : 'desc';
+                } else {
+                    state.sort = column;
+                    state.order = column === 'account_id' ? 'asc' : 'desc';
+                }
+                this.resetVirtualAccounts(true);
+            });
+        });
+        
+        const search = document.createElement('input');
+        search.type = 'search';
+        search.className = 'table-search';
+        search.placeholder = 'Search accounts or clients';
+        let debounce = null;
+        search.addEventListener('input', () => {
+            clearTimeout(debounce);
+            debounce = setTimeout(() => {
+                state.search = search.value.trim();
+                this.resetVirtualAccounts(true);
+            }, 250);
+        });
+        table.parentElement.parentElement.insertBefore(search, table.parentElement);
+        this.updateSortIndicators();
+    },
+    
     // Main update function that accepts either data or params
     async updateTables(dataOrParams) {
         try {
@@ -145,11 +328,15 @@ const tablesV2 = {
         document.querySelector('#clientTable tbody').innerHTML = '';
         document.querySelector('#fundTable tbody').innerHTML = '';
         document.querySelector('#accountTable tbody').innerHTML = '';
+        this.virtualAccounts.generation++;
     },
     
     // Initialize (called once on page load)
     init() {
         console.log('[Tables V2] Initialized with v2 API');
+        if (this.usesVirtualAccountTable()) {
+            this.initVirtualAccountTable();
+        }
         // Tables don't need special initialization like charts
         // Event handlers are managed by the main app.js
     }
@@ -73,6 +73,22 @@ const v2Api = {
             params.selection_source = selections.selectionSource;
         }
 
+        // Batched selection_source variants returned with the intersection
+        if (selections.views && selections.views.length > 0) {
+            params.views = selections.views.join(',');
+        }
+
+        // Compact chart history (decoded by chartsV2)
+        if (window.chartsV2 && chartsV2.usesCompactFormat()) {
+            params.chart_format = 'columnar';
+        }
+
+        // Downsampled chart history sized to the chart
+        const maxPoints = window.chartsV2 ? chartsV2.maxChartPoints() : null;
+        if (maxPoints) {
+            params.max_points = maxPoints;
+        }
+
         return params;
     },
 
@@ -0,0 +1,38 @@
+import csv
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repositories.data_load_repository import create_data_loads_table
+
+
+@pytest.fixture
+def balances_db(tmp_path):
+    """A one-account database in the pre-migration-5 layout, for BalanceLoader."""
+    db_path = str(tmp_path / "balances.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE client_mapping (account_id TEXT PRIMARY KEY, client_name TEXT, client_id TEXT)")
+        conn.execute("CREATE TABLE funds (fund_name TEXT PRIMARY KEY, fund_ticker TEXT UNIQUE NOT NULL)")
+        conn.execute("CREATE TABLE account_balances (id TEXT PRIMARY KEY, account_id TEXT, fund_name TEXT, "
+                     "balance_date DATE, balance DECIMAL(15,2))")
+        create_data_loads_table(conn)
+        conn.execute("INSERT INTO client_mapping VALUES ('A1', 'Client 1', 'C1')")
+        conn.execute("INSERT INTO funds VALUES ('Fund X', 'FX')")
+    return db_path
+
+
+@pytest.fixture
+def balance_file(tmp_path):
+    """Writes a CSV with account A1's Fund X balance on a date; returns its path."""
+    def write(balance_date, balance):
+        path = tmp_path / f"{balance_date}-{balance}.csv"
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["balance_date", "account_id", "fund_name", "balance"])
+            writer.writerow([balance_date, "A1", "Fund X", balance])
+        return str(path)
+    return write
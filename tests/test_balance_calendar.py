@@ -0,0 +1,17 @@
+"""QTD/YTD/30-day comparison dates resolve to loaded balance dates."""
+from services.balance_calendar import BalanceCalendar
+
+CALENDAR = BalanceCalendar(["2024-12-31", "2025-01-02", "2025-03-31", "2025-04-01", "2025-05-30"])
+
+
+def test_period_starts_are_as_of_the_quarter_and_year_starts():
+    assert CALENDAR.period_starts("2025-05-30") == ("2025-04-01", "2024-12-31")
+
+
+def test_prior_period_ends_are_as_of_the_day_before_each_start():
+    assert CALENDAR.prior_period_ends("2025-05-30") == ("2025-03-31", "2024-12-31")
+
+
+def test_as_of_days_before():
+    assert CALENDAR.as_of_days_before("2025-05-30", 30) == "2025-04-01"
+    assert CALENDAR.as_of_days_before("2024-12-31", 30) is None
@@ -0,0 +1,24 @@
+"""The balance cube reloads whenever the data version changes."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from load_balances import BalanceLoader
+from services import balance_cube
+
+
+def test_same_date_reload_refreshes_cube(balances_db, balance_file, monkeypatch):
+    monkeypatch.setattr(balance_cube, "CUBE_ENABLED", True)
+    loader = BalanceLoader(balances_db)
+    try:
+        loader.load(balance_file("2025-06-30", 100))
+        cube = balance_cube.get_cube(balances_db)
+        assert cube.values.sum() == 100
+
+        # Same latest date, new numbers
+        loader.load(balance_file("2025-06-30", 250))
+    finally:
+        loader.close()
+    reloaded = balance_cube.get_cube(balances_db)
+    assert reloaded is not cube
+    assert reloaded.values.sum() == 250
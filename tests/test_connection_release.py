@@ -0,0 +1,26 @@
+"""Pooled connections are returned when a v1 route errors or returns early."""
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repositories.connection_pool import DEFAULT_POOL_SIZE, get_pool
+
+
+def test_error_paths_release_pooled_connections(tmp_path, monkeypatch):
+    # Only account_balances exists (for the data version), so the routes'
+    # queries fail with "no such table" after checking out a connection
+    monkeypatch.chdir(tmp_path)
+    with sqlite3.connect('client_exploration.db') as conn:
+        conn.execute("CREATE TABLE account_balances (account_id TEXT, fund_name TEXT, "
+                     "balance_date DATE, balance DECIMAL(15,2))")
+    import app as appmod
+
+    client = appmod.app.test_client()
+    for _ in range(DEFAULT_POOL_SIZE + 2):
+        assert client.get('/api/date/not-a-date').status_code == 400
+        assert client.get('/api/date/2025-06-30').status_code == 500
+        assert client.get('/api/overview').status_code == 500
+
+    assert get_pool('client_exploration.db').stats()['in_use'] == 0
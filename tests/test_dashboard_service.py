@@ -0,0 +1,22 @@
+"""DashboardService leaves response caching to callers that cache encoded responses."""
+from load_balances import BalanceLoader
+from migrations import apply_migrations
+from services.dashboard_service import DashboardService
+
+
+def test_use_cache_false_does_not_store_the_response(balances_db, balance_file):
+    apply_migrations(balances_db)
+    loader = BalanceLoader(balances_db)
+    try:
+        loader.load(balance_file("2025-06-30", 100))
+    finally:
+        loader.close()
+
+    service = DashboardService(balances_db)
+    service.response_cache.clear()
+    data = service.get_dashboard_data(client_ids=["C1"], use_cache=False)
+    assert data["kpi_metrics"]["total_aum"] == 100
+    assert service.response_cache.stats()["entries"] == 0
+
+    service.get_dashboard_data(client_ids=["C1"])
+    assert service.response_cache.stats()["entries"] == 1
@@ -0,0 +1,22 @@
+"""The index advisor sees the SQL the dashboard service runs."""
+from index_advisor import IndexAdvisor
+from load_balances import BalanceLoader
+from migrations import apply_migrations
+
+
+def test_service_cases_capture_sql(balances_db, balance_file):
+    apply_migrations(balances_db)
+    loader = BalanceLoader(balances_db)
+    try:
+        loader.load(balance_file("2025-06-30", 100))
+    finally:
+        loader.close()
+
+    advisor = IndexAdvisor(balances_db)
+    try:
+        advisor.capture()
+    finally:
+        advisor.close()
+    sources = set().union(*advisor.statements.values())
+    assert "service: client filter" in sources
+    assert "service: account window" in sources
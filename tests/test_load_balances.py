@@ -0,0 +1,70 @@
+"""BalanceLoader: new funds, and dropping the warmed caches that could read the loaded balances."""
+import csv
+import os
+import sqlite3
+
+import pytest
+
+from load_balances import BalanceLoader
+
+CACHE_TABLES_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache_tables.sql")
+
+
+def test_load_drops_caches_from_the_loaded_date_on(balances_db, balance_file):
+    with sqlite3.connect(balances_db) as conn:
+        with open(CACHE_TABLES_SQL) as f:
+            conn.executescript(f.read())
+        conn.executemany(
+            "INSERT INTO cached_dashboard (filter_hash, as_of_date, filters, payload) VALUES ('h', ?, '{}', '{}')",
+            [("2025-03-31",), ("2025-06-30",), ("2025-09-30",)]
+        )
+        conn.execute("INSERT INTO cached_client_balances (client_id, as_of_date, client_name, total_balance) "
+                     "VALUES ('C1', '2025-06-30', 'Client 1', 1)")
+
+    loader = BalanceLoader(balances_db)
+    try:
+        loader.load(balance_file("2025-06-30", 100))
+    finally:
+        loader.close()
+
+    assert loader.dropped_dates == {"2025-06-30", "2025-09-30"}
+    with sqlite3.connect(balances_db) as conn:
+        remaining = [row[0] for row in conn.execute("SELECT as_of_date FROM cached_dashboard")]
+        assert remaining == ["2025-03-31"]
+        assert conn.execute("SELECT COUNT(*) FROM cached_client_balances").fetchone()[0] == 0
+
+
+def write_rows(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["balance_date", "account_id", "fund_name", "balance", "fund_ticker"])
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_new_funds_are_added_with_their_tickers(balances_db, tmp_path):
+    path = write_rows(tmp_path / "new_fund.csv", [("2025-06-30", "A1", "Fund Y", 5, "FY"),
+                                                   ("2025-06-30", "A1", "Fund X", 7, "")])
+    loader = BalanceLoader(balances_db)
+    try:
+        loader.load(path)
+    finally:
+        loader.close()
+    with sqlite3.connect(balances_db) as conn:
+        assert conn.execute("SELECT fund_name, fund_ticker FROM funds ORDER BY fund_name").fetchall() == [
+            ("Fund X", "FX"), ("Fund Y", "FY")
+        ]
+
+
+@pytest.mark.parametrize("ticker, message", [("", "unknown fund Fund Y"), ("FX", "FX of new fund Fund Y")])
+def test_new_fund_without_a_usable_ticker_rejects_the_file(balances_db, tmp_path, ticker, message):
+    path = write_rows(tmp_path / "bad_fund.csv", [("2025-06-30", "A1", "Fund Y", 5, ticker)])
+    loader = BalanceLoader(balances_db)
+    try:
+        with pytest.raises(ValueError, match=message):
+            loader.load(path)
+    finally:
+        loader.close()
+    with sqlite3.connect(balances_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM account_balances").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM funds").fetchone()[0] == 1
@@ -0,0 +1,57 @@
+"""Response cache backends: storage hooks and behaviour when the backend is down."""
+import socket
+import time
+
+import pytest
+
+from services.response_cache import MemoryResponseCache, ResponseCache
+
+
+def test_backend_missing_a_hook_cannot_be_created():
+    class NoClear(ResponseCache):
+        def _get(self, storage_key):
+            return None
+
+        def _set(self, storage_key, value):
+            pass
+
+    with pytest.raises(TypeError):
+        NoClear()
+
+
+def test_memory_backend_serves_only_the_current_generation():
+    cache = MemoryResponseCache()
+    cache.set_generation("2025-06-30:1")
+    cache.set(("dashboard",), {"total": 1})
+    assert cache.get(("dashboard",)) == {"total": 1}
+    cache.set_generation("2025-06-30:2")
+    assert cache.get(("dashboard",)) is None
+
+
+def test_unresponsive_redis_costs_one_timeout_per_retry_window():
+    pytest.importorskip("redis")
+    from services.response_cache import RedisResponseCache
+
+    # Accepts connections (via the backlog) but never answers
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    try:
+        cache = RedisResponseCache(f"redis://127.0.0.1:{server.getsockname()[1]}/0", retry_seconds=60)
+        cache.set_generation("2025-06-30:1")
+        started = time.monotonic()
+        assert cache.get(("dashboard",)) is None
+        first = time.monotonic() - started
+
+        started = time.monotonic()
+        for _ in range(20):
+            assert cache.get(("dashboard",)) is None
+            cache.set(("dashboard",), {"total": 1})
+        assert time.monotonic() - started < 0.5
+        assert first < 2.5
+        stats = cache.stats()
+        assert stats["errors"] == 1
+        assert stats["skipped"] == 40
+        assert stats["available"] is False
+    finally:
+        server.close()
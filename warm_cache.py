@@ -4,19 +4,40 @@ Cache warming script for the Client Exploration Tool.
 Run this after nightly data updates to pre-compute common queries.
 """
 import sqlite3
+import json
+import time
 import logging
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from services.dashboard_service import DashboardService
+from repositories.cache_repository import CACHE_TABLES
+from repositories.rollup_repository import RollupRepository
+from services.dashboard_service import DashboardService, canonical_filters, filter_hash
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Filtered views to precompute besides the overview
+TOP_COMBINATIONS = 50        # most requested combinations from the access log
+MAX_PER_DIMENSION = 500      # largest clients/funds/accounts warmed individually
+ACCESS_LOG_DAYS = 30         # how far back the access log ranking looks
+
+# Historical backfill
+BACKFILL_YEARS = 3
+QUARTER_END_MONTHS = ('03', '06', '09', '12')
+
 class CacheWarmer:
-    def __init__(self, db_path="client_exploration.db"):
+    def __init__(self, db_path="client_exploration.db", top_combinations=TOP_COMBINATIONS,
+                 max_per_dimension=MAX_PER_DIMENSION):
         self.db_path = db_path
+        self.top_combinations = top_combinations
+        self.max_per_dimension = max_per_dimension
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
         self.service = DashboardService(db_path)
+        self.timings = OrderedDict()
         
     def setup_cache_tables(self):
         """Create cache tables if they don't exist."""
@@ -31,24 +52,27 @@ class CacheWarmer:
         return cursor.fetchone()[0]
         
     def clear_old_cache(self, as_of_date):
-        """Clear old cache entries for the given date."""
+        """Clear old cache entries for the given date (part of the warm transaction)."""
         logger.info(f"Clearing old cache for date: {as_of_date}")
-        tables = [
-            'cached_overview',
-            'cached_client_balances', 
-            'cached_fund_balances',
-            'cached_account_details',
-            'cached_chart_data'
-        ]
-        for table in tables:
+        for table in CACHE_TABLES:
             self.conn.execute(f"DELETE FROM {table} WHERE as_of_date = ?", (as_of_date,))
-        self.conn.commit()
         
-    def warm_overview_cache(self, as_of_date):
-        """Cache overview data (no filters)."""
-        logger.info("Warming overview cache...")
-        data = self.service.get_dashboard_data(date=as_of_date, include_charts=False)
+    @contextmanager
+    def stage(self, name):
+        """Time a warm stage; durations are reported at the end of the run."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+            
+    def compute_overview(self, as_of_date):
+        """Compute the unfiltered dashboard (tables, KPIs and charts) once."""
+        logger.info("Computing overview...")
+        return self.service.build_cache_payload(canonical_filters(), as_of_date)
         
+    def warm_overview_cache(self, as_of_date, data):
+        """Cache overview data (no filters)."""
         # Extract KPI metrics
         kpi = data['kpi_metrics']
         
@@ -61,9 +85,9 @@ class CacheWarmer:
                 ytd_count += 1
         avg_ytd = ytd_sum / ytd_count if ytd_count > 0 else 0
         
-        # Insert into cache
+        # One overview row (cache_key 'overview'): a new date replaces the previous one
         self.conn.execute("""
-            INSERT INTO cached_overview (
+            INSERT OR REPLACE INTO cached_overview (
                 cache_key, as_of_date, total_clients, total_funds, 
                 total_accounts, total_aum, aum_30d_ago, aum_30d_change, avg_ytd_growth
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -73,99 +97,261 @@ class CacheWarmer:
             kpi.get('change_30d', 0), avg_ytd
         ))
         
-    def warm_client_balances_cache(self, as_of_date):
+    def warm_client_balances_cache(self, as_of_date, data):
         """Cache client balances with QTD/YTD."""
-        logger.info("Warming client balances cache...")
-        data = self.service.get_dashboard_data(date=as_of_date, include_charts=False)
-        
-        for client in data['client_balances']:
-            self.conn.execute("""
-                INSERT INTO cached_client_balances (
-                    client_id, as_of_date, client_name, total_balance, qtd_change, ytd_change
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                client['client_id'], as_of_date, client['client_name'],
-                client['total_balance'], client['qtd_change'], client['ytd_change']
-            ))
+        self.conn.executemany("""
+            INSERT INTO cached_client_balances (
+                client_id, as_of_date, client_name, total_balance, qtd_change, ytd_change
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (client['client_id'], as_of_date, client['client_name'],
+             client['total_balance'], client['qtd_change'], client['ytd_change'])
+            for client in data['client_balances']
+        ])
             
-    def warm_fund_balances_cache(self, as_of_date):
+    def warm_fund_balances_cache(self, as_of_date, data):
         """Cache fund balances with QTD/YTD."""
-        logger.info("Warming fund balances cache...")
-        data = self.service.get_dashboard_data(date=as_of_date, include_charts=False)
-        
-        for fund in data['fund_balances']:
-            self.conn.execute("""
-                INSERT INTO cached_fund_balances (
-                    fund_name, as_of_date, fund_ticker, total_balance, qtd_change, ytd_change
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                fund['fund_name'], as_of_date, fund['fund_ticker'],
-                fund['total_balance'], fund['qtd_change'], fund['ytd_change']
-            ))
+        self.conn.executemany("""
+            INSERT INTO cached_fund_balances (
+                fund_name, as_of_date, fund_ticker, total_balance, qtd_change, ytd_change
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (fund['fund_name'], as_of_date, fund['fund_ticker'],
+             fund['total_balance'], fund['qtd_change'], fund['ytd_change'])
+            for fund in data['fund_balances']
+        ])
             
-    def warm_account_details_cache(self, as_of_date):
+    def warm_account_details_cache(self, as_of_date, data):
         """Cache account details with QTD/YTD."""
-        logger.info("Warming account details cache...")
-        data = self.service.get_dashboard_data(date=as_of_date, include_charts=False)
-        
-        for account in data['account_details']:
-            self.conn.execute("""
-                INSERT INTO cached_account_details (
-                    account_id, as_of_date, client_id, client_name, balance, qtd_change, ytd_change
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                account['account_id'], as_of_date, account['client_id'],
-                account['client_name'], account['balance'], 
-                account['qtd_change'], account['ytd_change']
-            ))
+        self.conn.executemany("""
+            INSERT INTO cached_account_details (
+                account_id, as_of_date, client_id, client_name, balance, qtd_change, ytd_change
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (account['account_id'], as_of_date, account['client_id'],
+             account['client_name'], account['balance'],
+             account['qtd_change'], account['ytd_change'])
+            for account in data['account_details']
+        ])
             
-    def warm_chart_data_cache(self, as_of_date):
+    def warm_chart_data_cache(self, as_of_date, data):
         """Cache chart data for 90-day and 3-year views."""
-        logger.info("Warming chart data cache...")
-        data = self.service.get_dashboard_data(date=as_of_date, include_charts=True)
-        
-        # Cache 90-day chart data
-        for point in data['charts']['recent_history']:
-            self.conn.execute("""
-                INSERT INTO cached_chart_data (cache_key, as_of_date, data_date, balance)
-                VALUES (?, ?, ?, ?)
-            """, ('chart_90d', as_of_date, point['date'], point['balance']))
+        self.conn.executemany("""
+            INSERT INTO cached_chart_data (cache_key, as_of_date, data_date, balance)
+            VALUES (?, ?, ?, ?)
+        """, [
+            (cache_key, as_of_date, point['date'], point['balance'])
+            for cache_key, history in (('chart_90d', data['charts']['recent_history']),
+                                       ('chart_3y', data['charts']['long_term_history']))
+            for point in history
+        ])
             
-        # Cache 3-year chart data
-        for point in data['charts']['long_term_history']:
-            self.conn.execute("""
-                INSERT INTO cached_chart_data (cache_key, as_of_date, data_date, balance)
-                VALUES (?, ?, ?, ?)
-            """, ('chart_3y', as_of_date, point['date'], point['balance']))
+    def get_filter_combinations(self, as_of_date, overview):
+        """Per-client, per-fund and per-account views plus popular combinations."""
+        combinations = OrderedDict()
+        
+        def add(spec):
+            combinations.setdefault(filter_hash(spec), spec)
+        
+        # Clicking a row filters by that item with its table as the selection source
+        for client in overview['client_balances'][:self.max_per_dimension]:
+            add(canonical_filters(client_ids=[client['client_id']], selection_source='client'))
+        for fund in overview['fund_balances'][:self.max_per_dimension]:
+            add(canonical_filters(fund_names=[fund['fund_name']], selection_source='fund'))
+        for account in overview['account_details'][:self.max_per_dimension]:
+            add(canonical_filters(account_ids=[account['account_id']], selection_source='account'))
+        
+        # Access dates are request days, so popularity is ranked on recent traffic
+        # even when warming a historical date
+        since = (datetime.now() - timedelta(days=ACCESS_LOG_DAYS)).strftime("%Y-%m-%d")
+        popular = self.service.cache_repo.get_top_filter_combinations(since, self.top_combinations)
+        for row in popular:
+            combinations.setdefault(row['filter_hash'], json.loads(row['filters']))
+        logger.info(f"{len(combinations)} filter combinations to warm "
+                    f"({len(popular)} from the access log)")
+        return list(combinations.values())
+        
+    @staticmethod
+    def dashboard_row(spec, as_of_date, payload):
+        """A cached_dashboard row: (filter_hash, as_of_date, filters, payload)."""
+        return (
+            filter_hash(spec), as_of_date,
+            json.dumps(spec, sort_keys=True, separators=(",", ":")),
+            json.dumps(payload, separators=(",", ":"))
+        )
+        
+    def compute_filtered_views(self, as_of_date, overview):
+        """Compute cached_dashboard rows for common filter combinations."""
+        logger.info("Computing filtered dashboard views...")
+        return [
+            self.dashboard_row(spec, as_of_date, self.service.build_cache_payload(spec, as_of_date))
+            for spec in self.get_filter_combinations(as_of_date, overview)
+        ]
+        
+    def compute_historical_rows(self, as_of_date):
+        """cached_dashboard rows for a past date, including the unfiltered view.
+        
+        The legacy cached_* tables hold a single overview row, so historical
+        overviews are stored in cached_dashboard under the empty filter spec.
+        """
+        overview = self.compute_overview(as_of_date)
+        return ([self.dashboard_row(canonical_filters(), as_of_date, overview)] +
+                self.compute_filtered_views(as_of_date, overview))
+        
+    def warm_filtered_dashboard_cache(self, rows):
+        """Cache full dashboard payloads for common filter combinations."""
+        self.conn.executemany("""
+            INSERT INTO cached_dashboard (filter_hash, as_of_date, filters, payload)
+            VALUES (?, ?, ?, ?)
+        """, rows)
             
+    def refresh_rollups(self):
+        """Roll up newly loaded balance dates before they are cached."""
+        try:
+            count = RollupRepository(self.db_path).refresh_missing()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Skipping rollup refresh ({e}); run migrations.py")
+            return
+        logger.info(f"Rolled up {count} new date(s)")
+        
+    def warm_date(self, as_of_date):
+        """Compute every cache for one date, then write them in one transaction."""
+        # Everything is computed before the first write: large pending writes
+        # would lock out the service's own reads on the shared database
+        with self.stage('compute overview'):
+            overview = self.compute_overview(as_of_date)
+        with self.stage('compute filtered views'):
+            filtered_rows = self.compute_filtered_views(as_of_date, overview)
+        
+        with self.stage('write'):
+            try:
+                self.clear_old_cache(as_of_date)
+                self.warm_overview_cache(as_of_date, overview)
+                self.warm_client_balances_cache(as_of_date, overview)
+                self.warm_fund_balances_cache(as_of_date, overview)
+                self.warm_account_details_cache(as_of_date, overview)
+                self.warm_chart_data_cache(as_of_date, overview)
+                self.warm_filtered_dashboard_cache(filtered_rows)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        
     def warm_all_caches(self):
         """Warm all caches for the latest date."""
+        self.timings = OrderedDict()
         try:
             # Get latest date
             as_of_date = self.get_latest_date()
             logger.info(f"Warming caches for date: {as_of_date}")
             
-            # Clear old cache for this date
-            self.clear_old_cache(as_of_date)
-            
-            # Warm each cache
-            self.warm_overview_cache(as_of_date)
-            self.warm_client_balances_cache(as_of_date)
-            self.warm_fund_balances_cache(as_of_date)
-            self.warm_account_details_cache(as_of_date)
-            self.warm_chart_data_cache(as_of_date)
+            # Chart history reads the daily rollups
+            with self.stage('refresh rollups'):
+                self.refresh_rollups()
             
-            # Commit all changes
-            self.conn.commit()
+            self.warm_date(as_of_date)
             logger.info("Cache warming completed successfully!")
             
             # Show cache statistics
             self.show_cache_stats(as_of_date)
+            self.show_timings()
             
         except Exception as e:
             logger.error(f"Error warming cache: {e}")
+            raise
+            
+    def get_backfill_dates(self, years=BACKFILL_YEARS, quarter_ends_only=False):
+        """Last loaded balance date of each month (or quarter) over the past years."""
+        latest = self.get_latest_date()
+        start = (datetime.strptime(latest, "%Y-%m-%d") - timedelta(days=365 * years)).strftime("%Y-%m-%d")
+        rows = self.conn.execute("""
+            SELECT MAX(balance_date) FROM account_balances
+            WHERE balance_date >= ? AND balance_date < ?
+            GROUP BY strftime('%Y-%m', balance_date)
+            ORDER BY 1
+        """, (start, latest)).fetchall()
+        dates = [row[0] for row in rows]
+        # The current month's last date is the latest date, warmed by warm_all_caches;
+        # a partial month's last date is not a month-end
+        current_month = latest[:7]
+        dates = [d for d in dates if d[:7] != current_month]
+        if quarter_ends_only:
+            dates = [d for d in dates if d[5:7] in QUARTER_END_MONTHS]
+        return dates
+        
+    def get_warmed_dates(self, dates):
+        """Dates whose unfiltered view is already in cached_dashboard."""
+        overview_hash = filter_hash(canonical_filters())
+        placeholders = ",".join("?" * len(dates))
+        rows = self.conn.execute(f"""
+            SELECT as_of_date FROM cached_dashboard
+            WHERE filter_hash = ? AND as_of_date IN ({placeholders})
+        """, [overview_hash, *dates]).fetchall()
+        return {row[0] for row in rows}
+        
+    def write_historical_rows(self, as_of_date, rows):
+        """Replace one date's cached_dashboard rows in its own transaction."""
+        try:
+            self.conn.execute("DELETE FROM cached_dashboard WHERE as_of_date = ?", (as_of_date,))
+            self.warm_filtered_dashboard_cache(rows)
+            self.conn.commit()
+        except Exception:
             self.conn.rollback()
             raise
+        
+    def backfill(self, dates, workers=None, force=False):
+        """Warm cached_dashboard for past dates using a process pool.
+        
+        Workers only read; this process writes each date as it completes, so a
+        date is either fully cached or absent. Dates already cached are skipped
+        unless force is set, which makes an interrupted backfill resumable.
+        """
+        self.timings = OrderedDict()
+        with self.stage('refresh rollups'):
+            self.refresh_rollups()
+        
+        pending = list(dates)
+        if not force and pending:
+            warmed = self.get_warmed_dates(pending)
+            pending = [d for d in pending if d not in warmed]
+            logger.info(f"Skipping {len(warmed)} date(s) already cached")
+        if not pending:
+            logger.info("Nothing to backfill")
+            return 0
+        
+        logger.info(f"Backfilling {len(pending)} date(s) from {pending[0]} to {pending[-1]}")
+        started = time.perf_counter()
+        done = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_backfill_worker,
+                                 initargs=(self.db_path, self.top_combinations,
+                                           self.max_per_dimension)) as pool:
+            futures = {pool.submit(_compute_backfill_date, d): d for d in pending}
+            for future in as_completed(futures):
+                as_of_date = futures[future]
+                try:
+                    rows, seconds = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to compute {as_of_date}: {e}")
+                    continue
+                self.timings['compute (workers)'] = self.timings.get('compute (workers)', 0.0) + seconds
+                with self.stage('write'):
+                    self.write_historical_rows(as_of_date, rows)
+                done += 1
+                logger.info(f"[{done}/{len(pending)}] {as_of_date}: {len(rows)} views "
+                            f"in {seconds * 1000:.0f} ms")
+        
+        self.timings['wall clock'] = time.perf_counter() - started
+        logger.info(f"Backfilled {done} of {len(pending)} date(s)")
+        self.show_timings()
+        return done
+        
+    def show_timings(self):
+        """Log how long each warm stage took."""
+        logger.info("Stage timings:")
+        for name, seconds in self.timings.items():
+            logger.info(f"  - {name}: {seconds * 1000:.1f} ms")
+        if 'wall clock' not in self.timings:
+            logger.info(f"  - total: {sum(self.timings.values()) * 1000:.1f} ms")
             
     def show_cache_stats(self, as_of_date):
         """Display cache statistics."""
@@ -177,7 +363,8 @@ class CacheWarmer:
             ('cached_client_balances', 'client entries'),
             ('cached_fund_balances', 'fund entries'),
             ('cached_account_details', 'account entries'),
-            ('cached_chart_data', 'chart data points')
+            ('cached_chart_data', 'chart data points'),
+            ('cached_dashboard', 'filtered dashboard entries')
         ]
         
         for table, desc in tables:
@@ -197,10 +384,49 @@ class CacheWarmer:
         self.conn.close()
         
 
+# Per-process warmer for backfill workers
+_worker_warmer = None
+
+
+def _init_backfill_worker(db_path, top_combinations, max_per_dimension):
+    global _worker_warmer
+    _worker_warmer = CacheWarmer(db_path, top_combinations, max_per_dimension)
+
+
+def _compute_backfill_date(as_of_date):
+    started = time.perf_counter()
+    rows = _worker_warmer.compute_historical_rows(as_of_date)
+    return rows, time.perf_counter() - started
+
+
 if __name__ == "__main__":
-    warmer = CacheWarmer()
+    parser = argparse.ArgumentParser(description='Precompute dashboard caches for the latest date '
+                                                 '(or past month/quarter-ends with --backfill)')
+    parser.add_argument('--db', default='client_exploration.db', help='Path to SQLite database')
+    parser.add_argument('--top', type=int, default=TOP_COMBINATIONS,
+                        help='Most requested filter combinations to warm from the access log')
+    parser.add_argument('--max-per-dimension', type=int, default=MAX_PER_DIMENSION,
+                        help='Largest clients/funds/accounts to warm as single selections')
+    parser.add_argument('--backfill', action='store_true',
+                        help='Warm past month-end dates instead of the latest date')
+    parser.add_argument('--years', type=int, default=BACKFILL_YEARS,
+                        help='How many years back to backfill')
+    parser.add_argument('--quarter-ends', action='store_true',
+                        help='Backfill quarter-ends only instead of every month-end')
+    parser.add_argument('--dates', nargs='+', metavar='YYYY-MM-DD',
+                        help='Backfill these dates instead of month/quarter-ends')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true',
+                        help='Recompute dates that are already cached')
+    args = parser.parse_args()
+    
+    warmer = CacheWarmer(args.db, args.top, args.max_per_dimension)
     try:
         warmer.setup_cache_tables()
-        warmer.warm_all_caches()
+        if args.backfill or args.dates:
+            dates = args.dates or warmer.get_backfill_dates(args.years, args.quarter_ends)
+            warmer.backfill(dates, args.workers, args.force)
+        else:
+            warmer.warm_all_caches()
     finally:
         warmer.close()
\ No newline at end of file